@@ -0,0 +1,115 @@
+#include <algorithm>
+#include <cstdio>
+#include <iostream>
+#include <thread>
+#include "energy.h"
+#include "rapl.h"
+#include "powercap.h"
+#include "replay.h"
+
+using namespace std;
+
+void CounterPackage::reset() {
+	read_counters(last);
+	for (int d = 0; d < DOMAIN_COUNT; ++d)
+		total[d] = 0;
+}
+
+void CounterPackage::sample() {
+	double counters[DOMAIN_COUNT];
+	read_counters(counters);
+	for (int d = 0; d < DOMAIN_COUNT; ++d) {
+		if (!available[d])
+			continue;
+		double delta = counters[d] - last[d];
+		if (delta < 0 && range[d] > 0)
+			delta += range[d]; // o contador voltou a zero entre as duas leituras
+		total[d] += delta;
+		last[d] = counters[d];
+	}
+}
+
+int CounterPackage::get_package() {
+	return package;
+}
+
+bool CounterPackage::pp0_available() {
+	return available[DOMAIN_PP0];
+}
+
+bool CounterPackage::pp1_available() {
+	return available[DOMAIN_PP1];
+}
+
+bool CounterPackage::dram_available() {
+	return available[DOMAIN_DRAM];
+}
+
+double CounterPackage::pkg_total_energy() {
+	return total[DOMAIN_PKG];
+}
+
+double CounterPackage::pp0_total_energy() {
+	return total[DOMAIN_PP0];
+}
+
+double CounterPackage::pp1_total_energy() {
+	return total[DOMAIN_PP1];
+}
+
+double CounterPackage::dram_total_energy() {
+	return total[DOMAIN_DRAM];
+}
+
+vector<pair<int, int>> discoverPackages() {
+	vector<pair<int, int>> packages;
+	char filename[BUFSIZ];
+	const unsigned int processor_count = thread::hardware_concurrency();
+	for (unsigned int cpu = 0; cpu < processor_count; ++cpu) {
+		sprintf(filename, "/sys/devices/system/cpu/cpu%u/topology/physical_package_id", cpu);
+		FILE *fff = fopen(filename, "r");
+		if (fff == NULL)
+			continue;
+		int package;
+		if (fscanf(fff, "%d", &package) == 1
+			&& find_if(packages.begin(), packages.end(), [&](const pair<int, int>& p) { return p.first == package; }) == packages.end())
+			packages.push_back(make_pair(package, cpu));
+		fclose(fff);
+	}
+	sort(packages.begin(), packages.end());
+	return packages;
+}
+
+static bool createMsrPackages(vector<EnergyPackage*> *packages) {
+	for (auto& [package, core] : discoverPackages()) {
+		Rapl* r = new Rapl(core);
+		if (!r->is_valid()) {
+			delete r;
+			for (EnergyPackage* p : *packages)
+				delete p;
+			packages->clear();
+			return false;
+		}
+		packages->push_back(r);
+	}
+	return !packages->empty();
+}
+
+bool createPackages(const string& backend, vector<EnergyPackage*> *packages) {
+	if (backend == "msr")
+		return createMsrPackages(packages);
+	if (backend == "powercap")
+		return createPowercapPackages(packages);
+	if (backend == "synthetic")
+		return createSyntheticPackages(discoverPackages(), packages);
+	if (backend.rfind("replay:", 0) == 0)
+		return createReplayPackages(backend.substr(7), packages);
+	if (backend == "auto") {
+		if (createMsrPackages(packages))
+			return true;
+		cout << "MSR indisponivel, tentando powercap" << endl;
+		return createPowercapPackages(packages);
+	}
+	cout << "Backend de energia desconhecido: " << backend << endl;
+	return false;
+}
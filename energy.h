@@ -0,0 +1,73 @@
+#ifndef ENERGY_H_
+#define ENERGY_H_
+
+#include <string>
+#include <utility>
+#include <vector>
+
+// Uma instancia por pacote (socket), independente de onde vem a leitura
+class EnergyPackage {
+
+public:
+	virtual ~EnergyPackage() {}
+	virtual void reset() = 0;
+	virtual void sample() = 0;
+	virtual EnergyPackage* clone() = 0; // nova leitura do mesmo pacote (ex.: para o sampler do trace)
+
+	virtual int get_package() = 0;
+
+	virtual bool pp0_available() = 0;
+	virtual bool pp1_available() = 0;
+	virtual bool dram_available() = 0;
+
+	virtual double pkg_total_energy() = 0;
+	virtual double pp0_total_energy() = 0;
+	virtual double pp1_total_energy() = 0;
+	virtual double dram_total_energy() = 0;
+};
+
+enum EnergyDomain {
+	DOMAIN_PKG = 0,
+	DOMAIN_PP0 = 1,
+	DOMAIN_PP1 = 2,
+	DOMAIN_DRAM = 3,
+	DOMAIN_COUNT = 4
+};
+
+// Pacote lido de contadores acumulados em J (powercap, synthetic, replay); trata a volta do contador
+class CounterPackage : public EnergyPackage {
+
+protected:
+	int package = -1;
+	bool available[DOMAIN_COUNT] = {true, false, false, false};
+	double range[DOMAIN_COUNT] = {0, 0, 0, 0}; // valor em que o contador volta a zero (J), 0 se nunca volta
+
+	virtual void read_counters(double counters[DOMAIN_COUNT]) = 0;
+
+private:
+	double last[DOMAIN_COUNT] = {0, 0, 0, 0};
+	double total[DOMAIN_COUNT] = {0, 0, 0, 0};
+
+public:
+	void reset();
+	void sample();
+
+	int get_package();
+
+	bool pp0_available();
+	bool pp1_available();
+	bool dram_available();
+
+	double pkg_total_energy();
+	double pp0_total_energy();
+	double pp1_total_energy();
+	double dram_total_energy();
+};
+
+// (pacote, primeiro core dele) em ordem de pacote, lido uma vez da topologia em /sys
+// (std::map colidiria com o kernel map() nos arquivos com using namespace std)
+std::vector<std::pair<int, int>> discoverPackages();
+// backend: auto (msr, senao powercap), msr, powercap, synthetic ou replay:<trace>
+bool createPackages(const std::string& backend, std::vector<EnergyPackage*> *packages);
+
+#endif /* ENERGY_H_ */
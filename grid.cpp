@@ -0,0 +1,54 @@
+#include "grid.h"
+
+using namespace std;
+
+Grid allocateGrid(int m, int n, bool contiguous)
+{
+    Grid grid;
+    grid.m = m;
+    grid.n = n;
+    grid.rows = new double*[m];
+    grid.data = NULL;
+    if (contiguous) {
+        // sem inicializar: as paginas so sao alocadas no primeiro acesso (fillGrid)
+        grid.data = new double[(long long)m * n];
+        for (int i = 0; i < m; ++i)
+            grid.rows[i] = grid.data + (long long)i * n;
+        return grid;
+    }
+    double** rows = grid.rows;
+    #pragma omp parallel for shared(rows) firstprivate(m,n)
+    for (int i = 0; i < m; ++i)
+        rows[i] = new double[n];
+    return grid;
+}
+
+void fillGrid(Grid grid, double value)
+{
+    double** rows = grid.rows;
+    const int m = grid.m, n = grid.n;
+    if (grid.data == NULL) {
+        #pragma omp parallel for collapse(2) shared(rows) firstprivate(m,n,value)
+        for (int x = 0; x < m; ++x)
+            for (int y = 0; y < n; ++y)
+                rows[x][y] = value;
+        return;
+    }
+    // first-touch: mesmas linhas por thread que o schedule(static) dos kernels, entao
+    // cada pagina fica no no NUMA da thread que vai usa-la
+    #pragma omp parallel for schedule(static) shared(rows) firstprivate(m,n,value)
+    for (int x = 0; x < m; ++x)
+        for (int y = 0; y < n; ++y)
+            rows[x][y] = value;
+}
+
+void freeGrid(Grid grid)
+{
+    if (grid.data != NULL) {
+        delete []grid.data;
+    } else {
+        for (int i = 0; i < grid.m; ++i)
+            delete []grid.rows[i];
+    }
+    delete []grid.rows;
+}
@@ -0,0 +1,18 @@
+#ifndef GRID_H
+#define GRID_H
+
+#include <cstddef>
+#include <omp.h>
+
+// Array MxN de doubles; rows funciona como o double** original em todas as variantes
+struct Grid {
+    double** rows;
+    double* data; // bloco unico (NULL no baseline, que aloca cada linha separada)
+    int m, n;
+};
+
+Grid allocateGrid(int m, int n, bool contiguous);
+void fillGrid(Grid grid, double value);
+void freeGrid(Grid grid);
+
+#endif
@@ -4,7 +4,10 @@
 #include "reduction.h"
 #include "map.h"
 #include "stencil.h"
+#include "grid.h"
 #include "utils.h"
+#include "sampler.h"
+#include "probe.h"
 #include <cstdlib>
 #include <vector>
 #include <string>
@@ -17,6 +20,8 @@
 using namespace std;
 
 int AvailableThreads, MaxThreads;
+KernelVariant Variant = VARIANT_BASELINE;
+vector<EnergyPackage*> PhasePackages; // leitura separada para o preparo e a limpeza, sem sobrescrever a do kernel
 
 void wait(int seconds) {
     #ifdef __linux__ 
@@ -26,148 +31,235 @@ void wait(int seconds) {
     #endif
 }
 
-void measureIdle(vector<Rapl*> packages) {
+void measureIdle(vector<EnergyPackage*> packages, int arrSize, int iter) {
+    double clock_start, clock_end;
     cout << "Measuring idle (1s)" << endl;
+    setTracePhase(MEASURE_IDLE, STAGE_EXECUTE);
     resetPackages(packages);
+    clock_start = omp_get_wtime();
     wait(1);
+    clock_end = omp_get_wtime();
     samplePackages(packages);
+    clearTracePhase();
     printPackages(packages);
+    writeRecord(MEASURE_IDLE, Variant, MaxThreads, arrSize, iter, clock_end - clock_start, packages);
     cout << endl;
 }
 
-void testReduction(vector<Rapl*> packages, int arrSize, int iter) {
+// baseline: uma alocacao por linha, inicializada com todas as threads disponiveis (como sempre foi);
+// demais variantes: bloco contiguo inicializado com as threads e o schedule do kernel (first-touch NUMA)
+bool prepareInitialize() {
+    const bool contiguous = Variant != VARIANT_BASELINE;
+    omp_set_num_threads(contiguous ? MaxThreads : AvailableThreads);
+    return contiguous;
+}
+
+double startPhase() {
+    resetPeakMemory();
+    resetPackages(PhasePackages);
+    return omp_get_wtime();
+}
+
+void finishPhase(MeasureKind kind, TraceStage stage, double clock_start, int threads, int arrSize, int iter) {
+    double clock_end = omp_get_wtime();
+    samplePackages(PhasePackages);
+    const double peakMemory = getPeakMemory();
+    printPhase(stage == STAGE_INIT ? "init" : "clean", clock_end - clock_start, threads, peakMemory, PhasePackages);
+    writePhaseRecord(stage, peakMemory, kind, Variant, threads, arrSize, iter, clock_end - clock_start, PhasePackages);
+}
+
+void setStencilWalls(Grid grid) {
+    double** rows = grid.rows;
+    const int m = grid.m, n = grid.n;
+    #pragma omp parallel for shared(rows) firstprivate(m,n)
+    for (int wallUD = 0; wallUD < n; ++wallUD)
+    {
+        rows[0][wallUD] = 1;
+        rows[m - 1][wallUD] = 1;
+    }
+}
+
+void testReduction(vector<EnergyPackage*> packages, int arrSize, int iter) {
     double clock_start, clock_end;
     // initialize
-    omp_set_num_threads(AvailableThreads);
+    setTracePhase(MEASURE_REDUCTION, STAGE_INIT);
+    const bool contiguous = prepareInitialize();
     const int reduceM = arrSize, reduceN = arrSize, iterations = iter; // 60kx60kx ~ 25GB of RAM | 40kx40k ~ 14GB
     cout << "Initialize Reduction (" << reduceM << "x" << reduceN << " array)" << endl;
-    double** reduceArray = new double*[reduceM];
-    #pragma omp parallel shared(reduceArray) firstprivate(reduceM,reduceN)
-    {
-        #pragma omp for
-        for (int i = 0; i < reduceM; ++i)
-            reduceArray[i] = new double[reduceN];
-        #pragma omp for collapse(2)
-        for (int x = 0; x < reduceM; ++x) // populate
-            for (int y = 0; y < reduceN; ++y)
-                reduceArray[x][y] = 1; // rand();
-    }
+    const double init_start = startPhase();
+    const int init_threads = omp_get_max_threads();
+    Grid reduceGrid = allocateGrid(reduceM, reduceN, contiguous);
+    fillGrid(reduceGrid, 1); // rand();
+    finishPhase(MEASURE_REDUCTION, STAGE_INIT, init_start, init_threads, arrSize, iter);
     // execute
+    setTracePhase(MEASURE_REDUCTION, STAGE_NONE);
     omp_set_num_threads(MaxThreads);
     wait(1); // wait a bit
     cout << "Execute Reduction" << endl;
+    setTracePhase(MEASURE_REDUCTION, STAGE_EXECUTE);
+    resetPeakMemory();
     resetPackages(packages);
     clock_start = omp_get_wtime();
-    reduce(reduceArray, reduceM, reduceN, iterations);
+    switch (Variant) {
+        case VARIANT_SIMD:
+        case VARIANT_TILED: // sem reuso entre iteracoes para bloquear, igual ao simd
+            reduceSimd(reduceGrid.data, reduceM, reduceN, iterations);
+            break;
+        default:
+            reduce(reduceGrid.rows, reduceM, reduceN, iterations);
+            break;
+    }
     clock_end = omp_get_wtime();
     samplePackages(packages);
+    const double execution_memory = getPeakMemory();
     printExecutionTime(clock_start, clock_end);
     printPackages(packages);
+    printExecutionMemory(execution_memory);
+    writePhaseRecord(STAGE_EXECUTE, execution_memory, MEASURE_REDUCTION, Variant, MaxThreads, arrSize, iter, clock_end - clock_start, packages);
     // clean
+    setTracePhase(MEASURE_REDUCTION, STAGE_CLEAN);
     cout << "Clean Reduction" << endl;
-    for (int i = 0; i < reduceM; ++i)
-        delete reduceArray[i];
-    delete []reduceArray;
+    const double clean_start = startPhase();
+    freeGrid(reduceGrid);
+    finishPhase(MEASURE_REDUCTION, STAGE_CLEAN, clean_start, 1, arrSize, iter); // freeGrid e serial
+    // a linha do kernel vai depois das fases, para que quem le o CSV em sequencia ja tenha as tres
+    writeRecord(MEASURE_REDUCTION, Variant, MaxThreads, arrSize, iter, clock_end - clock_start, packages);
+    clearTracePhase();
     cout << endl;
 }
 
-void testMap(vector<Rapl*> packages, int arrSize, int iter) {
+void testMap(vector<EnergyPackage*> packages, int arrSize, int iter) {
     double clock_start, clock_end;
     // initialize
-    omp_set_num_threads(AvailableThreads);
+    setTracePhase(MEASURE_MAP, STAGE_INIT);
+    const bool contiguous = prepareInitialize();
     const int mapM = arrSize, mapN = arrSize, iterations = iter;
     cout << "Initialize Map (" << mapM << "x" << mapN << " array)" << endl;
-    double** mapArray = new double*[mapM];
-    #pragma omp parallel shared(mapArray) firstprivate(mapM,mapN)
-    {
-        #pragma omp for
-        for (int i = 0; i < mapM; ++i)
-            mapArray[i] = new double[mapN];
-        #pragma omp for collapse(2)
-        for (int x = 0; x < mapM; ++x) // populate
-            for (int y = 0; y < mapN; ++y)
-                mapArray[x][y] = 1; // rand();
-    }
+    const double init_start = startPhase();
+    const int init_threads = omp_get_max_threads();
+    Grid mapGrid = allocateGrid(mapM, mapN, contiguous);
+    fillGrid(mapGrid, 1); // rand();
+    finishPhase(MEASURE_MAP, STAGE_INIT, init_start, init_threads, arrSize, iter);
     // execute
+    setTracePhase(MEASURE_MAP, STAGE_NONE);
     omp_set_num_threads(MaxThreads);
     wait(1); // wait a bit
     cout << "Execute Map" << endl;
+    setTracePhase(MEASURE_MAP, STAGE_EXECUTE);
+    resetPeakMemory();
     resetPackages(packages);
     clock_start = omp_get_wtime();
-    map(mapArray, mapM, mapN, iterations);
+    switch (Variant) {
+        case VARIANT_SIMD:
+            mapSimd(mapGrid.data, mapM, mapN, iterations);
+            break;
+        case VARIANT_TILED:
+            mapTiled(mapGrid.data, mapM, mapN, iterations);
+            break;
+        default:
+            map(mapGrid.rows, mapM, mapN, iterations);
+            break;
+    }
     clock_end = omp_get_wtime();
     samplePackages(packages);
+    const double execution_memory = getPeakMemory();
     printExecutionTime(clock_start, clock_end);
     printPackages(packages);
+    printExecutionMemory(execution_memory);
+    writePhaseRecord(STAGE_EXECUTE, execution_memory, MEASURE_MAP, Variant, MaxThreads, arrSize, iter, clock_end - clock_start, packages);
     // clean
+    setTracePhase(MEASURE_MAP, STAGE_CLEAN);
     cout << "Clean Map" << endl;
-    for (int i = 0; i < mapM; ++i)
-        delete mapArray[i];
-    delete []mapArray;
+    const double clean_start = startPhase();
+    freeGrid(mapGrid);
+    finishPhase(MEASURE_MAP, STAGE_CLEAN, clean_start, 1, arrSize, iter); // freeGrid e serial
+    // a linha do kernel vai depois das fases, para que quem le o CSV em sequencia ja tenha as tres
+    writeRecord(MEASURE_MAP, Variant, MaxThreads, arrSize, iter, clock_end - clock_start, packages);
+    clearTracePhase();
     cout << endl;
 }
 
-void testStencil(vector<Rapl*> packages, int arrSize, int iter) {
+void testStencil(vector<EnergyPackage*> packages, int arrSize, int iter) {
     double clock_start, clock_end;
     // initialize
-    omp_set_num_threads(AvailableThreads);
+    setTracePhase(MEASURE_STENCIL, STAGE_INIT);
+    const bool contiguous = prepareInitialize();
     const int stencilM = arrSize + 2, stencilN = arrSize + 2, iterations = iter;
     cout << "Initialize Stencil (" << stencilM << "x" << stencilN << " array)" << endl;
-    double** stencilArray = new double*[stencilM];
-    double** newArray = new double*[stencilM];
-    #pragma omp parallel shared(stencilArray, newArray) firstprivate(stencilM,stencilN,iterations)
-    {
-        #pragma omp for
-        for (int i = 0; i < stencilM; ++i)
-            stencilArray[i] = new double[stencilN];
-        #pragma omp for collapse(2)
-        for (int x = 0; x < stencilM; ++x) // populate
-            for (int y = 0; y < stencilN; ++y)
-                stencilArray[x][y] = 0;
-        #pragma omp for
-        for (int wallUD = 0; wallUD < stencilN; ++wallUD)
-        {
-            stencilArray[0][wallUD] = 1;
-            stencilArray[stencilN - 1][wallUD] = 1;
-        }
-        #pragma omp for nowait
-        for (int i = 0; i < stencilM; ++i)
-            newArray[i] = new double[stencilN];
+    const double init_start = startPhase();
+    const int init_threads = omp_get_max_threads();
+    Grid stencilGrid = allocateGrid(stencilM, stencilN, contiguous);
+    Grid newGrid = allocateGrid(stencilM, stencilN, contiguous);
+    fillGrid(stencilGrid, 0);
+    setStencilWalls(stencilGrid);
+    if (contiguous) {
+        // o baseline nunca inicializou o segundo array; aqui ele precisa do first-touch e das paredes
+        fillGrid(newGrid, 0);
+        setStencilWalls(newGrid);
     }
+    finishPhase(MEASURE_STENCIL, STAGE_INIT, init_start, init_threads, arrSize, iter);
     // execute
+    setTracePhase(MEASURE_STENCIL, STAGE_NONE);
     omp_set_num_threads(MaxThreads);
     wait(1); // wait a bit
     cout << "Execute Stencil" << endl;
+    setTracePhase(MEASURE_STENCIL, STAGE_EXECUTE);
+    resetPeakMemory();
     resetPackages(packages);
     clock_start = omp_get_wtime();
-    stencil(stencilArray, newArray, stencilM, stencilN, iterations);
+    switch (Variant) {
+        case VARIANT_SIMD:
+            stencilSimd(stencilGrid.data, newGrid.data, stencilM, stencilN, iterations);
+            break;
+        case VARIANT_TILED:
+            stencilTiled(stencilGrid.data, newGrid.data, stencilM, stencilN, iterations);
+            break;
+        default:
+            stencil(stencilGrid.rows, newGrid.rows, stencilM, stencilN, iterations);
+            break;
+    }
     clock_end = omp_get_wtime();
     samplePackages(packages);
+    const double execution_memory = getPeakMemory();
     printExecutionTime(clock_start, clock_end);
     printPackages(packages);
+    printExecutionMemory(execution_memory);
+    writePhaseRecord(STAGE_EXECUTE, execution_memory, MEASURE_STENCIL, Variant, MaxThreads, arrSize, iter, clock_end - clock_start, packages);
     // clean
+    setTracePhase(MEASURE_STENCIL, STAGE_CLEAN);
     cout << "Clean Stencil" << endl;
-    for (int i = 0; i < stencilM; ++i)
-        delete stencilArray[i];
-    delete []stencilArray;
-    for (int i = 0; i < stencilM; ++i)
-        delete newArray[i];
-    delete []newArray;
+    const double clean_start = startPhase();
+    freeGrid(stencilGrid);
+    freeGrid(newGrid);
+    finishPhase(MEASURE_STENCIL, STAGE_CLEAN, clean_start, 1, arrSize, iter); // freeGrid e serial
+    // a linha do kernel vai depois das fases, para que quem le o CSV em sequencia ja tenha as tres
+    writeRecord(MEASURE_STENCIL, Variant, MaxThreads, arrSize, iter, clock_end - clock_start, packages);
+    clearTracePhase();
     cout << endl;
 }
 
 int main(int argc, char *argv[])
 {
-    int nSize = 100, iterations = 5000000;
+    int nSize = 100, iterations = 5000000, frequency = 100;
     AvailableThreads = omp_get_max_threads();
     MaxThreads = AvailableThreads;
     std::ios_base::sync_with_stdio(false);
 
     //omp_set_num_threads(12); //manually set max amount of threads
     cout << "Quantidade maxima de threads inicial: " << AvailableThreads << endl;
+    cout << getHostTag() << endl;
 
-    vector<Rapl*> packages;
-    initializePackages(&packages);
+    // os pacotes sao descobertos so quando o primeiro teste (ou trace) precisa, depois de -e e -o
+    string backend = "auto";
+    vector<EnergyPackage*> packages;
+    bool packagesReady = false;
+    auto preparePackages = [&]() {
+        if (packagesReady)
+            return;
+        initializePackages(&packages, backend);
+        PhasePackages = clonePackages(packages);
+        packagesReady = true;
+    };
     cout << endl;
 
     if (argc == 1) {
@@ -179,25 +271,37 @@ int main(int argc, char *argv[])
         cout << "-o | --output <file>   Altera a saida para um arquivo" << endl;
         cout << "-n | --number <1..N>   Altera o tamanho do array (NxN)" << endl;
         cout << "-i | --iter <1..N>     Altera a quantidade de iteracoes" << endl;
+        cout << "-v | --variant <nome>  Altera a variante dos kernels: baseline, contiguous, simd ou tiled" << endl;
+        cout << "-d | --data <file>     Grava tambem as medicoes em CSV no arquivo" << endl;
+        cout << "-e | --energy <fonte>  Fonte de energia: auto, msr, powercap, synthetic ou replay:<trace>" << endl;
+        cout << "-f | --frequency <Hz>  Altera a frequencia de amostragem do trace (antes de -t)" << endl;
+        cout << "-t | --trace <file>    Amostra a energia continuamente em um trace binario" << endl;
+        cout << "-p | --probe           Mede a banda de memoria e o pico de GFLOP/s (perfil do roofline)" << endl;
     }
 
     for (int i=1; i<argc; ++i) {
         string arg(argv[i]);
         if (arg == "-r" || arg == "--reduction") {
-            measureIdle(packages);
+            preparePackages();
+            measureIdle(packages, nSize, iterations);
             testReduction(packages, nSize, iterations);
             wait(1); // wait a bit
-            measureIdle(packages);
+            measureIdle(packages, nSize, iterations);
         } else if (arg == "-m" || arg == "--map") {
-            measureIdle(packages);
+            preparePackages();
+            measureIdle(packages, nSize, iterations);
             testMap(packages, nSize, iterations);
             wait(1); // wait a bit
-            measureIdle(packages);
+            measureIdle(packages, nSize, iterations);
         } else if (arg == "-s" || arg == "--stencil") {
-            measureIdle(packages);
+            preparePackages();
+            measureIdle(packages, nSize, iterations);
             testStencil(packages, nSize, iterations);
             wait(1); // wait a bit
-            measureIdle(packages);
+            measureIdle(packages, nSize, iterations);
+        } else if (arg == "-p" || arg == "--probe") {
+            cout << "Probe Bandwidth (triad): " << probeBandwidth(MaxThreads) << " GB/s" << endl;
+            cout << "Probe Compute: " << probeCompute(MaxThreads) << " GFLOP/s" << endl << endl;
         } else if (arg == "-c" || arg == "--cores") {
             ++i;
             if (argc < i) {
@@ -221,7 +325,68 @@ int main(int argc, char *argv[])
             string filestr(argv[i]);
             FILE* fp = freopen(argv[i],"a",stdout);
             if (fp==NULL) continue;
-            cout << "Saida alterada para " << filestr << endl << endl;
+            cout << "Saida alterada para " << filestr << endl;
+            cout << getHostTag() << endl << endl;
+        } else if (arg == "-d" || arg == "--data") {
+            ++i;
+            if (argc <= i) {
+                cout << "Faltando arquivo apos '-d'" << endl;
+                exit(127);
+            }
+            if (!openRecordFile(argv[i])) {
+                cout << "Nao foi possivel abrir " << argv[i] << endl << endl;
+                continue;
+            }
+            cout << "Dados gravados em " << argv[i] << endl << endl;
+        } else if (arg == "-v" || arg == "--variant") {
+            ++i;
+            if (argc <= i) {
+                cout << "Faltando variante apos '-v'" << endl;
+                exit(127);
+            }
+            if (!parseVariant(argv[i], &Variant)) {
+                cout << "Variante deve ser baseline, contiguous, simd ou tiled" << endl;
+                exit(127);
+            }
+            cout << "Variante alterada para " << getVariantName(Variant) << endl << endl;
+        } else if (arg == "-e" || arg == "--energy") {
+            ++i;
+            if (argc <= i) {
+                cout << "Faltando fonte de energia apos '-e'" << endl;
+                exit(127);
+            }
+            if (packagesReady) {
+                cout << "A fonte de energia deve vir antes do primeiro teste" << endl;
+                exit(127);
+            }
+            backend = argv[i];
+            cout << "Fonte de energia alterada para " << backend << endl << endl;
+        } else if (arg == "-f" || arg == "--frequency") {
+            ++i;
+            if (argc <= i) {
+                cout << "Faltando frequencia apos '-f'" << endl;
+                exit(127);
+            }
+            string freqstr(argv[i]);
+            int freq = stoi(freqstr);
+            if (freq < 1 || freq > 10000) {
+                cout << "Frequencia deve ser de 1 ate 10000 Hz" << endl;
+                exit(127);
+            }
+            frequency = freq;
+            cout << "Frequencia do trace alterada para " << frequency << "Hz" << endl << endl;
+        } else if (arg == "-t" || arg == "--trace") {
+            ++i;
+            if (argc <= i) {
+                cout << "Faltando arquivo apos '-t'" << endl;
+                exit(127);
+            }
+            preparePackages();
+            if (!startTrace(argv[i], frequency, packages)) {
+                cout << "Nao foi possivel abrir " << argv[i] << endl << endl;
+                continue;
+            }
+            cout << "Trace gravado em " << argv[i] << " (" << frequency << "Hz)" << endl << endl;
         } else if (arg == "-n" || arg == "--number") {
             ++i;
             if (argc < i) {
@@ -255,5 +420,6 @@ int main(int argc, char *argv[])
         }
     }
 
+    stopTrace();
     return 0;
 }
@@ -18,3 +18,39 @@ void map(double** arr, int m, int n, int iterations)
                     arr[x][y] = mapTransform(arr[x][y]);
     }
 }
+
+// array contiguo, laco interno vetorizado
+void mapSimd(double* arr, int m, int n, int iterations)
+{
+    #pragma omp parallel firstprivate(m,n,iterations)
+    {
+        for (int i = 0; i < iterations; ++i)
+            #pragma omp for schedule(static)
+            for (int x = 0; x < m; ++x)
+            {
+                double* row = arr + (long long)x * n;
+                #pragma omp simd
+                for (int y = 0; y < n; ++y)
+                    row[y] = mapTransform(row[y]);
+            }
+    }
+}
+
+// bloqueio temporal: cada bloco recebe todas as iteracoes enquanto esta na cache
+#define MAP_TILE_ELEMENTS 16384 // 128 KB
+
+void mapTiled(double* arr, int m, int n, int iterations)
+{
+    const long long size = (long long)m * n;
+    const long long tiles = (size + MAP_TILE_ELEMENTS - 1) / MAP_TILE_ELEMENTS;
+    #pragma omp parallel for schedule(static) firstprivate(size,iterations)
+    for (long long t = 0; t < tiles; ++t)
+    {
+        double* tile = arr + t * MAP_TILE_ELEMENTS;
+        const int length = (int)(size - t * MAP_TILE_ELEMENTS < MAP_TILE_ELEMENTS ? size - t * MAP_TILE_ELEMENTS : MAP_TILE_ELEMENTS);
+        for (int i = 0; i < iterations; ++i)
+            #pragma omp simd
+            for (int y = 0; y < length; ++y)
+                tile[y] = mapTransform(tile[y]);
+    }
+}
@@ -6,5 +6,7 @@
 #include <stdio.h>
 
 void map(double** arr, int m, int n, int iterations);
+void mapSimd(double* arr, int m, int n, int iterations);
+void mapTiled(double* arr, int m, int n, int iterations);
 
 #endif
@@ -0,0 +1,88 @@
+#include <cstdio>
+#include <cstring>
+#include <iostream>
+#include "powercap.h"
+
+#define POWERCAP_PATH "/sys/class/powercap/intel-rapl:"
+#define POWERCAP_MAX_ZONES 64
+
+using namespace std;
+
+static bool read_line(const string& filename, char* buffer, int size) {
+	FILE *fff = fopen(filename.c_str(), "r");
+	if (fff == NULL)
+		return false;
+	bool ok = fgets(buffer, size, fff) != NULL;
+	fclose(fff);
+	if (ok)
+		buffer[strcspn(buffer, "\n")] = 0;
+	return ok;
+}
+
+static double read_joules(const string& filename) {
+	char buffer[64];
+	if (!read_line(filename, buffer, sizeof(buffer)))
+		return 0;
+	return strtoull(buffer, NULL, 10) * 1e-6;
+}
+
+PowercapPackage::PowercapPackage(int zone_number) {
+	zone = zone_number;
+	string base = POWERCAP_PATH + to_string(zone);
+	char name[64];
+	if (!read_line(base + "/name", name, sizeof(name)) || sscanf(name, "package-%d", &package) != 1) {
+		package = -1;
+		return;
+	}
+	files[DOMAIN_PKG] = base + "/energy_uj";
+	range[DOMAIN_PKG] = read_joules(base + "/max_energy_range_uj");
+	for (int sub = 0; sub < DOMAIN_COUNT; ++sub) {
+		string subzone = base + "/intel-rapl:" + to_string(zone) + ":" + to_string(sub);
+		if (!read_line(subzone + "/name", name, sizeof(name)))
+			break;
+		int domain = -1;
+		if (strcmp(name, "core") == 0)
+			domain = DOMAIN_PP0;
+		else if (strcmp(name, "uncore") == 0)
+			domain = DOMAIN_PP1;
+		else if (strcmp(name, "dram") == 0)
+			domain = DOMAIN_DRAM;
+		if (domain == -1)
+			continue;
+		files[domain] = subzone + "/energy_uj";
+		range[domain] = read_joules(subzone + "/max_energy_range_uj");
+		available[domain] = true;
+	}
+	reset();
+}
+
+EnergyPackage* PowercapPackage::clone() {
+	return new PowercapPackage(zone);
+}
+
+bool PowercapPackage::is_valid() {
+	// energy_uj costuma ser legivel so pelo root
+	char buffer[64];
+	return package != -1 && read_line(files[DOMAIN_PKG], buffer, sizeof(buffer));
+}
+
+void PowercapPackage::read_counters(double counters[DOMAIN_COUNT]) {
+	for (int d = 0; d < DOMAIN_COUNT; ++d)
+		counters[d] = available[d] ? read_joules(files[d]) : 0;
+}
+
+bool createPowercapPackages(vector<EnergyPackage*> *packages) {
+	for (int zone = 0; zone < POWERCAP_MAX_ZONES; ++zone) {
+		char name[64];
+		if (!read_line(POWERCAP_PATH + to_string(zone) + "/name", name, sizeof(name)))
+			break;
+		PowercapPackage* p = new PowercapPackage(zone);
+		if (!p->is_valid()) {
+			cout << "Powercap: sem acesso a " << POWERCAP_PATH << zone << endl;
+			delete p;
+			continue;
+		}
+		packages->push_back(p);
+	}
+	return !packages->empty();
+}
@@ -0,0 +1,25 @@
+#ifndef POWERCAP_H_
+#define POWERCAP_H_
+
+#include <string>
+#include "energy.h"
+
+// Linux powercap: /sys/class/powercap/intel-rapl:N (pacote) e intel-rapl:N:M (core, uncore, dram)
+class PowercapPackage : public CounterPackage {
+
+private:
+	int zone;
+	std::string files[DOMAIN_COUNT]; // energy_uj de cada dominio
+
+protected:
+	void read_counters(double counters[DOMAIN_COUNT]);
+
+public:
+	PowercapPackage(int zone_number);
+	EnergyPackage* clone();
+	bool is_valid();
+};
+
+bool createPowercapPackages(std::vector<EnergyPackage*> *packages);
+
+#endif /* POWERCAP_H_ */
@@ -0,0 +1,80 @@
+#include "probe.h"
+
+using namespace std;
+
+#define PROBE_ELEMENTS (1 << 25) // 256 MB por array, bem maior que a cache de ultimo nivel
+#define PROBE_REPETITIONS 10
+#define PROBE_CHAINS 32 // cadeias independentes escondem a latencia da unidade de ponto flutuante
+#define PROBE_STEPS 4000000
+
+double probeBandwidth(int threads)
+{
+    const long long n = PROBE_ELEMENTS;
+    double* a = new double[n];
+    double* b = new double[n];
+    double* c = new double[n];
+    const double scalar = 3.0;
+    double best = 0;
+    omp_set_num_threads(threads);
+
+    // first-touch com o mesmo schedule do triad
+    #pragma omp parallel for schedule(static)
+    for (long long i = 0; i < n; ++i) {
+        a[i] = 1.0;
+        b[i] = 2.0;
+        c[i] = 0.0;
+    }
+
+    for (int r = 0; r < PROBE_REPETITIONS; ++r) {
+        double start = omp_get_wtime();
+        #pragma omp parallel for schedule(static)
+        for (long long i = 0; i < n; ++i)
+            a[i] = b[i] + scalar * c[i];
+        double seconds = omp_get_wtime() - start;
+        // 2 leituras e 1 escrita por elemento, sem contar o write-allocate (convencao do STREAM)
+        double bandwidth = 3.0 * sizeof(double) * n / seconds / 1e9;
+        if (bandwidth > best)
+            best = bandwidth;
+    }
+
+    delete[] a;
+    delete[] b;
+    delete[] c;
+    return best;
+}
+
+double probeCompute(int threads)
+{
+    double best = 0;
+    double sink = 0;
+    int team = threads;
+    omp_set_num_threads(threads);
+
+    for (int r = 0; r < PROBE_REPETITIONS; ++r) {
+        double start = omp_get_wtime();
+        #pragma omp parallel reduction(+:sink)
+        {
+            #pragma omp master
+            team = omp_get_num_threads();
+            double acc[PROBE_CHAINS];
+            for (int j = 0; j < PROBE_CHAINS; ++j)
+                acc[j] = omp_get_thread_num() + j;
+            const double x = 0.999999, y = 1e-7;
+            for (int s = 0; s < PROBE_STEPS; ++s) {
+                #pragma omp simd
+                for (int j = 0; j < PROBE_CHAINS; ++j)
+                    acc[j] = acc[j] * x + y;
+            }
+            for (int j = 0; j < PROBE_CHAINS; ++j)
+                sink += acc[j];
+        }
+        double seconds = omp_get_wtime() - start;
+        double gflops = 2.0 * PROBE_CHAINS * (double)PROBE_STEPS * team / seconds / 1e9;
+        if (gflops > best)
+            best = gflops;
+    }
+
+    if (sink == 0) // so para o compilador nao descartar as contas
+        best = -best;
+    return best;
+}
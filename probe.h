@@ -0,0 +1,10 @@
+#ifndef PROBE_H
+#define PROBE_H
+
+#include <omp.h>
+
+// Perfil da maquina para o modelo roofline, medido com o mesmo compilador e flags dos kernels
+double probeBandwidth(int threads); // GB/s do triad (estilo STREAM), melhor de PROBE_REPETITIONS
+double probeCompute(int threads); // GFLOP/s de multiplica-soma independentes, melhor de PROBE_REPETITIONS
+
+#endif
@@ -107,15 +107,18 @@
 Rapl::Rapl(int core_number) {
 	core = core_number;
 
-	open_msr();
+	// sem exit: quem cria decide se tenta outro backend (ver energy.cpp)
+	if (!open_msr()) {
+		return;
+	}
 	int cpu_model = detect_cpu();
 	if (cpu_model == -1) {
-		exit(127);
+		return;
 	}
 	package = detect_package();
 	if (package == -1) {
 		std::cout << "Package not found" << std::endl;
-		exit(127);
+		return;
 	}
 
 	/* Read MSR_RAPL_POWER_UNIT Register */
@@ -223,9 +226,26 @@ Rapl::Rapl(int core_number) {
 	maximum_power = power_units * ((double)((raw_value >> 32) & 0x7fff));
 	time_window = time_units * ((double)((raw_value >> 48) & 0x7fff));*/
 
+	valid = true;
 	reset();
 }
 
+Rapl::~Rapl() {
+  #ifdef __linux__
+	if (fd >= 0) {
+		close(fd);
+	}
+  #endif
+}
+
+EnergyPackage* Rapl::clone() {
+	return new Rapl(core);
+}
+
+bool Rapl::is_valid() {
+	return valid;
+}
+
 void Rapl::reset() {
 
 	prev_state = &state1;
@@ -385,7 +405,7 @@ int Rapl::detect_package() {
 	return package;
 }
 
-void Rapl::open_msr() {
+bool Rapl::open_msr() {
 	char msr_filename[BUFSIZ];
 
 	sprintf(msr_filename, "/dev/cpu/%d/msr", core);
@@ -393,16 +413,14 @@ void Rapl::open_msr() {
 	if ( fd < 0 ) {
 		if ( errno == ENXIO ) {
 			std::cout << "rdmsr: No CPU " << core << std::endl;
-			exit(2);
 		} else if ( errno == EIO ) {
 			std::cout << "rdmsr: CPU " << core << " doesn't support MSRs" << std::endl;
-			exit(3);
 		} else {
-			perror("rdmsr:open");
-			std::cout << "Trying to open " << msr_filename << std::endl;
-			exit(127);
+			std::cout << "rdmsr: cannot open " << msr_filename << " (" << strerror(errno) << ")" << std::endl;
 		}
+		return false;
 	}
+	return true;
 }
 
 int Rapl::get_package() {
@@ -435,19 +453,24 @@ uint64_t Rapl::read_msr(unsigned int msr_offset) {
 	return data;
 }
 
+// os contadores de energia ocupam so os 32 bits de baixo do MSR
+uint64_t Rapl::read_energy(unsigned int msr_offset) {
+	return read_msr(msr_offset) & 0xffffffff;
+}
+
 void Rapl::sample() {
-	next_state->pkg = (double)read_msr(msr_pkg_energy_status)*cpu_energy_units;
+	next_state->pkg = (double)read_energy(msr_pkg_energy_status)*cpu_energy_units;
 	if (pp0_avail) {
-		next_state->pp0 = (double)read_msr(msr_pp0_energy_status)*cpu_energy_units;
+		next_state->pp0 = (double)read_energy(msr_pp0_energy_status)*cpu_energy_units;
 	}
 	if (pp1_avail) {
-		next_state->pp1 = (double)read_msr(MSR_PP1_ENERGY_STATUS)*cpu_energy_units;
+		next_state->pp1 = (double)read_energy(MSR_PP1_ENERGY_STATUS)*cpu_energy_units;
 	}
 	if (dram_avail) {
-		next_state->dram = (double)read_msr(MSR_DRAM_ENERGY_STATUS)*cpu_energy_units;
+		next_state->dram = (double)read_energy(MSR_DRAM_ENERGY_STATUS)*cpu_energy_units;
 	}
 	if (psys_avail) {
-		next_state->psys = (double)read_msr(MSR_PLATFORM_ENERGY_STATUS)*cpu_energy_units;
+		next_state->psys = (double)read_energy(MSR_PLATFORM_ENERGY_STATUS)*cpu_energy_units;
 	}
 
  	next_state->tsc = omp_get_wtime();
@@ -471,15 +494,11 @@ double Rapl::time_delta(double begin, double end) {
 }
 
 double Rapl::energy_delta(double before, double after) {
-	/*uint64_t max_int = ~((uint32_t) 0);
-	uint64_t eng_delta = after - before;
-
-	// Check for rollovers
+	// Check for rollovers: the 32-bit counter wrapped once between the two samples
+	// (takes minutes at full load, so sample() must be called at least that often)
 	if (before > after) {
-		eng_delta = after + (max_int - before);
+		return after + 4294967296.0 * cpu_energy_units - before;
 	}
-
-	return eng_delta;*/
 	return after - before;
 }
 
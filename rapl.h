@@ -1,6 +1,7 @@
 // Based on: https://github.com/kentcz/rapl-tools
 
 #include <cstdint>
+#include "energy.h"
 
 #ifndef RAPL_H_
 #define RAPL_H_
@@ -15,12 +16,13 @@ struct rapl_state_t {
 	double tsc;		// time
 };
 
-class Rapl {
+class Rapl : public EnergyPackage {
 
 private:
 	// Rapl configuration
-	int fd;
+	int fd = -1;
 	int core = -1, package = -1;
+	bool valid = false;
 	double power_units, cpu_energy_units, time_units, dram_energy_units;
 	//double thermal_spec_power, minimum_power, maximum_power, time_window; -- não usado
 	unsigned int msr_rapl_units, msr_pkg_energy_status, msr_pp0_energy_status;
@@ -34,15 +36,19 @@ private:
 
 	int detect_cpu();
 	int detect_package();
-	void open_msr();
+	bool open_msr();
 	uint64_t read_msr(unsigned int msr_offset);
+	uint64_t read_energy(unsigned int msr_offset);
 	double time_delta(double begin, double after);
 	double energy_delta(double before, double after);
 
 public:
 	Rapl(int core_number);
+	~Rapl();
 	void reset();
 	void sample();
+	EnergyPackage* clone();
+	bool is_valid();
 
 	int get_package();
 
@@ -15,3 +15,24 @@ long long reduce(double** arr, int m, int n, int iterations)
     }
     return sum;
 }
+
+// array contiguo e soma em double (sem converter cada elemento para long long), vetorizada por linha
+double reduceSimd(double* arr, int m, int n, int iterations)
+{
+    double sum = 0;
+    #pragma omp parallel shared(sum) firstprivate(m,n,iterations)
+    {
+        for (int i = 0; i < iterations; ++i)
+            #pragma omp for schedule(static) reduction(+:sum)
+            for (int x = 0; x < m; ++x)
+            {
+                const double* row = arr + (long long)x * n;
+                double rowSum = 0;
+                #pragma omp simd reduction(+:rowSum)
+                for (int y = 0; y < n; ++y)
+                    rowSum += row[y];
+                sum += rowSum;
+            }
+    }
+    return sum;
+}
@@ -5,5 +5,6 @@
 #include <stdio.h>
 
 long long reduce(double** arr, int m, int n, int iterations);
+double reduceSimd(double* arr, int m, int n, int iterations);
 
 #endif
@@ -0,0 +1,116 @@
+#include <algorithm>
+#include <cmath>
+#include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <iostream>
+#include <omp.h>
+#include "replay.h"
+
+#define SYNTHETIC_PKG_POWER		50.0	// W por pacote
+#define SYNTHETIC_DRAM_POWER	10.0
+
+using namespace std;
+
+// relogio comum a todas as instancias (inclusive as do sampler), zerado na primeira leitura
+static double replay_start = -1;
+
+static double replay_elapsed() {
+	if (replay_start < 0)
+		replay_start = omp_get_wtime();
+	return omp_get_wtime() - replay_start;
+}
+
+ReplayPackage::ReplayPackage(int package_number, shared_ptr<ReplayTrace> replay_trace) {
+	package = package_number;
+	trace = replay_trace;
+	if (trace == nullptr) {
+		power[DOMAIN_PKG] = SYNTHETIC_PKG_POWER;
+		power[DOMAIN_DRAM] = SYNTHETIC_DRAM_POWER;
+		available[DOMAIN_DRAM] = true;
+	} else {
+		for (int d = 0; d < DOMAIN_COUNT; ++d)
+			available[d] = !isnan(trace_energy(0, d));
+	}
+	reset();
+}
+
+EnergyPackage* ReplayPackage::clone() {
+	return new ReplayPackage(package, trace);
+}
+
+double ReplayPackage::trace_energy(size_t sample, int domain) {
+	return trace->energy[(sample * trace->packages + package) * DOMAIN_COUNT + domain];
+}
+
+void ReplayPackage::read_counters(double counters[DOMAIN_COUNT]) {
+	double elapsed = replay_elapsed();
+	if (trace == nullptr) {
+		for (int d = 0; d < DOMAIN_COUNT; ++d)
+			counters[d] = power[d] * elapsed;
+		return;
+	}
+
+	size_t last = trace->times.size() - 1;
+	double duration = trace->times[last] - trace->times[0];
+	double loops = duration > 0 ? floor(elapsed / duration) : 0;
+	double t = trace->times[0] + (duration > 0 ? elapsed - loops * duration : 0);
+	// primeira amostra depois de t, interpola com a anterior
+	size_t next = upper_bound(trace->times.begin(), trace->times.end(), t) - trace->times.begin();
+	next = min(max(next, (size_t)1), last);
+	double fraction = (t - trace->times[next - 1]) / max(trace->times[next] - trace->times[next - 1], 1e-12);
+	fraction = min(max(fraction, 0.0), 1.0);
+	for (int d = 0; d < DOMAIN_COUNT; ++d) {
+		if (!available[d]) {
+			counters[d] = 0;
+			continue;
+		}
+		double before = trace_energy(next - 1, d), after = trace_energy(next, d);
+		counters[d] = loops * (trace_energy(last, d) - trace_energy(0, d)) + before + fraction * (after - before) - trace_energy(0, d);
+	}
+}
+
+bool createSyntheticPackages(vector<pair<int, int>> topology, vector<EnergyPackage*> *packages) {
+	if (topology.empty())
+		topology.push_back(make_pair(0, 0));
+	for (auto& [package, core] : topology)
+		packages->push_back(new ReplayPackage(package, nullptr));
+	return true;
+}
+
+bool createReplayPackages(const string& path, vector<EnergyPackage*> *packages) {
+	FILE *fff = fopen(path.c_str(), "rb");
+	if (fff == NULL) {
+		cout << "Nao foi possivel abrir o trace " << path << endl;
+		return false;
+	}
+	char magic[8];
+	uint32_t version, packageCount;
+	if (fread(magic, sizeof(magic), 1, fff) != 1 || memcmp(magic, "TCCTRACE", 8) != 0
+		|| fread(&version, sizeof(version), 1, fff) != 1 || version != 1
+		|| fread(&packageCount, sizeof(packageCount), 1, fff) != 1 || packageCount == 0) {
+		cout << path << " nao e um trace do tccgreen" << endl;
+		fclose(fff);
+		return false;
+	}
+
+	shared_ptr<ReplayTrace> trace = make_shared<ReplayTrace>();
+	trace->packages = packageCount;
+	vector<double> energies(packageCount * DOMAIN_COUNT);
+	double time;
+	int32_t phase[2]; // algoritmo e fase, ignorados no replay
+	while (fread(&time, sizeof(time), 1, fff) == 1 && fread(phase, sizeof(phase), 1, fff) == 1
+		   && fread(energies.data(), sizeof(double), energies.size(), fff) == energies.size()) {
+		trace->times.push_back(time);
+		trace->energy.insert(trace->energy.end(), energies.begin(), energies.end());
+	}
+	fclose(fff);
+	if (trace->times.size() < 2) {
+		cout << "Trace " << path << " precisa de pelo menos 2 amostras" << endl;
+		return false;
+	}
+
+	for (uint32_t package = 0; package < packageCount; ++package)
+		packages->push_back(new ReplayPackage(package, trace));
+	return true;
+}
@@ -0,0 +1,36 @@
+#ifndef REPLAY_H_
+#define REPLAY_H_
+
+#include <memory>
+#include <string>
+#include "energy.h"
+
+// energia acumulada de um trace gravado com -t (ver sampler.cpp)
+struct ReplayTrace {
+	int packages = 0;
+	std::vector<double> times;
+	std::vector<double> energy; // [amostra][pacote][dominio]
+};
+
+// Fonte sem hardware e deterministica em funcao do tempo decorrido:
+// synthetic (potencia constante por dominio) ou replay (interpola um trace, repetindo do inicio quando acaba)
+class ReplayPackage : public CounterPackage {
+
+private:
+	std::shared_ptr<ReplayTrace> trace; // nulo no synthetic
+	double power[DOMAIN_COUNT] = {0, 0, 0, 0};
+
+	double trace_energy(size_t sample, int domain);
+
+protected:
+	void read_counters(double counters[DOMAIN_COUNT]);
+
+public:
+	ReplayPackage(int package_number, std::shared_ptr<ReplayTrace> replay_trace);
+	EnergyPackage* clone();
+};
+
+bool createSyntheticPackages(std::vector<std::pair<int, int>> topology, std::vector<EnergyPackage*> *packages);
+bool createReplayPackages(const std::string& path, std::vector<EnergyPackage*> *packages);
+
+#endif /* REPLAY_H_ */
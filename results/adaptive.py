@@ -0,0 +1,78 @@
+import argparse
+import io
+import math
+import os
+import pathlib
+import shlex
+import subprocess
+import sys
+from measure import DEFAULT_VARIANT, KERNEL_VARIANTS, LOG_ENCODING, LOG_ERRORS, MeasureType, Result, getMeasureTypeByName, streamMeasures
+from average import AverageValues, ResultAverage, addMeasure
+
+DEFAULT_BINARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tccgreen")
+ALGORITHM_FLAGS = {MeasureType.MAP: "-m", MeasureType.REDUCTION: "-r", MeasureType.STENCIL: "-s"}
+
+class AdaptiveRun:
+    def __init__(self) -> None:
+        self.average: ResultAverage = ResultAverage()
+        self.repetitions: int = 0
+        self.converged: bool = False
+
+def relativeCi(values: AverageValues) -> float:
+    if values.count() < 2 or values.avg() == 0:
+        return math.inf
+    return values.confidenceInterval95() / abs(values.avg())
+
+def runRepetition(command: list[str], measureType: MeasureType, threads: int, arraySize: int, iterations: int, output: str | None, variant: str = DEFAULT_VARIANT) -> str:
+    args = command + ["-n", str(arraySize), "-i", str(iterations), "-c", str(threads), "-v", variant, ALGORITHM_FLAGS[measureType]]
+    env = dict(os.environ, OMP_NUM_THREADS=str(threads))
+    if output is None:
+        return subprocess.run(args, env=env, check=True, stdout=subprocess.PIPE, text=True, encoding=LOG_ENCODING, errors=LOG_ERRORS).stdout
+
+    # com -o o proprio harness anexa ao log; le de volta so o trecho novo
+    start = os.path.getsize(output) if os.path.isfile(output) else 0
+    subprocess.run(command + ["-o", output] + args[len(command):], env=env, check=True, stdout=subprocess.DEVNULL)
+    with open(output, "rb") as file:
+        file.seek(start)
+        return file.read().decode(LOG_ENCODING, LOG_ERRORS)
+
+def runAdaptive(command: list[str], measureType: MeasureType, threads: int, arraySize: int, iterations: int, output: str | None = None,
+                threshold: float = 0.02, minRepetitions: int = 3, maxRepetitions: int = 20, verbose: bool = True, variant: str = DEFAULT_VARIANT) -> AdaptiveRun:
+    run = AdaptiveRun()
+    result = Result()
+    result.fileName = pathlib.Path(output).stem if output is not None else None
+    run.average.baseResult = result
+    while run.repetitions < maxRepetitions:
+        log = runRepetition(command, measureType, threads, arraySize, iterations, output, variant)
+        for measure in streamMeasures(io.StringIO(log), result):
+            addMeasure(run.average, measure)
+        run.repetitions += 1
+
+        timeCi = relativeCi(run.average.executionTimeAverage)
+        energyCi = relativeCi(run.average.allPackageAverage.pkg)
+        if verbose:
+            print(f"Repetition {run.repetitions}: time {run.average.executionTimeAverage.avg():.6g}s ± {timeCi:.2%}, "
+                  f"energy {run.average.allPackageAverage.pkg.avg():.6g}J ± {energyCi:.2%}")
+        if run.repetitions >= minRepetitions and timeCi <= threshold and energyCi <= threshold:
+            run.converged = True
+            break
+    return run
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run tccgreen one repetition at a time until the 95% CI of time and package energy converges")
+    parser.add_argument("-a", "--algorithm", required=True, choices=["m", "r", "s", "map", "reduction", "stencil"])
+    parser.add_argument("-c", "--cores", type=int, required=True, help="threads (OMP_NUM_THREADS and -c)")
+    parser.add_argument("-n", "--number", type=int, required=True, help="array size (NxN)")
+    parser.add_argument("-i", "--iter", type=int, required=True, help="iterations")
+    parser.add_argument("-v", "--variant", default=DEFAULT_VARIANT, choices=KERNEL_VARIANTS, help="kernel variant (same as tccgreen -v)")
+    parser.add_argument("-o", "--output", default=None, help="log to append to (same as tccgreen -o)")
+    parser.add_argument("-b", "--binary", default=DEFAULT_BINARY, help="harness command, e.g. 'python3 stub.py' for local tests")
+    parser.add_argument("-t", "--threshold", type=float, default=0.02, help="relative 95%% CI to stop at (default: 0.02)")
+    parser.add_argument("--min", type=int, default=3, help="minimum repetitions (default: 3)")
+    parser.add_argument("--max", type=int, default=20, help="maximum repetitions (default: 20)")
+    args = parser.parse_args()
+
+    measureType = {"m": MeasureType.MAP, "r": MeasureType.REDUCTION, "s": MeasureType.STENCIL}.get(args.algorithm) or getMeasureTypeByName(args.algorithm)
+    run = runAdaptive(shlex.split(args.binary), measureType, args.cores, args.number, args.iter, args.output, args.threshold, args.min, args.max, variant=args.variant)
+    print(f"{'Converged' if run.converged else 'Did not converge'} after {run.repetitions} repetition(s)")
+    sys.exit(0 if run.converged else 2)
@@ -1,49 +1,166 @@
 import math
-from typing import List
-from measure import *
+import numpy as np
+import pathlib
+import warnings
+from typing import Iterable, List
+from measure import KERNEL_VARIANTS, Measure, MeasureType, PHASE_EXECUTE, PHASE_NAMES, PackageMeasure, RECORD_FIXED_COLUMNS, RECORD_ITERATIONS, RECORD_PACKAGE_COLUMNS, RECORD_SIZE, RECORD_THREADS, RECORD_TIME, RECORD_TYPE, RECORD_VARIANT, Result, copyHeader, groupByVariant, isRecordFile, loadPhaseRecords, loadRecords, openLog, streamMeasures
+
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_SEED = 0 # fixo para que o mesmo log sempre de o mesmo intervalo
+OUTLIER_METHODS = ["mad", "iqr"]
+OUTLIER_THRESHOLDS = {"mad": 3.5, "iqr": 1.5} # z-score modificado (Iglewicz-Hoaglin) e multiplo do IQR (Tukey)
+IDLE_SECONDS = 1.0 # duracao do measureIdle do harness
 
 class AverageValues:
     def __init__(self) -> None:
-        self.__values = []
+        self.__values = np.empty(8)
+        self.__count = 0
+        self.__stats: dict[str, float] | None = None # invalidado a cada add
 
-    def values(self) -> List[float]:
-        return self.__values
+    def values(self) -> np.ndarray:
+        values = self.__values[:self.__count]
+        values.flags.writeable = False
+        return values
 
     def add(self, value: float):
-        self.__values.append(round(value, 4))
+        if self.__count == len(self.__values):
+            self.__reserve(self.__count + 1)
+        self.__values[self.__count] = value
+        self.__count += 1
+        self.__stats = None
+
+    def addMany(self, values: Iterable[float] | np.ndarray):
+        newValues = np.asarray(values, dtype=float).ravel()
+        if len(newValues) == 0:
+            return
+        self.__reserve(self.__count + len(newValues))
+        self.__values[self.__count:self.__count + len(newValues)] = newValues
+        self.__count += len(newValues)
+        self.__stats = None
+
+    def keep(self, mask: np.ndarray):
+        # remove os valores em que mask e False (descarte de aquecimento e de outliers)
+        kept = self.values()[mask]
+        self.__values = np.empty(max(8, len(kept)))
+        self.__values[:len(kept)] = kept
+        self.__count = len(kept)
+        self.__stats = None
+
+    def __reserve(self, capacity: int):
+        if capacity <= len(self.__values):
+            return
+        newValues = np.empty(max(capacity, 2 * len(self.__values)))
+        newValues[:self.__count] = self.__values[:self.__count]
+        self.__values = newValues
+
+    def __valid(self) -> np.ndarray:
+        # NaN e leitura rejeitada (energia negativa): continua na posicao da repeticao, mas fica fora das estatisticas
+        values = self.values()
+        return values[~np.isnan(values)]
+
+    def __calculate(self) -> dict[str, float]:
+        if self.__stats is None:
+            values = self.__valid()
+            if len(values) == 0:
+                self.__stats = {"valid": 0, "min": math.nan, "max": math.nan, "avg": math.nan, "stdDev": math.nan, "stdErr": math.nan, "ci95": math.nan,
+                                "median": math.nan, "mad": math.nan}
+            else:
+                avgValue = float(values.mean())
+                stdDevValue = math.sqrt(float(np.mean(np.square(values - avgValue))))
+                stdErrValue = stdDevValue / math.sqrt(len(values))
+                median = float(np.median(values))
+                self.__stats = {
+                    "valid": len(values),
+                    "min": float(values.min()),
+                    "max": float(values.max()),
+                    "avg": avgValue,
+                    "stdDev": stdDevValue,
+                    "stdErr": stdErrValue,
+                    "ci95": 1.96*stdErrValue,
+                    "median": median,
+                    "mad": float(np.median(np.abs(values - median))),
+                }
+        return self.__stats
+
+    def count(self) -> int:
+        return self.__count
+
+    def validCount(self) -> int:
+        return self.__calculate()["valid"]
 
     def min(self) -> float:
-        minValue = None
-        for i in range(0, len(self.__values)):
-            if minValue is None or minValue > self.__values[i]:
-                minValue = self.__values[i]
-        return minValue
+        return self.__calculate()["min"]
     
     def max(self) -> float:
-        maxValue = None
-        for i in range(0, len(self.__values)):
-            if maxValue is None or maxValue < self.__values[i]:
-                maxValue = self.__values[i]
-        return maxValue
+        return self.__calculate()["max"]
     
     def avg(self) -> float:
-        avgValue = 0.0
-        for i in range(0, len(self.__values)):
-            avgValue += self.__values[i]
-        return round(avgValue / len(self.__values), 4)
+        return self.__calculate()["avg"]
     
     def stdDev(self) -> float:
-        avgValue = self.avg()
-        sum = 0.0
-        for i in range(0, len(self.__values)):
-            sum += pow(self.__values[i] - avgValue, 2)
-        return round(math.sqrt(sum / len(self.__values)), 4)
+        return self.__calculate()["stdDev"]
     
     def stdErr(self) -> float:
-        return round(self.stdDev() / math.sqrt(len(self.__values)), 4)
+        return self.__calculate()["stdErr"]
     
     def confidenceInterval95(self) -> float:
-        return round(1.96*self.stdErr(), 4)
+        return self.__calculate()["ci95"]
+
+    def median(self) -> float:
+        return self.__calculate()["median"]
+
+    def mad(self) -> float:
+        # desvio absoluto mediano, sem o fator 1.4826 de consistencia com o desvio padrao
+        return self.__calculate()["mad"]
+
+    def percentile(self, q: float | list[float]) -> float | np.ndarray:
+        if self.validCount() == 0:
+            return math.nan if np.isscalar(q) else np.full(len(q), math.nan)
+        return np.percentile(self.__valid(), q)
+
+    def trimmedMean(self, proportion: float = 0.1) -> float:
+        # media sem a fracao proportion dos menores e dos maiores valores
+        values = self.__valid()
+        cut = int(len(values) * proportion)
+        if len(values) == 0 or 2 * cut >= len(values):
+            return self.median()
+        return float(np.sort(values)[cut:len(values) - cut].mean())
+
+    def bootstrapCi(self, statistic: str = "avg", confidence: float = 0.95, resamples: int = BOOTSTRAP_RESAMPLES, seed: int = BOOTSTRAP_SEED) -> tuple[float, float]:
+        # intervalo percentil do bootstrap; todas as reamostragens de uma vez numa matriz resamples x count
+        values = self.__valid()
+        if len(values) < 2:
+            value = self.median() if statistic == "median" else self.avg()
+            return (value, value)
+        generator = np.random.default_rng(seed)
+        samples = values[generator.integers(0, len(values), size=(resamples, len(values)))]
+        match statistic:
+            case "avg":
+                estimates = samples.mean(axis=1)
+            case "median":
+                estimates = np.median(samples, axis=1)
+            case _:
+                raise ValueError(f"Unknown statistic '{statistic}', expected avg or median")
+        low, high = np.percentile(estimates, [50 * (1 - confidence), 50 * (1 + confidence)])
+        return (float(low), float(high))
+
+    def outliers(self, method: str = "mad", threshold: float | None = None) -> np.ndarray:
+        # mascara dos outliers: |0.6745*(x - mediana)/MAD| > threshold ou fora de [Q1 - k*IQR, Q3 + k*IQR]
+        values = self.values()
+        threshold = threshold if threshold is not None else OUTLIER_THRESHOLDS[method]
+        if self.validCount() < 3:
+            return np.zeros(self.__count, dtype=bool)
+        match method:
+            case "mad":
+                mad = self.mad()
+                if mad == 0:
+                    return np.zeros(self.__count, dtype=bool)
+                return np.abs(0.6745 * (values - self.median()) / mad) > threshold
+            case "iqr":
+                q1, q3 = self.percentile([25, 75])
+                return (values < q1 - threshold * (q3 - q1)) | (values > q3 + threshold * (q3 - q1))
+            case _:
+                raise ValueError(f"Unknown outlier method '{method}', expected one of {', '.join(OUTLIER_METHODS)}")
 
 class PackageAverage:
     def __init__(self) -> None:
@@ -53,69 +170,405 @@ class PackageAverage:
         self.pp1 = None
         self.dram = None
 
+class PhaseAverage:
+    def __init__(self) -> None:
+        self.threads: int = -1
+        self.time = AverageValues()
+        self.energy = PackageAverage() # todos os pacotes somados
+        self.peakRss: AverageValues | None = None # MB
+
 class ResultAverage:
     def __init__(self) -> None:
         self.baseResult: Result | None = None
+        self.measureType: MeasureType | None = None
         self.executionTimeAverage = AverageValues()
         self.idleAverage = PackageAverage()
         self.packageAverages: List[PackageAverage] = []
         self.allPackageAverage = PackageAverage()
+        # energia acima do idle: uma entrada por repeticao, ou None se alguma repeticao nao tem idle ao redor
+        self.dynamicPackageAverages: List[PackageAverage] = []
+        self.dynamicAllPackageAverage: PackageAverage | None = PackageAverage()
+        self.lastIdle: Measure | None = None # idle mais recente e kernel esperando o idle seguinte (so durante o addMeasure)
+        self.pendingKernel: Measure | None = None
+        self.peakRssAverage: AverageValues | None = None # MB durante a execucao
+        self.phaseAverages: dict[str, PhaseAverage] = {} # preparo e limpeza, quando o log tem as linhas Phase
+        self.warmupDiscarded: int = 0 # repeticoes iniciais descartadas (discardWarmup)
+        self.outliersRejected: list[int] = [] # posicao, entre as repeticoes que sobraram do aquecimento, das rejeitadas
+        self.outlierMethod: str | None = None
+
+    def repetitionValues(self) -> list[AverageValues]:
+        # valores com uma entrada por repeticao do kernel (mesma ordem do tempo de execucao)
+        count = self.executionTimeAverage.count()
+        allValues = [self.executionTimeAverage]
+        pkgAverages = [self.allPackageAverage] + self.packageAverages
+        if self.dynamicAllPackageAverage is not None:
+            pkgAverages += [self.dynamicAllPackageAverage] + self.dynamicPackageAverages
+        pkgAverages += [phaseAvg.energy for phaseAvg in self.phaseAverages.values()]
+        allValues += [values for phaseAvg in self.phaseAverages.values() for values in [phaseAvg.time, phaseAvg.peakRss] if values is not None]
+        if self.peakRssAverage is not None:
+            allValues.append(self.peakRssAverage)
+        for pkgAvg in pkgAverages:
+            allValues += [getattr(pkgAvg, domain) for domain in ["pkg", "pp0", "pp1", "dram"] if getattr(pkgAvg, domain) is not None]
+        return [values for values in allValues if values.count() == count]
+
+    def invalidReadings(self) -> dict[str, int]:
+        # leituras negativas rejeitadas por dominio, no idle, em cada pacote do kernel e nas fases
+        invalid: dict[str, int] = {}
+        pkgAverages = [self.idleAverage] + self.packageAverages + [phaseAvg.energy for phaseAvg in self.phaseAverages.values()]
+        for pkgAvg in pkgAverages:
+            for domain in ["pkg", "pp0", "pp1", "dram"]:
+                values: AverageValues | None = getattr(pkgAvg, domain)
+                if values is not None and values.validCount() < values.count():
+                    invalid[domain] = invalid.get(domain, 0) + values.count() - values.validCount()
+        return invalid
 
 def addToAvg(value: float, avg: AverageValues):
     avg.add(value)
 
-def addPackageValue(measure: PackageMeasure | list[PackageMeasure], pkgAvg: PackageAverage):
+def getReading(value: float | None, rejectNegative: bool = True) -> float | None:
+    # energia negativa e o contador RAPL dando a volta no meio da medicao: vira NaN, que mantem a repeticao alinhada
+    return math.nan if rejectNegative and value is not None and value < 0 else value
+
+def addPackageValue(measure: PackageMeasure | list[PackageMeasure], pkgAvg: PackageAverage, rejectNegative: bool = True):
+    # rejectNegative=False so para a energia acima do idle, que pode ser negativa de verdade
     if isinstance(measure, list): # especifico para o AllPackages (logo não há um pkgNumber)
         pkgAvg.pkgNumber = -1
-        pkgAvg.pkg.add(sum(m.pkg for m in measure))
+        pkgAvg.pkg.add(sum(getReading(m.pkg, rejectNegative) for m in measure))
         if any(m.pp0 is not None for m in measure):
-            pkgAvg.pp0 = AverageValues()
-            pkgAvg.pp0.add(sum(m.pp0 if m.pp0 is not None else 0 for m in measure))
+            if pkgAvg.pp0 is None:
+                pkgAvg.pp0 = AverageValues()
+            pkgAvg.pp0.add(sum(getReading(m.pp0, rejectNegative) if m.pp0 is not None else 0 for m in measure))
         if any(m.pp1 is not None for m in measure):
-            pkgAvg.pp1 = AverageValues()
-            pkgAvg.pp1.add(sum(m.pp1 if m.pp1 is not None else 0 for m in measure))
+            if pkgAvg.pp1 is None:
+                pkgAvg.pp1 = AverageValues()
+            pkgAvg.pp1.add(sum(getReading(m.pp1, rejectNegative) if m.pp1 is not None else 0 for m in measure))
         if any(m.dram is not None for m in measure):
-            pkgAvg.dram = AverageValues()
-            pkgAvg.dram.add(sum(m.dram if m.dram is not None else 0 for m in measure))
+            if pkgAvg.dram is None:
+                pkgAvg.dram = AverageValues()
+            pkgAvg.dram.add(sum(getReading(m.dram, rejectNegative) if m.dram is not None else 0 for m in measure))
     else:
         pkgAvg.pkgNumber = measure.pkgNumber
-        pkgAvg.pkg.add(measure.pkg)
+        pkgAvg.pkg.add(getReading(measure.pkg, rejectNegative))
         if measure.pp0 is not None:
             if pkgAvg.pp0 is None:
                 pkgAvg.pp0 = AverageValues()
-            pkgAvg.pp0.add(measure.pp0)
+            pkgAvg.pp0.add(getReading(measure.pp0, rejectNegative))
         if measure.pp1 is not None:
             if pkgAvg.pp1 is None:
                 pkgAvg.pp1 = AverageValues()
-            pkgAvg.pp1.add(measure.pp1)
+            pkgAvg.pp1.add(getReading(measure.pp1, rejectNegative))
         if measure.dram is not None:
             if pkgAvg.dram is None:
                 pkgAvg.dram = AverageValues()
-            pkgAvg.dram.add(measure.dram)
+            pkgAvg.dram.add(getReading(measure.dram, rejectNegative))
 
-def calculateAverages(result: Result) -> ResultAverage:
+def addMeasure(allAvg: ResultAverage, measure: Measure):
+    pkgMeasure: PackageMeasure
+    for pkgMeasure in measure.packages:
+        while len(allAvg.packageAverages) <= pkgMeasure.pkgNumber:
+            allAvg.packageAverages.append(PackageAverage())
+
+    if measure.type == MeasureType.IDLE:
+        for pkgMeasure in measure.packages:
+            addPackageValue(pkgMeasure, allAvg.idleAverage)
+        if allAvg.pendingKernel is not None:
+            addDynamicMeasure(allAvg, allAvg.pendingKernel, allAvg.lastIdle, measure)
+            allAvg.pendingKernel = None
+        allAvg.lastIdle = measure
+    else:
+        if allAvg.measureType is None:
+            allAvg.measureType = measure.type
+        addToAvg(measure.executionTime, allAvg.executionTimeAverage)
+        addPackageValue(measure.packages, allAvg.allPackageAverage)
+        for pkgMeasure in measure.packages:
+            addPackageValue(pkgMeasure, allAvg.packageAverages[pkgMeasure.pkgNumber])
+        if allAvg.pendingKernel is not None: # dois kernels sem idle entre eles
+            addDynamicMeasure(allAvg, allAvg.pendingKernel, allAvg.lastIdle, None)
+        allAvg.pendingKernel = measure
+        addPhaseMeasures(allAvg, measure)
+
+def addPhaseMeasures(allAvg: ResultAverage, measure: Measure):
+    if measure.peakRss is not None:
+        if allAvg.peakRssAverage is None:
+            allAvg.peakRssAverage = AverageValues()
+        allAvg.peakRssAverage.add(measure.peakRss)
+    for name, phase in measure.phases.items():
+        if name not in allAvg.phaseAverages:
+            allAvg.phaseAverages[name] = PhaseAverage()
+        phaseAvg = allAvg.phaseAverages[name]
+        phaseAvg.threads = phase.threads
+        phaseAvg.time.add(phase.time)
+        if len(phase.packages) > 0:
+            addPackageValue(phase.packages, phaseAvg.energy)
+        if phase.peakRss is not None:
+            if phaseAvg.peakRss is None:
+                phaseAvg.peakRss = AverageValues()
+            phaseAvg.peakRss.add(phase.peakRss)
+
+def addDynamicMeasure(allAvg: ResultAverage, kernel: Measure, before: Measure | None, after: Measure | None):
+    # potencia ociosa interpolada linearmente entre o idle anterior e o seguinte: a integral na duracao do kernel e a media dos dois
+    idles = [idle for idle in [before, after] if idle is not None]
+    if allAvg.dynamicAllPackageAverage is None or len(idles) == 0:
+        return
+    dynamicMeasures: list[PackageMeasure] = []
+    for pkgMeasure in kernel.packages:
+        dynamic = PackageMeasure()
+        dynamic.pkgNumber = pkgMeasure.pkgNumber
+        for domain in ["pkg", "pp0", "pp1", "dram"]:
+            idleEnergies = [getattr(p, domain) for idle in idles for p in idle.packages if p.pkgNumber == pkgMeasure.pkgNumber and getattr(p, domain) is not None]
+            validIdle = [energy for energy in idleEnergies if energy >= 0]
+            energy = getReading(getattr(pkgMeasure, domain))
+            if energy is not None and len(idleEnergies) > 0:
+                # leitura invalida no kernel ou em todos os idles: a repeticao fica NaN, sem correcao
+                idleEnergy = sum(validIdle) / len(validIdle) if len(validIdle) > 0 else math.nan
+                setattr(dynamic, domain, energy - idleEnergy / IDLE_SECONDS * kernel.executionTime)
+        if dynamic.pkg is None:
+            return
+        dynamicMeasures.append(dynamic)
+    while len(allAvg.dynamicPackageAverages) < len(allAvg.packageAverages):
+        allAvg.dynamicPackageAverages.append(PackageAverage())
+    addPackageValue(dynamicMeasures, allAvg.dynamicAllPackageAverage, rejectNegative=False)
+    for dynamic in dynamicMeasures:
+        addPackageValue(dynamic, allAvg.dynamicPackageAverages[dynamic.pkgNumber], rejectNegative=False)
+
+def finishAverages(allAvg: ResultAverage):
+    # o ultimo kernel pode nao ter idle depois (log interrompido)
+    if allAvg.pendingKernel is not None:
+        addDynamicMeasure(allAvg, allAvg.pendingKernel, allAvg.lastIdle, None)
+    allAvg.pendingKernel, allAvg.lastIdle = None, None
+    if allAvg.dynamicAllPackageAverage is not None and allAvg.dynamicAllPackageAverage.pkg.count() != allAvg.executionTimeAverage.count():
+        allAvg.dynamicAllPackageAverage, allAvg.dynamicPackageAverages = None, []
+
+def calculateAverages(result: Result, measures: Iterable[Measure] | None = None) -> ResultAverage:
     allAvg = ResultAverage()
+    allAvg.baseResult = result
 
-    packageCount = 0
     measure: Measure
-    pkgMeasure: PackageMeasure
-    for measure in result.measures:
-        for pkgMeasure in measure.packages:
-            if pkgMeasure.pkgNumber > packageCount:
-                packageCount = pkgMeasure.pkgNumber
-    packageCount += 1
-    for i in range(0, packageCount):
-        allAvg.packageAverages.append(PackageAverage())
+    for measure in (measures if measures is not None else result.measures):
+        addMeasure(allAvg, measure)
+    finishAverages(allAvg)
+
+    return allAvg
+
+def keepRepetitions(allAvg: ResultAverage, mask: np.ndarray):
+    for values in allAvg.repetitionValues():
+        values.keep(mask)
+
+def discardWarmup(allAvg: ResultAverage, warmup: int):
+    # as primeiras repeticoes rodam com cache/TLB/frequencia frios; o idle nao e afetado
+    warmup = min(warmup, allAvg.executionTimeAverage.count())
+    if warmup <= 0:
+        return
+    mask = np.arange(allAvg.executionTimeAverage.count()) >= warmup
+    keepRepetitions(allAvg, mask)
+    allAvg.warmupDiscarded += warmup
+
+def rejectOutliers(allAvg: ResultAverage, method: str = "mad", threshold: float | None = None):
+    # outlier no tempo de execucao remove a repeticao inteira (tempo e energia), e fica registrado no allAvg
+    outliers = allAvg.executionTimeAverage.outliers(method, threshold)
+    allAvg.outlierMethod = method
+    allAvg.outliersRejected = np.flatnonzero(outliers).tolist()
+    if len(allAvg.outliersRejected) > 0:
+        keepRepetitions(allAvg, ~outliers)
+
+def applySteadyState(averages: list[ResultAverage], warmup: int = 0, outliers: str | None = None, threshold: float | None = None) -> list[ResultAverage]:
+    for allAvg in averages:
+        discardWarmup(allAvg, warmup)
+        if outliers is not None:
+            rejectOutliers(allAvg, outliers, threshold)
+    return averages
 
+def getSteadyStateSummary(allAvg: ResultAverage) -> str | None:
+    invalid = allAvg.invalidReadings()
+    if allAvg.warmupDiscarded == 0 and allAvg.outlierMethod is None and len(invalid) == 0:
+        return None
+    parts: list[str] = []
+    if allAvg.warmupDiscarded > 0 or allAvg.outlierMethod is not None:
+        parts.append(f"{allAvg.warmupDiscarded} warm-up")
+    if allAvg.outlierMethod is not None:
+        rejected = ", ".join(f"#{i + allAvg.warmupDiscarded + 1}" for i in allAvg.outliersRejected)
+        parts.append(f"{len(allAvg.outliersRejected)} {allAvg.outlierMethod.upper()} outlier(s)" + (f" ({rejected})" if rejected else ""))
+    parts += [f"{count} negative {domain.upper()} reading(s)" for domain, count in invalid.items()]
+    return f"discarded {', '.join(parts[:-1])} and {parts[-1]}" if len(parts) > 1 else f"discarded {parts[0]}"
+
+def addRecordDomain(pkgAvg: PackageAverage, domain: str, values: np.ndarray, present: np.ndarray | None = None, rejectNegative: bool = True):
+    # NaN fora de present e dominio ausente no registro; leitura negativa vira NaN como no getReading
+    values = values[present if present is not None else ~np.isnan(values)]
+    if len(values) == 0:
+        return
+    if rejectNegative:
+        values = np.where(values < 0, np.nan, values)
+    if getattr(pkgAvg, domain) is None:
+        setattr(pkgAvg, domain, AverageValues())
+    getattr(pkgAvg, domain).addMany(values)
+
+def calculateVariantAverages(result: Result) -> list[ResultAverage]:
+    # uma media por variante do kernel (tccgreen -v), na ordem em que aparecem no log
+    return [calculateAverages(variantResult) for variantResult in groupByVariant(result)]
+
+def calculateRecordAverages(filePath: str) -> list[ResultAverage]:
+    # mesmo resultado do calculateVariantAverages, mas por coluna sobre a tabela inteira do CSV
+    fileName = pathlib.Path(filePath).stem
+    table = loadRecords(filePath)
+    if len(table) == 0:
+        result = Result()
+        result.fileName = fileName
+        allAvg = ResultAverage()
+        allAvg.baseResult = result
+        return [allAvg]
+    averages: list[ResultAverage] = []
+    header = Result()
+    header.fileName = fileName
+    header.threads, header.arraySize, header.iterations = (int(value) for value in table[-1, [RECORD_THREADS, RECORD_SIZE, RECORD_ITERATIONS]])
+    variants = table[:, RECORD_VARIANT]
+    phases = loadPhaseRecords(filePath, header)
+    for variant in dict.fromkeys(variants.tolist()):
+        result = Result()
+        copyHeader(header, result)
+        result.variant = KERNEL_VARIANTS[int(variant)]
+        allAvg = calculateTableAverages(result, table[variants == variant])
+        addTablePhases(allAvg, phases[phases[:, 2 + RECORD_VARIANT] == variant])
+        averages.append(allAvg)
+    return averages
+
+def sumRecordPackages(columns: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # soma dos pacotes de cada linha como no addPackageValue: pacote sem o dominio conta 0, leitura negativa invalida a soma
+    present = ~np.isnan(columns).all(axis=1)
+    with np.errstate(invalid="ignore"):
+        invalid = (columns < 0).any(axis=1)
+    return (np.where(invalid, np.nan, np.nansum(columns, axis=1)), present)
+
+def addTablePhases(allAvg: ResultAverage, phases: np.ndarray):
+    # phases: linhas do loadPhaseRecords, colunas deslocadas de 2 (estagio e pico de RSS) em relacao ao registro
+    def addValues(values: np.ndarray) -> AverageValues | None:
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return None
+        average = AverageValues()
+        average.addMany(values)
+        return average
+    starts = [2 + RECORD_FIXED_COLUMNS + i * RECORD_PACKAGE_COLUMNS for i in range((phases.shape[1] - 2 - RECORD_FIXED_COLUMNS) // RECORD_PACKAGE_COLUMNS)]
+    for stage in dict.fromkeys(phases[:, 0].tolist()):
+        rows = phases[phases[:, 0] == stage]
+        if stage == PHASE_EXECUTE:
+            allAvg.peakRssAverage = addValues(rows[:, 1])
+            continue
+        phaseAvg = PhaseAverage()
+        phaseAvg.threads = int(rows[-1, 2 + RECORD_THREADS])
+        phaseAvg.time.addMany(rows[:, 2 + RECORD_TIME])
+        phaseAvg.peakRss = addValues(rows[:, 1])
+        if len(starts) > 0:
+            phaseAvg.energy.pkgNumber = -1
+            for offset, domain in enumerate(["pkg", "pp0", "pp1", "dram"], 1):
+                addRecordDomain(phaseAvg.energy, domain, *sumRecordPackages(rows[:, [start + offset for start in starts]]))
+        allAvg.phaseAverages[PHASE_NAMES[int(stage)]] = phaseAvg
+
+def calculateTableAverages(result: Result, table: np.ndarray) -> ResultAverage:
+    allAvg = ResultAverage()
     allAvg.baseResult = result
-    for measure in result.measures:
-        if measure.type == MeasureType.IDLE:
-            for pkgMeasure in measure.packages:
-                addPackageValue(pkgMeasure, allAvg.idleAverage)
-        else:
-            addToAvg(measure.executionTime, allAvg.executionTimeAverage)
-            addPackageValue(measure.packages, allAvg.allPackageAverage)
-            for pkgMeasure in measure.packages:
-                addPackageValue(pkgMeasure, allAvg.packageAverages[pkgMeasure.pkgNumber])
-    
-    return allAvg
\ No newline at end of file
+
+    idle = table[:, RECORD_TYPE] == MeasureType.IDLE
+    kernels = table[~idle]
+    if len(kernels) > 0:
+        allAvg.measureType = int(kernels[0, RECORD_TYPE])
+    allAvg.executionTimeAverage.addMany(kernels[:, RECORD_TIME])
+
+    packageCount = (table.shape[1] - RECORD_FIXED_COLUMNS) // RECORD_PACKAGE_COLUMNS
+    starts = [RECORD_FIXED_COLUMNS + i * RECORD_PACKAGE_COLUMNS for i in range(packageCount)]
+    for start in starts:
+        numbers = table[:, start]
+        numbers = numbers[~np.isnan(numbers)]
+        if len(numbers) == 0:
+            continue
+        pkgNumber = int(numbers[0])
+        while len(allAvg.packageAverages) <= pkgNumber:
+            allAvg.packageAverages.append(PackageAverage())
+        pkgAvg = allAvg.packageAverages[pkgNumber]
+        pkgAvg.pkgNumber = pkgNumber
+        allAvg.idleAverage.pkgNumber = pkgNumber
+        for offset, domain in enumerate(["pkg", "pp0", "pp1", "dram"], 1):
+            addRecordDomain(pkgAvg, domain, kernels[:, start + offset])
+    # idle: todos os pacotes juntos, na ordem das medicoes (como no addMeasure)
+    for offset, domain in enumerate(["pkg", "pp0", "pp1", "dram"], 1):
+        addRecordDomain(allAvg.idleAverage, domain, table[idle][:, [start + offset for start in starts]].ravel())
+
+    if len(kernels) > 0:
+        allAvg.allPackageAverage.pkgNumber = -1
+        for offset, domain in enumerate(["pkg", "pp0", "pp1", "dram"], 1):
+            addRecordDomain(allAvg.allPackageAverage, domain, *sumRecordPackages(kernels[:, [start + offset for start in starts]]))
+    addTableDynamic(allAvg, table, starts)
+    return allAvg
+
+def addTableDynamic(allAvg: ResultAverage, table: np.ndarray, starts: list[int]):
+    # mesmo pareamento do addMeasure: o idle mais recente antes do kernel e o registro logo depois, se for idle
+    idle = table[:, RECORD_TYPE] == MeasureType.IDLE
+    idleRows = np.flatnonzero(idle)
+    kernelRows = np.flatnonzero(~idle)
+    if len(kernelRows) == 0 or len(idleRows) == 0:
+        allAvg.dynamicAllPackageAverage = None
+        return
+    position = np.searchsorted(idleRows, kernelRows)
+    before = np.where(position > 0, idleRows[np.maximum(position - 1, 0)], -1)
+    after = np.where(idle[np.minimum(kernelRows + 1, len(table) - 1)] & (kernelRows + 1 < len(table)), kernelRows + 1, -1)
+    if ((before < 0) & (after < 0)).any():
+        allAvg.dynamicAllPackageAverage = None
+        return
+    def idleEnergy(rows: np.ndarray, column: int) -> np.ndarray:
+        return np.where(rows >= 0, table[np.maximum(rows, 0), column], np.nan)
+    time = table[kernelRows, RECORD_TIME]
+    # por dominio: energia acima do idle e onde o dominio existe (kernel e algum idle com a coluna); NaN onde a leitura e invalida
+    dynamic: dict[str, list[np.ndarray]] = {domain: [] for domain in ["pkg", "pp0", "pp1", "dram"]}
+    present: dict[str, list[np.ndarray]] = {domain: [] for domain in ["pkg", "pp0", "pp1", "dram"]}
+    for start in starts:
+        numbers = table[:, start]
+        numbers = numbers[~np.isnan(numbers)]
+        if len(numbers) == 0:
+            continue
+        pkgNumber = int(numbers[0])
+        while len(allAvg.dynamicPackageAverages) <= pkgNumber:
+            allAvg.dynamicPackageAverages.append(PackageAverage())
+        pkgAvg = allAvg.dynamicPackageAverages[pkgNumber]
+        pkgAvg.pkgNumber = pkgNumber
+        for offset, domain in enumerate(["pkg", "pp0", "pp1", "dram"], 1):
+            kernel = table[kernelRows, start + offset]
+            idles = np.array([idleEnergy(before, start + offset), idleEnergy(after, start + offset)])
+            with np.errstate(invalid="ignore"), warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning) # media de dois NaN: dominio ausente ou invalido nos dois idles
+                idlePower = np.nanmean(np.where(idles < 0, np.nan, idles), axis=0) / IDLE_SECONDS
+                values = np.where(kernel < 0, np.nan, kernel) - idlePower * time
+            domainPresent = ~np.isnan(kernel) & ~np.isnan(idles).all(axis=0)
+            dynamic[domain].append(values)
+            present[domain].append(domainPresent)
+            addRecordDomain(pkgAvg, domain, values, domainPresent, rejectNegative=False)
+    if len(dynamic["pkg"]) == 0 or not np.all(present["pkg"]):
+        allAvg.dynamicAllPackageAverage, allAvg.dynamicPackageAverages = None, []
+        return
+    allAvg.dynamicAllPackageAverage.pkgNumber = -1
+    allAvg.dynamicAllPackageAverage.pkg.addMany(np.sum(dynamic["pkg"], axis=0))
+    for domain in ["pp0", "pp1", "dram"]:
+        # pacote sem o dominio conta 0, como no addPackageValue; o NaN de uma leitura invalida invalida a soma
+        values, domainPresent = np.array(dynamic[domain]), np.array(present[domain])
+        addRecordDomain(allAvg.dynamicAllPackageAverage, domain, np.sum(np.where(domainPresent, values, 0), axis=0), domainPresent.any(axis=0), rejectNegative=False)
+
+def calculateFileAverages(filePath: str) -> list[ResultAverage]:
+    # agrega direto do stream, sem criar os objetos Measure do log inteiro (so os valores das medias ficam em memoria)
+    if isRecordFile(filePath):
+        return calculateRecordAverages(filePath)
+    result = Result()
+    result.fileName = pathlib.Path(filePath).stem
+    averages: dict[str, ResultAverage] = {}
+    with openLog(filePath) as file:
+        for measure in streamMeasures(file, result):
+            if measure.variant not in averages:
+                averages[measure.variant] = ResultAverage()
+                averages[measure.variant].baseResult = Result()
+            addMeasure(averages[measure.variant], measure)
+    for variant, calcAvg in averages.items():
+        finishAverages(calcAvg)
+        copyHeader(result, calcAvg.baseResult) # o cabecalho so esta completo depois do fim do log
+        calcAvg.baseResult.variant = variant
+    if len(averages) == 0:
+        allAvg = ResultAverage()
+        allAvg.baseResult = result
+        return [allAvg]
+    return list(averages.values())
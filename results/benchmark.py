@@ -0,0 +1,149 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from measure import MeasureType, Result, analyzeFile
+from average import ResultAverage, applySteadyState, calculateVariantAverages
+from synthetic import SyntheticConfig, generateTree
+
+STAGES = ["parse", "aggregate", "query", "render"]
+BENCHMARK_ALGORITHMS = [MeasureType.MAP, MeasureType.REDUCTION, MeasureType.STENCIL]
+BENCHMARK_OPTIMIZATIONS = ["O0", "O3"]
+BENCHMARK_THREADS = [1, 2, 4, 8, 16, 32]
+BENCHMARK_LOGS = len(BENCHMARK_ALGORITHMS) * len(BENCHMARK_OPTIMIZATIONS) * len(BENCHMARK_THREADS)
+DEFAULT_BASELINE = "benchmark.json"
+DEFAULT_TOLERANCE = 0.2 # queda de vazao (ou aumento de memoria) aceita antes de acusar regressao
+
+class StageResult:
+    def __init__(self) -> None:
+        self.stage: str = ""
+        self.records: int = 0 # repeticoes de algoritmo processadas pela etapa
+        self.seconds: float = 0.0 # melhor rodada
+        self.peakRss: float = 0.0 # MB, do processo que rodou a etapa
+
+    def throughput(self) -> float:
+        return self.records / self.seconds if self.seconds > 0 else 0.0
+
+    def toDict(self) -> dict:
+        return {"records": self.records, "seconds": self.seconds, "recordsPerSecond": self.throughput(), "peakRssMb": self.peakRss}
+
+def parseAll(paths: list[str]) -> list[Result]:
+    return [analyzeFile(path) for path in paths]
+
+def aggregateAll(results: list[Result]) -> list[ResultAverage]:
+    return applySteadyState([average for result in results for average in calculateVariantAverages(result)], warmup=1, outliers="mad")
+
+def queryAll(averages: list[ResultAverage]):
+    from metrics import METRICS, ResultTable, calculateMetric, groupByConfiguration
+    from recommend import buildFronts
+    from scaling import analyzeScaling
+    table = ResultTable(averages)
+    for metric in METRICS.values():
+        calculateMetric(metric, table)
+    groupByConfiguration(table)
+    analyzeScaling(averages)
+    buildFronts(averages)
+
+def renderAll(averages: list[ResultAverage], outputFolder: str) -> int:
+    # um grafico por metrica do Map, como o render do result.py
+    from metrics import METRICS
+    from plot import RenderJob, renderJob
+    calculatedAvgs = [average for average in averages if average.measureType == MeasureType.MAP]
+    for graph, metric in METRICS.items():
+        job = RenderJob()
+        job.graph = graph
+        job.output = os.path.join(outputFolder, f"Map_{metric.suffix}.png")
+        job.calculatedAvgs = calculatedAvgs
+        renderJob(job)
+    return sum(average.executionTimeAverage.count() for average in calculatedAvgs)
+
+def runStage(stage: str, folder: str, rounds: int) -> StageResult:
+    # roda num processo novo: o pico de RSS e o da etapa (mais as etapas anteriores de que ela depende), nao o do benchmark inteiro
+    os.environ["MPLBACKEND"] = "Agg"
+    paths = sorted(os.path.join(folder, fileName) for fileName in os.listdir(folder) if fileName.endswith(".txt"))
+    stageResult = StageResult()
+    stageResult.stage = stage
+    stageResult.seconds = float("inf")
+    results = parseAll(paths) if stage != "parse" else []
+    averages = aggregateAll(results) if stage in ["query", "render"] else []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        match stage:
+            case "parse":
+                results = parseAll(paths)
+            case "aggregate":
+                averages = aggregateAll(results)
+            case "query":
+                queryAll(averages)
+            case "render":
+                stageResult.records = renderAll(averages, folder)
+        stageResult.seconds = min(stageResult.seconds, time.perf_counter() - start)
+    if stage != "render":
+        stageResult.records = sum(1 for result in results for measure in result.measures if measure.type != MeasureType.IDLE)
+    stageResult.peakRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return stageResult
+
+def runBenchmark(repetitions: int, stages: list[str], rounds: int, seed: int = 0) -> list[StageResult]:
+    base = SyntheticConfig()
+    base.repetitions = max(1, repetitions // BENCHMARK_LOGS)
+    base.outlierRate = 0.02
+    with tempfile.TemporaryDirectory() as folder:
+        generateTree(folder, base, BENCHMARK_ALGORITHMS, BENCHMARK_OPTIMIZATIONS, BENCHMARK_THREADS, ["baseline"], seed)
+        context = multiprocessing.get_context("spawn")
+        stageResults: list[StageResult] = []
+        for stage in stages:
+            with context.Pool(1) as pool:
+                stageResults.append(pool.apply(runStage, (stage, folder, rounds)))
+        return stageResults
+
+def loadBaseline(path: str) -> dict:
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+def checkBaseline(baseline: dict, scale: str, stageResult: StageResult, tolerance: float) -> list[str]:
+    reference = baseline.get(scale, {}).get(stageResult.stage)
+    if reference is None:
+        return []
+    problems: list[str] = []
+    if stageResult.throughput() < reference["recordsPerSecond"] * (1 - tolerance):
+        problems.append(f"throughput {stageResult.throughput():.4g}/s < baseline {reference['recordsPerSecond']:.4g}/s")
+    if stageResult.peakRss > reference["peakRssMb"] * (1 + tolerance):
+        problems.append(f"peak RSS {stageResult.peakRss:.1f}MB > baseline {reference['peakRssMb']:.1f}MB")
+    return problems
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline (parse, aggregate, query, render) on synthetic logs and check it against a stored baseline")
+    parser.add_argument("-r", "--repetitions", nargs="+", type=int, default=[1000, 10000], help="algorithm repetitions per run, spread over the synthetic logs")
+    parser.add_argument("-S", "--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("-n", "--rounds", type=int, default=3, help="rounds per stage (the best one is kept)")
+    parser.add_argument("-b", "--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="relative slowdown or memory growth accepted")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    baseline = loadBaseline(args.baseline)
+    regressions = 0
+    for repetitions in args.repetitions:
+        scale = str(max(1, repetitions // BENCHMARK_LOGS) * BENCHMARK_LOGS)
+        print(f"{scale} repetitions in {BENCHMARK_LOGS} logs:")
+        print(f"┃   {'Stage':<10} {'Records':>8} {'Seconds':>9} {'Records/s':>11} {'Peak RSS':>10}")
+        for stageResult in runBenchmark(repetitions, args.stages, args.rounds, args.seed):
+            problems = checkBaseline(baseline, scale, stageResult, args.tolerance)
+            regressions += len(problems)
+            status = f" REGRESSION: {'; '.join(problems)}" if len(problems) > 0 else ""
+            print(f"┃   {stageResult.stage:<10} {stageResult.records:>8} {stageResult.seconds:>9.4g} {stageResult.throughput():>11.4g} {f'{stageResult.peakRss:.1f}MB':>10}{status}")
+            if args.save:
+                baseline.setdefault(scale, {})[stageResult.stage] = stageResult.toDict()
+        print()
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    sys.exit(1 if regressions > 0 and not args.save else 0)
@@ -0,0 +1,294 @@
+import hashlib
+import math
+import os
+import pathlib
+import numpy as np
+from measure import Measure, PHASE_EXECUTE, PHASE_NAMES, PackageMeasure, PhaseMeasure, Result, analyzeFile, isRecordFile
+from average import AverageValues, PackageAverage, PhaseAverage, ResultAverage, calculateFileAverages, calculateRecordAverages, calculateVariantAverages
+
+CACHE_VERSION = 8 # 3: valores sem arredondamento; 4: energia dinamica; 5: fases de preparo/limpeza e pico de RSS; 6: todos os campos de Result/Measure; 7: leituras negativas como NaN; 8: energia dinamica sem as leituras invalidas
+CACHE_FOLDER = "__cache__"
+CACHE_MAX_BYTES = 64 * 1024 * 1024 # limite da pasta de cache antes de remover os menos usados
+CACHE_MIN_BYTES = 8 * 1024 # logs menores que isso (~25 medicoes) sao mais rapidos de reanalisar do que de abrir o .npz
+DOMAINS = ["pkg", "pp0", "pp1", "dram"]
+
+def getCachePath(filePath: str) -> str:
+    path = pathlib.Path(filePath)
+    return os.path.join(path.parent, CACHE_FOLDER, f"{path.name}.npz")
+
+def hashFile(filePath: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filePath, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# slots dos valores agregados no arquivo: tempo, idle, todos os pacotes e cada pacote (3, 4, ...)
+SLOT_TIME = 0
+SLOT_IDLE = 1
+SLOT_ALL = 2
+SLOT_PACKAGE = 3
+SLOT_DYNAMIC = 1 << 16 # somado ao slot de todos os pacotes/de cada pacote: a energia acima do idle correspondente
+SLOT_PHASE = 1 << 17 # somado ao codigo da fase; number guarda as threads da fase
+PHASE_TIME = -1 # dominios das fases alem dos de energia
+PHASE_RSS = -2
+
+def packAverages(averages: list[ResultAverage]) -> tuple[np.ndarray, np.ndarray]:
+    # uma linha do indice por (variante, slot, dominio); group e a posicao da variante em averages
+    index: list[list[int]] = []
+    chunks: list[np.ndarray] = []
+    offset = 0
+    def pack(group: int, slot: int, domain: int, number: int, values: AverageValues):
+        nonlocal offset
+        index.append([group, slot, domain, number, offset, values.count()])
+        chunks.append(values.values())
+        offset += values.count()
+    for group, average in enumerate(averages):
+        pack(group, SLOT_TIME, -1, -1, average.executionTimeAverage)
+        pkgAverages = [(SLOT_IDLE, average.idleAverage), (SLOT_ALL, average.allPackageAverage)]
+        pkgAverages += [(SLOT_PACKAGE + i, pkgAvg) for i, pkgAvg in enumerate(average.packageAverages)]
+        if average.dynamicAllPackageAverage is not None:
+            pkgAverages += [(SLOT_DYNAMIC + SLOT_ALL, average.dynamicAllPackageAverage)]
+            pkgAverages += [(SLOT_DYNAMIC + SLOT_PACKAGE + i, pkgAvg) for i, pkgAvg in enumerate(average.dynamicPackageAverages)]
+        if average.peakRssAverage is not None:
+            pack(group, SLOT_PHASE + PHASE_EXECUTE, PHASE_RSS, -1, average.peakRssAverage)
+        for stage, name in PHASE_NAMES.items():
+            phaseAvg = average.phaseAverages.get(name)
+            if phaseAvg is None:
+                continue
+            pack(group, SLOT_PHASE + stage, PHASE_TIME, phaseAvg.threads, phaseAvg.time)
+            if phaseAvg.peakRss is not None:
+                pack(group, SLOT_PHASE + stage, PHASE_RSS, phaseAvg.threads, phaseAvg.peakRss)
+            for domain, domainName in enumerate(DOMAINS):
+                energies: AverageValues | None = getattr(phaseAvg.energy, domainName)
+                if energies is not None and energies.count() > 0:
+                    pack(group, SLOT_PHASE + stage, domain, phaseAvg.threads, energies)
+        for slot, pkgAvg in pkgAverages:
+            number = pkgAvg.pkgNumber if pkgAvg.pkgNumber is not None else -2
+            for domain, name in enumerate(DOMAINS):
+                values: AverageValues | None = getattr(pkgAvg, name)
+                if values is not None:
+                    pack(group, slot, domain, number, values)
+    return (np.array(index, dtype=np.int64).reshape(-1, 6), np.concatenate(chunks) if chunks else np.empty(0))
+
+def unpackAverages(averages: list[ResultAverage], index: np.ndarray, values: np.ndarray, packageCounts: list[int]):
+    for average, packageCount in zip(averages, packageCounts):
+        average.packageAverages = [PackageAverage() for _ in range(packageCount)]
+        average.dynamicAllPackageAverage = None
+    for group, slot, domain, number, start, length in index.tolist():
+        average = averages[group]
+        if slot == SLOT_TIME:
+            average.executionTimeAverage.addMany(values[start:start + length])
+            continue
+        if slot >= SLOT_PHASE:
+            unpackPhase(average, slot - SLOT_PHASE, domain, number, values[start:start + length])
+            continue
+        if slot >= SLOT_DYNAMIC and average.dynamicAllPackageAverage is None:
+            average.dynamicAllPackageAverage = PackageAverage()
+            average.dynamicPackageAverages = [PackageAverage() for _ in average.packageAverages]
+        match slot:
+            case 1: # SLOT_IDLE
+                pkgAvg = average.idleAverage
+            case 2: # SLOT_ALL
+                pkgAvg = average.allPackageAverage
+            case _ if slot == SLOT_DYNAMIC + SLOT_ALL:
+                pkgAvg = average.dynamicAllPackageAverage
+            case _ if slot >= SLOT_DYNAMIC:
+                pkgAvg = average.dynamicPackageAverages[slot - SLOT_DYNAMIC - SLOT_PACKAGE]
+            case _:
+                pkgAvg = average.packageAverages[slot - SLOT_PACKAGE]
+        pkgAvg.pkgNumber = number if number != -2 else None
+        if domain == 0:
+            domainValues = pkgAvg.pkg
+        else:
+            domainValues = AverageValues()
+            setattr(pkgAvg, DOMAINS[domain], domainValues)
+        domainValues.addMany(values[start:start + length])
+
+def unpackPhase(average: ResultAverage, stage: int, domain: int, threads: int, values: np.ndarray):
+    phaseValues = AverageValues()
+    phaseValues.addMany(values)
+    if stage == PHASE_EXECUTE:
+        average.peakRssAverage = phaseValues
+        return
+    phaseAvg = average.phaseAverages.setdefault(PHASE_NAMES[stage], PhaseAverage())
+    phaseAvg.threads = threads
+    match domain:
+        case -1: # PHASE_TIME
+            phaseAvg.time = phaseValues
+        case -2: # PHASE_RSS
+            phaseAvg.peakRss = phaseValues
+        case _:
+            phaseAvg.energy.pkgNumber = -1
+            setattr(phaseAvg.energy, DOMAINS[domain], phaseValues)
+
+def optionalValue(value: float | None) -> float:
+    return value if value is not None else math.nan
+
+def restoreValue(value: float) -> float | None:
+    return value if not math.isnan(value) else None
+
+def restoreTag(value: str) -> str | None:
+    return value if value != "" else None # "" no cache: campo ausente no log
+
+def saveCache(filePath: str, digest: str, result: Result, averages: list[ResultAverage]):
+    stat = os.stat(filePath)
+    variants = [average.baseResult.variant for average in averages]
+    hosts = list(dict.fromkeys(m.host for m in result.measures if m.host is not None))
+    phaseNames = list(dict.fromkeys(name for m in result.measures for name in m.phases))
+    # pacotes do kernel tem fase -1; os das fases, a posicao do nome em phaseNames
+    packages = [[i, -1, p.pkgNumber] + [optionalValue(getattr(p, d)) for d in DOMAINS] for i, m in enumerate(result.measures) for p in m.packages]
+    packages += [[i, phaseNames.index(name), p.pkgNumber] + [optionalValue(getattr(p, d)) for d in DOMAINS]
+                 for i, m in enumerate(result.measures) for name, phase in m.phases.items() for p in phase.packages]
+    phases = [[i, phaseNames.index(name), phase.time, phase.threads, optionalValue(phase.peakRss)] for i, m in enumerate(result.measures) for name, phase in m.phases.items()]
+    averageIndex, averageValues = packAverages(averages)
+    arrays: dict[str, np.ndarray] = {
+        "meta": np.array([CACHE_VERSION, stat.st_size, stat.st_mtime_ns, result.threads, result.iterations, result.arraySize], dtype=np.int64),
+        "names": np.array([digest, result.fileName] + [tag if tag is not None else "" for tag in [result.host, result.job, result.task]]),
+        "probe": np.array([optionalValue(result.bandwidth), optionalValue(result.peakFlops)], dtype=float),
+        "variants": np.array(variants),
+        "hosts": np.array(hosts, dtype=str),
+        "phaseNames": np.array(phaseNames, dtype=str),
+        "groups": np.array([[average.measureType if average.measureType is not None else -1, len(average.packageAverages)] for average in averages], dtype=np.int64).reshape(-1, 2),
+        "measures": np.array([[m.type, m.executionTime, variants.index(m.variant), optionalValue(m.peakRss), hosts.index(m.host) if m.host is not None else -1]
+                              for m in result.measures], dtype=float).reshape(-1, 5),
+        "packages": np.array(packages, dtype=float).reshape(-1, 3 + len(DOMAINS)),
+        "phases": np.array(phases, dtype=float).reshape(-1, 5),
+        "averageIndex": averageIndex,
+        "averageValues": averageValues,
+    }
+
+    writeCache(getCachePath(filePath), arrays)
+
+def loadCache(filePath: str, digest: str | None = None, withMeasures: bool = True) -> list[tuple[Result, ResultAverage]] | None:
+    cachePath = getCachePath(filePath)
+    if not os.path.isfile(cachePath):
+        return None
+    try:
+        with np.load(cachePath, allow_pickle=False) as arrays:
+            meta = arrays["meta"].tolist()
+            if meta[0] != CACHE_VERSION:
+                return None
+            names = arrays["names"].tolist()
+            stat = os.stat(filePath)
+            if meta[1] != stat.st_size or meta[2] != stat.st_mtime_ns:
+                # tamanho/data mudaram: so aproveita o cache se o conteudo for o mesmo
+                if digest is None or names[0] != digest:
+                    return None
+
+            results: list[Result] = []
+            averages: list[ResultAverage] = []
+            groups = arrays["groups"].tolist()
+            for variant, (measureType, _) in zip(arrays["variants"].tolist(), groups):
+                result = Result()
+                result.fileName = names[1]
+                result.threads, result.iterations, result.arraySize = meta[3:6]
+                result.host, result.job, result.task = (restoreTag(tag) for tag in names[2:5])
+                result.bandwidth, result.peakFlops = (restoreValue(value) for value in arrays["probe"].tolist())
+                result.variant = variant
+                average = ResultAverage()
+                average.baseResult = result
+                average.measureType = measureType if measureType != -1 else None
+                results.append(result)
+                averages.append(average)
+            if withMeasures:
+                loadMeasures(results, arrays["measures"], arrays["packages"], arrays["phases"], arrays["hosts"].tolist(), arrays["phaseNames"].tolist())
+            unpackAverages(averages, arrays["averageIndex"], arrays["averageValues"], [packageCount for _, packageCount in groups])
+    except (OSError, KeyError, ValueError, IndexError):
+        return None
+
+    os.utime(cachePath) # marca como usado recentemente (LRU)
+    return list(zip(results, averages))
+
+def refreshCache(filePath: str):
+    # conteudo igual mas tamanho/data diferentes (ex.: touch ou copia): so atualiza o cabecalho
+    cachePath = getCachePath(filePath)
+    with np.load(cachePath, allow_pickle=False) as arrays:
+        arrays = dict(arrays)
+    stat = os.stat(filePath)
+    arrays["meta"][1:3] = [stat.st_size, stat.st_mtime_ns]
+    writeCache(cachePath, arrays)
+
+def writeCache(cachePath: str, arrays: dict[str, np.ndarray]):
+    os.makedirs(os.path.dirname(cachePath), exist_ok=True)
+    tempPath = f"{cachePath}.{os.getpid()}.tmp"
+    with open(tempPath, "wb") as file:
+        np.savez_compressed(file, **arrays)
+    os.replace(tempPath, cachePath) # escrita atomica, varios processos podem usar a mesma pasta
+
+def loadMeasures(results: list[Result], measures: np.ndarray, packages: np.ndarray, phases: np.ndarray, hosts: list[str], phaseNames: list[str]):
+    # os pacotes e as fases referenciam a posicao da medicao no log, antes de separar por variante
+    allMeasures: list[Measure] = []
+    for measureType, executionTime, group, peakRss, host in measures.tolist():
+        measure = Measure()
+        measure.type = int(measureType)
+        measure.executionTime = executionTime
+        measure.variant = results[int(group)].variant
+        measure.peakRss = restoreValue(peakRss)
+        measure.host = hosts[int(host)] if host >= 0 else None
+        results[int(group)].measures.append(measure)
+        allMeasures.append(measure)
+    for row in phases.tolist():
+        phase = PhaseMeasure()
+        phase.time, phase.threads, phase.peakRss = row[2], int(row[3]), restoreValue(row[4])
+        allMeasures[int(row[0])].phases[phaseNames[int(row[1])]] = phase
+    for row in packages.tolist():
+        pkgMeasure = PackageMeasure()
+        pkgMeasure.pkgNumber = int(row[2])
+        pkgMeasure.pkg, pkgMeasure.pp0, pkgMeasure.pp1, pkgMeasure.dram = (restoreValue(v) for v in row[3:])
+        measure = allMeasures[int(row[0])]
+        if row[1] < 0:
+            measure.packages.append(pkgMeasure)
+        else:
+            measure.phases[phaseNames[int(row[1])]].packages.append(pkgMeasure)
+
+def evictCache(cacheFolder: str, maxBytes: int = CACHE_MAX_BYTES):
+    entries = []
+    for name in os.listdir(cacheFolder):
+        if name.endswith(".npz"):
+            stat = os.stat(os.path.join(cacheFolder, name))
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+    entries.sort()
+    totalBytes = sum(size for _, size, _ in entries)
+    for _, size, name in entries:
+        if totalBytes <= maxBytes:
+            break
+        try:
+            os.remove(os.path.join(cacheFolder, name))
+        except FileNotFoundError:
+            pass
+        totalBytes -= size
+
+def splitVariants(averages: list[ResultAverage]) -> list[tuple[Result, ResultAverage]]:
+    return [(average.baseResult, average) for average in averages]
+
+def loadResults(filePath: str, useCache: bool = True, maxBytes: int = CACHE_MAX_BYTES, withMeasures: bool = True, minBytes: int = CACHE_MIN_BYTES) -> list[tuple[Result, ResultAverage]]:
+    # um par (Result, media) por variante do kernel no log; logs antigos so tem a baseline
+    # withMeasures=False devolve result.measures vazio (so cabecalho e medias), o que evita recriar os objetos
+    if isRecordFile(filePath) and not withMeasures:
+        return splitVariants(calculateRecordAverages(filePath)) # o CSV ja e lido em bloco, mais rapido que o proprio cache
+    if not useCache or os.path.getsize(filePath) < minBytes:
+        if not withMeasures:
+            return splitVariants(calculateFileAverages(filePath))
+        return splitVariants(calculateVariantAverages(analyzeFile(filePath)))
+
+    cached = loadCache(filePath, withMeasures=withMeasures)
+    if cached is not None:
+        return cached
+    digest = hashFile(filePath)
+    cached = loadCache(filePath, digest, withMeasures=withMeasures)
+    if cached is not None:
+        try:
+            refreshCache(filePath)
+        except OSError:
+            pass
+        return cached
+
+    result = analyzeFile(filePath)
+    averages = calculateVariantAverages(result)
+    try:
+        saveCache(filePath, digest, result, averages)
+        evictCache(os.path.dirname(getCachePath(filePath)), maxBytes)
+    except OSError:
+        pass # pasta somente leitura: segue sem cache
+    return splitVariants(averages)
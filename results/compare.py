@@ -0,0 +1,224 @@
+import argparse
+import math
+import sys
+import warnings
+import numpy as np
+from measure import DEFAULT_VARIANT, getMeasureTypeName, getOptimizationLevel
+from average import AverageValues, OUTLIER_METHODS, ResultAverage
+from ingest import ingestTree
+from scaling import mergeAverages
+
+COMPARE_METRICS = ["time", "energy"]
+COMPARE_TESTS = ["welch", "permutation"]
+PERMUTATION_RESAMPLES = 10000
+PERMUTATION_CHUNK = 256 # reamostragens por bloco, limita a matriz a chunk x configuracoes x amostras
+PERMUTATION_SEED = 0
+BETA_ITERATIONS = 200
+
+class Comparison:
+    def __init__(self) -> None:
+        self.key: tuple = ()
+        self.metric: str = ""
+        self.baseCount: int = 0
+        self.newCount: int = 0
+        self.baseMean: float = math.nan
+        self.newMean: float = math.nan
+        self.change: float = math.nan # (novo - base) / base
+        self.pValue: float = math.nan
+
+    def isSignificant(self, alpha: float, minChange: float) -> bool:
+        return not math.isnan(self.pValue) and self.pValue < alpha and abs(self.change) >= minChange
+
+    def isRegression(self, alpha: float, minChange: float) -> bool:
+        # tempo e energia: maior e pior
+        return self.isSignificant(alpha, minChange) and self.change > 0
+
+def getCompareKey(calcAvg: ResultAverage, withOptimization: bool) -> tuple:
+    result = calcAvg.baseResult
+    key = (calcAvg.measureType, result.variant, result.threads, result.arraySize, result.iterations)
+    return ((getOptimizationLevel(result.fileName),) + key) if withOptimization else key
+
+def getCompareKeyName(key: tuple) -> str:
+    optimization = f"{key[0]} " if len(key) == 6 else ""
+    measureType, variant, threads, arraySize, iterations = key[-5:]
+    variantName = f" {variant}" if variant != DEFAULT_VARIANT else ""
+    return f"{optimization}{getMeasureTypeName(measureType)}{variantName} {threads}T {arraySize}x{arraySize} {iterations}it"
+
+def groupAverages(calculatedAvgs: list[ResultAverage], withOptimization: bool) -> dict[tuple, tuple[AverageValues, AverageValues]]:
+    groups: dict[tuple, list[ResultAverage]] = {}
+    for calcAvg in calculatedAvgs:
+        if calcAvg.measureType is not None:
+            groups.setdefault(getCompareKey(calcAvg, withOptimization), []).append(calcAvg)
+    return {key: mergeAverages(calcAvgs) for key, calcAvgs in groups.items()}
+
+def padValues(samples: list[np.ndarray]) -> np.ndarray:
+    # uma linha por configuracao, completada com nan ate a maior amostra
+    width = max((len(values) for values in samples), default=0)
+    matrix = np.full((len(samples), max(width, 1)), np.nan)
+    for i, values in enumerate(samples):
+        matrix[i, :len(values)] = values
+    return matrix
+
+def betaContinuedFraction(a: np.ndarray, b: np.ndarray, x: np.ndarray) -> np.ndarray:
+    # fracao continuada da beta incompleta (Lentz modificado), um passo para todas as configuracoes por vez
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c = np.ones_like(x)
+    d = 1.0 - qab * x / qap
+    d = 1.0 / np.where(np.abs(d) < tiny, tiny, d)
+    h = d.copy()
+    for m in range(1, BETA_ITERATIONS + 1):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((qam + m2) * (a + m2)), -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1.0 + aa * d
+            d = 1.0 / np.where(np.abs(d) < tiny, tiny, d)
+            c = 1.0 + aa / c
+            c = np.where(np.abs(c) < tiny, tiny, c)
+            h = h * d * c
+    return h
+
+def regularizedBeta(a: np.ndarray, b: np.ndarray, x: np.ndarray) -> np.ndarray:
+    lgamma = np.vectorize(math.lgamma, otypes=[float])
+    x = np.clip(x, 0.0, 1.0)
+    inner = (x > 0) & (x < 1)
+    safeX = np.where(inner, x, 0.5)
+    front = np.exp(lgamma(a + b) - lgamma(a) - lgamma(b) + a * np.log(safeX) + b * np.log1p(-safeX))
+    # simetria I_x(a,b) = 1 - I_{1-x}(b,a) onde a fracao continuada converge mal
+    direct = safeX < (a + 1) / (a + b + 2)
+    value = np.where(direct, front * betaContinuedFraction(a, b, safeX) / a, 1.0 - front * betaContinuedFraction(b, a, 1.0 - safeX) / b)
+    return np.where(inner, value, x)
+
+def studentTwoSided(t: np.ndarray, df: np.ndarray) -> np.ndarray:
+    # P(|T| >= |t|) com T ~ t de Student com df graus de liberdade
+    return regularizedBeta(df / 2, np.full_like(df, 0.5), df / (df + t * t))
+
+def welchTest(base: np.ndarray, new: np.ndarray) -> np.ndarray:
+    baseCount, newCount = np.sum(~np.isnan(base), axis=1), np.sum(~np.isnan(new), axis=1)
+    valid = (baseCount >= 2) & (newCount >= 2)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning) # configuracoes com menos de 2 amostras: ficam sem p-valor
+        baseMean, newMean = np.nanmean(base, axis=1), np.nanmean(new, axis=1)
+        baseVar, newVar = np.nanvar(base, axis=1, ddof=1) / baseCount, np.nanvar(new, axis=1, ddof=1) / newCount
+        stdErr2 = baseVar + newVar
+        t = (newMean - baseMean) / np.sqrt(stdErr2)
+        df = stdErr2 ** 2 / (baseVar ** 2 / (baseCount - 1) + newVar ** 2 / (newCount - 1))
+    constant = valid & (stdErr2 == 0) # sem variancia: diferenca e certa ou inexistente
+    pValues = np.full(len(base), np.nan)
+    regular = valid & ~constant
+    if regular.any():
+        pValues[regular] = studentTwoSided(t[regular], df[regular])
+    pValues[constant] = np.where(newMean[constant] == baseMean[constant], 1.0, 0.0)
+    return pValues
+
+def permutationTest(base: np.ndarray, new: np.ndarray, resamples: int = PERMUTATION_RESAMPLES, seed: int = PERMUTATION_SEED) -> np.ndarray:
+    # permuta os rotulos base/novo dentro de cada configuracao, todas as configuracoes no mesmo array
+    baseCount, newCount = np.sum(~np.isnan(base), axis=1), np.sum(~np.isnan(new), axis=1)
+    pooled = np.concatenate([base, new], axis=1)
+    present = ~np.isnan(pooled)
+    values = np.where(present, pooled, 0.0)
+    total = values.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        observed = np.abs(np.nanmean(new, axis=1) - np.nanmean(base, axis=1))
+    inBase = np.arange(pooled.shape[1]) < baseCount[:, None]
+
+    generator = np.random.default_rng(seed)
+    extreme = np.zeros(len(base))
+    for start in range(0, resamples, PERMUTATION_CHUNK):
+        chunk = min(PERMUTATION_CHUNK, resamples - start)
+        keys = generator.random((chunk,) + pooled.shape)
+        keys[:, ~present] = np.inf # ausentes ficam sempre no fim
+        order = np.argsort(keys, axis=2)
+        shuffled = np.take_along_axis(np.broadcast_to(values, keys.shape), order, axis=2)
+        baseSum = np.sum(shuffled * inBase, axis=2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            difference = np.abs((total - baseSum) / newCount - baseSum / baseCount)
+        extreme += np.sum(difference >= observed - 1e-12 * np.abs(observed), axis=0)
+    pValues = (extreme + 1) / (resamples + 1)
+    return np.where((baseCount >= 2) & (newCount >= 2), pValues, np.nan)
+
+def compareSets(baseAvgs: list[ResultAverage], newAvgs: list[ResultAverage], withOptimization: bool = True, test: str = "welch",
+                resamples: int = PERMUTATION_RESAMPLES) -> list[Comparison]:
+    baseGroups = groupAverages(baseAvgs, withOptimization)
+    newGroups = groupAverages(newAvgs, withOptimization)
+    keys = sorted(set(baseGroups) & set(newGroups))
+    comparisons: list[Comparison] = []
+    for metricIndex, metric in enumerate(COMPARE_METRICS):
+        base = padValues([baseGroups[key][metricIndex].values() for key in keys])
+        new = padValues([newGroups[key][metricIndex].values() for key in keys])
+        match test:
+            case "welch":
+                pValues = welchTest(base, new)
+            case "permutation":
+                pValues = permutationTest(base, new, resamples)
+            case _:
+                raise ValueError(f"Unknown test '{test}', expected one of {', '.join(COMPARE_TESTS)}")
+        for i, key in enumerate(keys):
+            comparison = Comparison()
+            comparison.key, comparison.metric = key, metric
+            baseValues, newValues = baseGroups[key][metricIndex], newGroups[key][metricIndex]
+            comparison.baseCount, comparison.newCount = baseValues.count(), newValues.count()
+            comparison.baseMean, comparison.newMean = baseValues.avg(), newValues.avg()
+            comparison.change = (comparison.newMean - comparison.baseMean) / comparison.baseMean if comparison.baseMean != 0 else math.nan
+            comparison.pValue = float(pValues[i])
+            comparisons.append(comparison)
+    comparisons.sort(key=lambda comparison: (comparison.key, COMPARE_METRICS.index(comparison.metric)))
+    return comparisons
+
+def showComparisons(comparisons: list[Comparison], alpha: float, minChange: float):
+    print(f"{'Configuration':<40} {'Metric':<7} {'Base':>14} {'New':>14} {'Change':>9} {'p':>8}")
+    for comparison in comparisons:
+        if comparison.isRegression(alpha, minChange):
+            status = "REGRESSION"
+        elif comparison.isSignificant(alpha, minChange):
+            status = "improvement"
+        else:
+            status = ""
+        unit = "s" if comparison.metric == "time" else "J"
+        print(f"{getCompareKeyName(comparison.key):<40} {comparison.metric:<7} {f'{comparison.baseMean:.6g}{unit}':>14} {f'{comparison.newMean:.6g}{unit}':>14} "
+              f"{comparison.change:>+9.2%} {comparison.pValue:>8.4f} {status}")
+
+def splitByOptimization(calculatedAvgs: list[ResultAverage], optimization: str) -> list[ResultAverage]:
+    return [calcAvg for calcAvg in calculatedAvgs if getOptimizationLevel(calcAvg.baseResult.fileName) == optimization]
+
+def addCompareArguments(parser: argparse.ArgumentParser):
+    parser.add_argument("base", help="baseline results folder or log")
+    parser.add_argument("new", nargs="?", default=None, help="new results folder or log (omit with --optimization to compare inside base)")
+    parser.add_argument("-O", "--optimization", nargs=2, metavar=("BASE", "NEW"), help="compare two optimization levels instead of two folders")
+    parser.add_argument("--test", choices=COMPARE_TESTS, default="welch", help="significance test (default: welch)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="significance level (default: 0.05)")
+    parser.add_argument("--min-change", type=float, default=0.02, help="ignore relative changes smaller than this (default: 0.02)")
+    parser.add_argument("--resamples", type=int, default=PERMUTATION_RESAMPLES, help="permutations per configuration")
+    parser.add_argument("-w", "--warmup", type=int, default=0, help="discard the first N repetitions of each log")
+    parser.add_argument("--outliers", choices=OUTLIER_METHODS, default=None, help="reject repetitions whose execution time is an outlier")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+
+def runCompare(args: argparse.Namespace) -> int:
+    if args.new is None and args.optimization is None:
+        print("give a second result set or --optimization BASE NEW", file=sys.stderr)
+        return 2
+
+    roots = [args.base] if args.new is None else [args.base, args.new]
+    loaded: list[list[ResultAverage]] = []
+    for root in roots:
+        ingested = ingestTree(root, args.jobs, warmup=args.warmup, outliers=args.outliers)
+        for ingestedFile in ingested:
+            if ingestedFile.error is not None:
+                print(f"Error in '{ingestedFile.path}': {ingestedFile.error}", file=sys.stderr)
+        loaded.append([ingestedFile.average for ingestedFile in ingested if ingestedFile.error is None])
+
+    baseAvgs, newAvgs = loaded[0], loaded[-1]
+    if args.optimization is not None:
+        baseAvgs, newAvgs = splitByOptimization(baseAvgs, args.optimization[0]), splitByOptimization(newAvgs, args.optimization[1])
+    comparisons = compareSets(baseAvgs, newAvgs, args.optimization is None, args.test, args.resamples)
+    if len(comparisons) == 0:
+        print("No configuration in common")
+        return 0
+    showComparisons(comparisons, args.alpha, args.min_change)
+    regressions = [comparison for comparison in comparisons if comparison.isRegression(args.alpha, args.min_change)]
+    print(f"{len(comparisons) // len(COMPARE_METRICS)} configuration(s) compared, {len(regressions)} significant regression(s)")
+    return 1 if len(regressions) > 0 else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two result sets configuration by configuration and flag significant time/energy regressions (exit code 1)")
+    addCompareArguments(parser)
+    sys.exit(runCompare(parser.parse_args()))
@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import math
+import os
+import pathlib
+import sqlite3
+from measure import DEFAULT_VARIANT, KERNEL_VARIANTS, LOG_ENCODING, LOG_ERRORS, Measure, MeasureType, Result, getMeasureTypeByName, getMeasureTypeName, getOptimizationLevel, getParser
+from ingest import findLogs
+
+DATABASE_FILE = "results.db"
+PREFIX_BYTES = 4096 # bytes do inicio do log usados para detectar se o arquivo foi reescrito
+METRIC_COLUMNS = {"time": "m.executionTime", "pkg": "m.pkg", "pp0": "m.pp0", "pp1": "m.pp1", "dram": "m.dram", "power": "m.pkg / m.executionTime"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    machine TEXT NOT NULL,
+    optimization TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    prefixHash TEXT NOT NULL,
+    threads INTEGER NOT NULL,
+    iterations INTEGER NOT NULL,
+    arraySize INTEGER NOT NULL,
+    variant TEXT NOT NULL DEFAULT 'baseline',
+    host TEXT
+);
+CREATE TABLE IF NOT EXISTS measures (
+    id INTEGER PRIMARY KEY,
+    logId INTEGER NOT NULL REFERENCES logs(id),
+    sequence INTEGER NOT NULL,
+    type INTEGER NOT NULL,
+    variant TEXT NOT NULL DEFAULT 'baseline',
+    threads INTEGER NOT NULL,
+    iterations INTEGER NOT NULL,
+    arraySize INTEGER NOT NULL,
+    executionTime REAL NOT NULL,
+    pkg REAL,
+    pp0 REAL,
+    pp1 REAL,
+    dram REAL
+);
+CREATE TABLE IF NOT EXISTS packages (
+    measureId INTEGER NOT NULL REFERENCES measures(id),
+    pkgNumber INTEGER NOT NULL,
+    pkg REAL,
+    pp0 REAL,
+    pp1 REAL,
+    dram REAL
+);
+CREATE INDEX IF NOT EXISTS logsMachine ON logs(machine, optimization);
+CREATE INDEX IF NOT EXISTS measuresLog ON measures(logId, sequence);
+CREATE INDEX IF NOT EXISTS packagesMeasure ON packages(measureId);
+"""
+# depois do ALTER TABLE dos bancos antigos, que nao tinham a coluna variant
+INDEXES = """
+CREATE INDEX IF NOT EXISTS measuresConfig ON measures(type, variant, threads, arraySize, iterations, logId);
+"""
+
+class QueryAverage:
+    def __init__(self) -> None:
+        self.machine: str = ""
+        self.optimization: str = ""
+        self.measureType: MeasureType = MeasureType.IDLE
+        self.variant: str = DEFAULT_VARIANT
+        self.threads: int = -1
+        self.arraySize: int = -1
+        self.iterations: int = -1
+        self.count: int = 0
+        self.min: float | None = None
+        self.max: float | None = None
+        self.avg: float | None = None
+        self.stdDev: float | None = None
+
+    def stdErr(self) -> float:
+        return self.stdDev / math.sqrt(self.count)
+
+    def confidenceInterval95(self) -> float:
+        return 1.96*self.stdErr()
+
+def openDatabase(databasePath: str = DATABASE_FILE) -> sqlite3.Connection:
+    connection = sqlite3.connect(databasePath)
+    connection.executescript(SCHEMA)
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(measures)")]
+    if "variant" not in columns:
+        connection.execute("DROP INDEX IF EXISTS measuresConfig")
+        connection.execute(f"ALTER TABLE measures ADD COLUMN variant TEXT NOT NULL DEFAULT '{DEFAULT_VARIANT}'")
+    # estado do parser no offset salvo; bancos antigos recomecam esses logs do zero (offset 0)
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(logs)")]
+    if "variant" not in columns:
+        connection.execute(f"ALTER TABLE logs ADD COLUMN variant TEXT NOT NULL DEFAULT '{DEFAULT_VARIANT}'")
+        connection.execute("ALTER TABLE logs ADD COLUMN host TEXT")
+        connection.execute("UPDATE logs SET offset = 0, prefixHash = ''")
+    connection.executescript(INDEXES)
+    return connection
+
+def sumDomain(measure: Measure, domain: str) -> float | None:
+    values = [getattr(p, domain) for p in measure.packages if getattr(p, domain) is not None]
+    return sum(values) if len(values) > 0 else None
+
+def ingestLog(connection: sqlite3.Connection, filePath: str) -> int:
+    path = os.path.abspath(filePath)
+    with open(path, "rb") as file:
+        prefix = file.read(PREFIX_BYTES)
+        row = connection.execute("SELECT id, offset, prefixHash, threads, iterations, arraySize, variant, host FROM logs WHERE path = ?", (path,)).fetchone()
+
+        result = Result()
+        offset = 0
+        if row is not None:
+            # retoma com o estado que o parser tinha no offset (cabecalho, variante e no ja lidos antes dele)
+            logId, offset, prefixHash, result.threads, result.iterations, result.arraySize, result.variant, result.host = row
+            fileSize = os.fstat(file.fileno()).st_size
+            if fileSize < offset or hashlib.blake2b(prefix[:offset], digest_size=16).hexdigest() != prefixHash:
+                # log truncado ou reescrito: descarta o que havia e recomeca do zero
+                connection.execute("DELETE FROM packages WHERE measureId IN (SELECT id FROM measures WHERE logId = ?)", (logId,))
+                connection.execute("DELETE FROM measures WHERE logId = ?", (logId,))
+                result = Result()
+                offset = 0
+        else:
+            machine = os.path.basename(os.path.dirname(path))
+            optimization = getOptimizationLevel(pathlib.Path(path).stem)
+            logId = connection.execute("INSERT INTO logs (path, machine, optimization, offset, prefixHash, threads, iterations, arraySize) VALUES (?, ?, ?, 0, '', -1, -1, -1)",
+                                       (path, machine, optimization)).lastrowid
+        sequence = connection.execute("SELECT COUNT(*) FROM measures WHERE logId = ?", (logId,)).fetchone()[0]
+
+        # so avanca o offset ao fim de um bloco completo; linhas parciais ficam para a proxima vez
+        parser = getParser(path, result)
+        file.seek(offset)
+        position = offset
+        added = 0
+        for rawLine in file:
+            if not rawLine.endswith(b"\n"):
+                break
+            position += len(rawLine)
+            measure = parser.feed(rawLine.decode(LOG_ENCODING, LOG_ERRORS))
+            if measure is None:
+                continue
+            measureId = connection.execute("INSERT INTO measures (logId, sequence, type, variant, threads, iterations, arraySize, executionTime, pkg, pp0, pp1, dram) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                           (logId, sequence, measure.type, measure.variant, result.threads, result.iterations, result.arraySize, measure.executionTime,
+                                            sumDomain(measure, "pkg"), sumDomain(measure, "pp0"), sumDomain(measure, "pp1"), sumDomain(measure, "dram"))).lastrowid
+            connection.executemany("INSERT INTO packages (measureId, pkgNumber, pkg, pp0, pp1, dram) VALUES (?, ?, ?, ?, ?, ?)",
+                                   [(measureId, p.pkgNumber, p.pkg, p.pp0, p.pp1, p.dram) for p in measure.packages])
+            sequence += 1
+            added += 1
+            offset = position
+
+    connection.execute("UPDATE logs SET offset = ?, prefixHash = ?, threads = ?, iterations = ?, arraySize = ?, variant = ?, host = ? WHERE id = ?",
+                       (offset, hashlib.blake2b(prefix[:offset], digest_size=16).hexdigest(), result.threads, result.iterations, result.arraySize, result.variant, result.host, logId))
+    return added
+
+def ingestLogs(connection: sqlite3.Connection, roots: str | list[str]) -> int:
+    if isinstance(roots, str):
+        roots = [roots]
+    added = 0
+    for root in roots:
+        for filePath in findLogs(root):
+            with connection: # uma transacao por log
+                added += ingestLog(connection, filePath)
+    return added
+
+def asList(value) -> list | None:
+    if value is None:
+        return None
+    return value if isinstance(value, (list, tuple, set)) else [value]
+
+def queryAverages(connection: sqlite3.Connection, metric: str = "time", machine: str | list[str] | None = None, optimization: str | list[str] | None = None,
+                  measureType: MeasureType | list[MeasureType] | None = None, variant: str | list[str] | None = None, threads: int | list[int] | None = None,
+                  arraySize: int | list[int] | None = None, iterations: int | list[int] | None = None) -> list[QueryAverage]:
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {', '.join(METRIC_COLUMNS)}")
+    value = METRIC_COLUMNS[metric]
+
+    where = [f"{value} IS NOT NULL"]
+    params = []
+    filters = [("l.machine", machine), ("l.optimization", optimization), ("m.type", measureType), ("m.variant", variant), ("m.threads", threads), ("m.arraySize", arraySize), ("m.iterations", iterations)]
+    for column, filterValue in filters:
+        filterValues = asList(filterValue)
+        if filterValues is not None:
+            where.append(f"{column} IN ({', '.join('?' for _ in filterValues)})")
+            params.extend(filterValues)
+    if measureType is None:
+        where.append(f"m.type != {MeasureType.IDLE}")
+
+    rows = connection.execute(f"""
+        SELECT l.machine, l.optimization, m.type, m.variant, m.threads, m.arraySize, m.iterations,
+               COUNT(*), MIN({value}), MAX({value}), AVG({value}), AVG(({value}) * ({value}))
+        FROM measures m JOIN logs l ON l.id = m.logId
+        WHERE {' AND '.join(where)}
+        GROUP BY l.machine, l.optimization, m.type, m.variant, m.threads, m.arraySize, m.iterations
+        ORDER BY l.machine, l.optimization, m.type, m.variant, m.threads, m.arraySize, m.iterations""", params).fetchall()
+
+    averages: list[QueryAverage] = []
+    for row in rows:
+        average = QueryAverage()
+        average.machine, average.optimization, average.measureType, average.variant, average.threads, average.arraySize, average.iterations = row[:7]
+        average.count = row[7]
+        average.min, average.max = row[8], row[9]
+        average.avg = row[10]
+        # mesmo desvio populacional do AverageValues; sem arredondar, como no caminho dos logs (o print formata)
+        average.stdDev = math.sqrt(max(row[11] - row[10] * row[10], 0.0))
+        averages.append(average)
+    return averages
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite database of the measurements in the result logs")
+    parser.add_argument("--db", default=DATABASE_FILE, help=f"database file (default: {DATABASE_FILE})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingestParser = subparsers.add_parser("ingest", help="add new measurements from results folders or logs")
+    ingestParser.add_argument("roots", nargs="+")
+    queryParser = subparsers.add_parser("query", help="aggregate one metric per configuration")
+    queryParser.add_argument("metric", choices=list(METRIC_COLUMNS))
+    queryParser.add_argument("-m", "--machine", nargs="+")
+    queryParser.add_argument("-O", "--optimization", nargs="+")
+    queryParser.add_argument("-a", "--algorithm", nargs="+")
+    queryParser.add_argument("-v", "--variant", nargs="+", choices=KERNEL_VARIANTS)
+    queryParser.add_argument("-t", "--threads", nargs="+", type=int)
+    queryParser.add_argument("-n", "--size", nargs="+", type=int)
+    queryParser.add_argument("-i", "--iterations", nargs="+", type=int)
+    args = parser.parse_args()
+
+    connection = openDatabase(args.db)
+    if args.command == "ingest":
+        print(f"{ingestLogs(connection, args.roots)} new measurement(s)")
+    else:
+        measureTypes = None
+        if args.algorithm is not None:
+            measureTypes = []
+            for name in args.algorithm:
+                measureType = getMeasureTypeByName(name)
+                if measureType is None:
+                    parser.error(f"Unknown algorithm '{name}'")
+                measureTypes.append(measureType)
+        for average in queryAverages(connection, args.metric, args.machine, args.optimization, measureTypes, args.variant, args.threads, args.size, args.iterations):
+            print(f"{average.machine} {average.optimization} {getMeasureTypeName(average.measureType)} {average.variant} {average.threads}T "
+                  f"{average.arraySize}x{average.arraySize} {average.iterations}it: n={average.count} avg={average.avg:.6g} "
+                  f"stdDev={average.stdDev:.6g} min={average.min:.6g} max={average.max:.6g}")
+    connection.close()
@@ -0,0 +1,100 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from measure import DEFAULT_VARIANT, RECORD_EXTENSION, Result, getMeasureTypeName, isRecordLog
+from average import OUTLIER_METHODS, ResultAverage, applySteadyState, getSteadyStateSummary
+from cache import loadResults
+
+LOG_EXTENSION = ".txt"
+
+class IngestedFile:
+    def __init__(self) -> None:
+        self.path: str = ""
+        self.folder: str = ""
+        self.result: Result | None = None
+        self.average: ResultAverage | None = None
+        self.error: str | None = None
+
+def findLogs(root: str) -> list[str]:
+    if os.path.isfile(root):
+        return [root]
+    logs: list[str] = []
+    for dirPath, dirNames, fileNames in os.walk(root):
+        dirNames[:] = [d for d in dirNames if not d.startswith("__") and d != "graphs"]
+        records = {fileName for fileName in fileNames if fileName.endswith(RECORD_EXTENSION) and isRecordLog(os.path.join(dirPath, fileName))}
+        for fileName in fileNames:
+            if fileName in records:
+                logs.append(os.path.join(dirPath, fileName))
+            elif fileName.endswith(LOG_EXTENSION) and fileName[:-len(LOG_EXTENSION)] + RECORD_EXTENSION not in records:
+                logs.append(os.path.join(dirPath, fileName)) # o CSV da mesma execucao (tccgreen -d) tem preferencia
+    return sorted(logs)
+
+def ingestFile(filePath: str, useCache: bool = True, withMeasures: bool = False, warmup: int = 0, outliers: str | None = None) -> list[IngestedFile]:
+    # um IngestedFile por variante do kernel encontrada no log
+    # warmup/outliers so afetam as medias; result.measures continua com todas as medicoes
+    folder = os.path.basename(os.path.dirname(os.path.abspath(filePath)))
+    try:
+        loaded = loadResults(filePath, useCache=useCache, withMeasures=withMeasures)
+        applySteadyState([average for _, average in loaded], warmup, outliers)
+    except Exception as e: # um log quebrado nao deve abortar o lote inteiro
+        ingested = IngestedFile()
+        ingested.path, ingested.folder = filePath, folder
+        ingested.error = f"{type(e).__name__}: {e}"
+        return [ingested]
+    ingestedFiles: list[IngestedFile] = []
+    for result, average in loaded:
+        ingested = IngestedFile()
+        ingested.path, ingested.folder = filePath, folder
+        ingested.result, ingested.average = result, average
+        ingestedFiles.append(ingested)
+    return ingestedFiles
+
+def ingestFiles(filePaths: list[str], workers: int | None = None, useCache: bool = True, withMeasures: bool = False,
+                warmup: int = 0, outliers: str | None = None) -> list[IngestedFile]:
+    # a ordem do retorno e sempre a ordem de filePaths, independente de qual processo termina primeiro
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(filePaths))
+    if workers <= 1:
+        return [ingested for filePath in filePaths for ingested in ingestFile(filePath, useCache, withMeasures, warmup, outliers)]
+    chunkSize = max(1, len(filePaths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [ingested for ingestedFiles in executor.map(ingestFile, filePaths, repeat(useCache), repeat(withMeasures), repeat(warmup), repeat(outliers), chunksize=chunkSize) for ingested in ingestedFiles]
+
+def ingestTree(roots: str | list[str], workers: int | None = None, useCache: bool = True, withMeasures: bool = False,
+               warmup: int = 0, outliers: str | None = None) -> list[IngestedFile]:
+    if isinstance(roots, str):
+        roots = [roots]
+    filePaths: list[str] = []
+    for root in roots:
+        filePaths.extend(findLogs(root))
+    return ingestFiles(filePaths, workers, useCache, withMeasures, warmup, outliers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze every log in one or more results folders in parallel")
+    parser.add_argument("roots", nargs="+", help="results folders (e.g. cluster_large i7-9750h_large) or log files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the __cache__ folders")
+    parser.add_argument("-w", "--warmup", type=int, default=0, help="discard the first N repetitions of each log")
+    parser.add_argument("--outliers", choices=OUTLIER_METHODS, default=None, help="reject repetitions whose execution time is an outlier")
+    args = parser.parse_args()
+
+    errors = 0
+    for ingested in ingestTree(args.roots, args.jobs, useCache=not args.no_cache, warmup=args.warmup, outliers=args.outliers):
+        if ingested.error is not None:
+            errors += 1
+            print(f"{ingested.path}: {ingested.error}", file=sys.stderr)
+            continue
+        calcAvg = ingested.average
+        if calcAvg.measureType is None:
+            print(f"{ingested.path}: no measurements")
+            continue
+        variant = f" {calcAvg.baseResult.variant}" if calcAvg.baseResult.variant != DEFAULT_VARIANT else ""
+        print(f"{ingested.path}: {getMeasureTypeName(calcAvg.measureType)}{variant} {calcAvg.baseResult.threads}T, "
+              f"{calcAvg.executionTimeAverage.count()} runs, {calcAvg.executionTimeAverage.avg():.6g}s, {calcAvg.allPackageAverage.pkg.avg():.6g}J"
+              + (f" ({summary})" if (summary := getSteadyStateSummary(calcAvg)) is not None else ""))
+    if errors > 0:
+        print(f"{errors} file(s) failed", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import html
+import json
+import math
+import os
+import pathlib
+import sys
+import time
+from measure import DEFAULT_VARIANT, LOG_ENCODING, LOG_ERRORS, Measure, MeasureParser, RecordParser, Result, getMeasureTypeName, getParser
+from average import AverageValues, ResultAverage, addMeasure
+from ingest import findLogs
+
+DEFAULT_INTERVAL = 2.0 # segundos entre as varreduras da pasta
+READ_CHUNK = 1 << 20
+PREFIX_BYTES = 4096 # inicio do log guardado para detectar se o arquivo foi reescrito (como no database.py)
+
+class LiveLog:
+    # le so o que foi acrescentado desde a ultima varredura; as medias sao atualizadas medicao a medicao
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.offset: int = 0
+        self.partial: bytes = b"" # ultima linha ainda sem \n (harness no meio da escrita)
+        self.result: Result = Result()
+        self.parser: MeasureParser | RecordParser = getParser(path, self.result)
+        self.averages: dict[str, ResultAverage] = {}
+        self.lastChange: float = 0.0 # time.time() da ultima medicao nova
+        self.identity: tuple[int, int] | None = None # (st_dev, st_ino) do arquivo lido
+        self.modified: int = 0 # st_mtime_ns da ultima leitura
+        self.prefix: bytes = b"" # primeiros bytes ja lidos
+
+    def reset(self):
+        # arquivo truncado ou substituido: recomeca do inicio
+        self.__init__(self.path)
+
+    def isReplaced(self, stat: os.stat_result, file) -> bool:
+        # outro arquivo no mesmo caminho (nova execucao com -o), truncado, ou reescrito no lugar com o mesmo inicio diferente
+        if self.identity is not None and (stat.st_dev, stat.st_ino) != self.identity:
+            return True
+        if stat.st_size < self.offset:
+            return True
+        file.seek(0)
+        return file.read(len(self.prefix)) != self.prefix
+
+    def poll(self) -> int:
+        stat = os.stat(self.path)
+        if (stat.st_dev, stat.st_ino) == self.identity and stat.st_mtime_ns == self.modified and stat.st_size == self.offset:
+            return 0
+        newMeasures = 0
+        with open(self.path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            if self.isReplaced(stat, file):
+                self.reset()
+            self.identity, self.modified = (stat.st_dev, stat.st_ino), stat.st_mtime_ns
+            file.seek(self.offset)
+            while True:
+                chunk = file.read(READ_CHUNK)
+                if not chunk:
+                    break
+                if len(self.prefix) < PREFIX_BYTES:
+                    self.prefix += chunk[:PREFIX_BYTES - len(self.prefix)]
+                self.offset += len(chunk)
+                lines = (self.partial + chunk).split(b"\n")
+                self.partial = lines.pop()
+                for line in lines:
+                    measure = self.parser.feed(line.decode(LOG_ENCODING, LOG_ERRORS) + "\n")
+                    if measure is not None:
+                        self.addMeasure(measure)
+                        newMeasures += 1
+        if newMeasures > 0:
+            self.lastChange = time.time()
+        return newMeasures
+
+    def addMeasure(self, measure: Measure):
+        if measure.variant not in self.averages:
+            variantResult = Result()
+            variantResult.fileName, variantResult.variant = pathlib.Path(self.path).stem, measure.variant
+            self.averages[measure.variant] = ResultAverage()
+            self.averages[measure.variant].baseResult = variantResult
+        allAvg = self.averages[measure.variant]
+        allAvg.baseResult.threads, allAvg.baseResult.iterations, allAvg.baseResult.arraySize = self.result.threads, self.result.iterations, self.result.arraySize
+        addMeasure(allAvg, measure)
+
+class LiveRow:
+    def __init__(self) -> None:
+        self.file: str = ""
+        self.algorithm: str = ""
+        self.variant: str = DEFAULT_VARIANT
+        self.threads: int = -1
+        self.runs: int = 0
+        self.time: float = math.nan
+        self.timeCi: float = math.nan # largura relativa do intervalo de 95%
+        self.energy: float = math.nan
+        self.energyCi: float = math.nan
+        self.power: float = math.nan
+        self.idle: float = math.nan # segundos desde a ultima medicao
+        self.slow: bool = False # ultima repeticao e outlier (MAD) de tempo: no lento ou com throttling
+
+    def toDict(self) -> dict:
+        return {name: (None if isinstance(value, float) and math.isnan(value) else value) for name, value in self.__dict__.items()}
+
+def relativeCiWidth(values: AverageValues) -> float:
+    return 2 * values.confidenceInterval95() / values.avg() if values.count() > 1 and values.avg() != 0 else math.nan
+
+def getRows(logs: list[LiveLog]) -> list[LiveRow]:
+    now = time.time()
+    rows: list[LiveRow] = []
+    for log in logs:
+        for allAvg in log.averages.values():
+            if allAvg.measureType is None:
+                continue
+            times, energies = allAvg.executionTimeAverage, allAvg.allPackageAverage.pkg
+            row = LiveRow()
+            row.file, row.algorithm = allAvg.baseResult.fileName, getMeasureTypeName(allAvg.measureType)
+            row.variant, row.threads, row.runs = allAvg.baseResult.variant, allAvg.baseResult.threads, times.count()
+            row.time, row.timeCi = times.avg(), relativeCiWidth(times)
+            row.energy, row.energyCi = energies.avg(), relativeCiWidth(energies)
+            row.power = energies.avg() / times.avg() if times.avg() > 0 else math.nan
+            row.idle = now - log.lastChange
+            row.slow = times.count() >= 3 and bool(times.outliers("mad")[-1]) and times.values()[-1] > times.median()
+            rows.append(row)
+    rows.sort(key=lambda row: (row.algorithm, row.file, row.variant))
+    return rows
+
+def formatRows(rows: list[LiveRow], folders: list[str]) -> str:
+    lines = [f"{time.strftime('%H:%M:%S')} {', '.join(folders)}: {len(rows)} configuration(s)",
+             f"{'File':<20} {'Algorithm':<10} {'Variant':<10} {'Threads':>7} {'Runs':>5} {'Time (s)':>10} {'CI':>7} {'Energy (J)':>11} {'CI':>7} {'Power (W)':>9} {'Idle':>7}"]
+    for row in rows:
+        lines.append(f"{row.file:<20} {row.algorithm:<10} {row.variant:<10} {row.threads:>7} {row.runs:>5} {row.time:>10.4g} {row.timeCi:>7.1%} {row.energy:>11.5g} "
+                     f"{row.energyCi:>7.1%} {row.power:>9.4g} {row.idle:>6.0f}s" + (" SLOW" if row.slow else ""))
+    return "\n".join(lines)
+
+def formatHtml(rows: list[LiveRow], folders: list[str], interval: float) -> str:
+    header = "".join(f"<th>{name}</th>" for name in ["File", "Algorithm", "Variant", "Threads", "Runs", "Time (s)", "CI", "Energy (J)", "CI", "Power (W)", "Idle (s)"])
+    body = "".join(
+        f"<tr{' class=slow' if row.slow else ''}><td>{html.escape(row.file)}</td><td>{row.algorithm}</td><td>{html.escape(row.variant)}</td><td>{row.threads}</td>"
+        f"<td>{row.runs}</td><td>{row.time:.4g}</td><td>{row.timeCi:.1%}</td><td>{row.energy:.5g}</td><td>{row.energyCi:.1%}</td><td>{row.power:.4g}</td><td>{row.idle:.0f}</td></tr>"
+        for row in rows)
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><meta http-equiv='refresh' content='{max(1, round(interval))}'><title>tccgreen live</title>"
+            "<style>body{font-family:monospace}td,th{padding:2px 8px;text-align:right}tr.slow{background:#fbb}</style></head>"
+            f"<body><p>{time.strftime('%H:%M:%S')} {html.escape(', '.join(folders))}</p><table><tr>{header}</tr>{body}</table></body></html>")
+
+class LiveDashboard:
+    def __init__(self, folders: list[str], interval: float = DEFAULT_INTERVAL) -> None:
+        self.folders: list[str] = folders
+        self.interval: float = interval
+        self.logs: dict[str, LiveLog] = {}
+        self.rows: list[LiveRow] = []
+
+    def scan(self) -> int:
+        # logs novos entram com offset 0; os conhecidos so leem o que cresceu
+        for folder in self.folders:
+            for path in findLogs(folder):
+                if path not in self.logs:
+                    self.logs[path] = LiveLog(path)
+        newMeasures = 0
+        for path, log in list(self.logs.items()):
+            try:
+                newMeasures += log.poll()
+            except FileNotFoundError:
+                del self.logs[path]
+        self.rows = getRows(list(self.logs.values()))
+        return newMeasures
+
+    async def watch(self, terminal: bool = True):
+        while True:
+            await asyncio.to_thread(self.scan)
+            if terminal:
+                print("\x1b[H\x1b[2J" + formatRows(self.rows, self.folders), flush=True)
+            await asyncio.sleep(self.interval)
+
+    async def handleHttp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # "/" devolve a tabela em HTML e "/json" as linhas
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in [b"\r\n", b"\n", b""]:
+                pass
+            path = request.split(b" ")[1].decode() if len(request.split(b" ")) > 1 else "/"
+            if path == "/json":
+                body, contentType = json.dumps([row.toDict() for row in self.rows]), "application/json"
+            else:
+                body, contentType = formatHtml(self.rows, self.folders, self.interval), "text/html; charset=utf-8"
+            data = body.encode()
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {contentType}\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+async def runDashboard(dashboard: LiveDashboard, terminal: bool = True, port: int | None = None):
+    tasks = [dashboard.watch(terminal)]
+    if port is not None:
+        server = await asyncio.start_server(dashboard.handleHttp, "127.0.0.1", port)
+        print(f"Serving on http://127.0.0.1:{port}", file=sys.stderr)
+        tasks.append(server.serve_forever())
+    await asyncio.gather(*tasks)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tail the results logs while a sweep runs and show time, energy and CI width per configuration")
+    parser.add_argument("folders", nargs="+", help="results folders to watch")
+    parser.add_argument("-i", "--interval", type=float, default=DEFAULT_INTERVAL, help="seconds between scans")
+    parser.add_argument("-p", "--port", type=int, default=None, help="also serve the table on http://127.0.0.1:PORT (JSON at /json)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not redraw the table in the terminal")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(runDashboard(LiveDashboard(args.folders, args.interval), not args.quiet, args.port))
+    except KeyboardInterrupt:
+        pass
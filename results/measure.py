@@ -1,4 +1,18 @@
+import numpy as np
 import pathlib
+from typing import Iterable, Iterator, TextIO
+
+LOG_ENCODING = "utf-8"
+LOG_ERRORS = "replace" # os logs sao ASCII; um byte invalido nao deve derrubar a leitura
+RECORD_EXTENSION = ".csv"
+RECORD_HEADER = "# session,type," # primeira linha de todo arquivo aberto pelo tccgreen -d
+# tccgreen -d: session,type,variant,threads,size,iterations,time,packages e depois package,pkg,pp0,pp1,dram por pacote
+RECORD_TYPE, RECORD_VARIANT, RECORD_THREADS, RECORD_SIZE, RECORD_ITERATIONS, RECORD_TIME, RECORD_PACKAGES = range(1, 8)
+RECORD_FIXED_COLUMNS = 8
+RECORD_PACKAGE_COLUMNS = 5
+# tccgreen -v, na ordem do KernelVariant em utils.h (o codigo e o indice)
+KERNEL_VARIANTS = ["baseline", "contiguous", "simd", "tiled"]
+DEFAULT_VARIANT = "baseline" # logs sem a linha "Variante alterada para"
 
 class MeasureType:
     IDLE = 0
@@ -6,6 +20,10 @@ class MeasureType:
     REDUCTION = 2
     STENCIL = 3
 
+# fases do harness (mesmos codigos do TraceStage do sampler.h): o preparo e a limpeza tem tempo e energia proprios
+PHASE_INIT, PHASE_EXECUTE, PHASE_CLEAN = 1, 2, 3
+PHASE_NAMES = {PHASE_INIT: "init", PHASE_EXECUTE: "execute", PHASE_CLEAN: "clean"}
+
 class PackageMeasure:
     def __init__(self) -> None:
         self.pkgNumber: int = -1
@@ -14,11 +32,22 @@ class PackageMeasure:
         self.pp1: float | None = None
         self.dram: float | None = None
 
+class PhaseMeasure:
+    def __init__(self) -> None:
+        self.time: float = 0.0
+        self.threads: int = -1 # o preparo da baseline usa todas as threads disponiveis, nao as do -c
+        self.peakRss: float | None = None # MB
+        self.packages: list[PackageMeasure] = []
+
 class Measure:
     def __init__(self) -> None:
         self.type: MeasureType = MeasureType.IDLE
+        self.variant: str = DEFAULT_VARIANT
+        self.host: str | None = None # no onde a medicao rodou (varios nos podem anexar ao mesmo log)
         self.executionTime: float = 0.0
         self.packages: list[PackageMeasure] = []
+        self.peakRss: float | None = None # MB durante a execucao; logs antigos nao tem
+        self.phases: dict[str, PhaseMeasure] = {} # "init" e "clean"
 
 class Result:
     def __init__(self) -> None:
@@ -26,6 +55,12 @@ class Result:
         self.threads: int = -1
         self.iterations: int = -1
         self.arraySize: int = -1
+        self.variant: str = DEFAULT_VARIANT
+        self.bandwidth: float | None = None # GB/s do tccgreen -p
+        self.peakFlops: float | None = None # GFLOP/s do tccgreen -p
+        self.host: str | None = None # ultima identificacao do no/job/tarefa do slurm encontrada no log
+        self.job: str | None = None
+        self.task: str | None = None
         self.measures: list[Measure] = []
 
 def getMeasureTypeName(measureType: MeasureType) -> str:
@@ -41,6 +76,21 @@ def getMeasureTypeName(measureType: MeasureType) -> str:
         case _:
             return "Unknown"
 
+def getMeasureTypeByName(name: str) -> MeasureType | None:
+    for measureType in [MeasureType.IDLE, MeasureType.MAP, MeasureType.REDUCTION, MeasureType.STENCIL]:
+        if getMeasureTypeName(measureType).lower() == name.lower():
+            return measureType
+    return None
+
+def getOptimizationLevel(fileName: str) -> str:
+    # convencao dos scripts: <OTIMIZACAO>-<algoritmo><threads>.txt, ex.: O3-m8.txt
+    return fileName.split("-")[0]
+
+def getResultLabel(result: Result) -> str:
+    # nivel de otimizacao, mais a variante quando nao e a original (ex.: O3 tiled)
+    optimization = getOptimizationLevel(result.fileName)
+    return optimization if result.variant == DEFAULT_VARIANT else f"{optimization} {result.variant}"
+
 def getMeasureTypeFlops(measureType: MeasureType, arrSize: int, iterations: int) -> float:
     match measureType:
         case MeasureType.MAP:
@@ -54,68 +104,263 @@ def getMeasureTypeFlops(measureType: MeasureType, arrSize: int, iterations: int)
         case _:
             return 0
 
-def analyzeFile(filePath: str) -> Result:
-    file = open(filePath, "r", encoding="unicode_escape")
-    lines = file.readlines()
+def getMeasureTypeBytes(measureType: MeasureType, arrSize: int, iterations: int) -> float:
+    # trafego de memoria por iteracao supondo que o array inteiro passa pela DRAM a cada iteracao
+    # (arrays de 40000x40000 nao cabem na cache); a variante tiled reaproveita a cache e trafega menos.
+    # Sem o write-allocate, na mesma convencao do STREAM usado pelo tccgreen -p
+    match measureType:
+        case MeasureType.MAP:
+            return arrSize * arrSize * iterations * 16 # le e escreve o mesmo elemento
+        case MeasureType.REDUCTION:
+            return arrSize * arrSize * iterations * 8 # so leitura
+        case MeasureType.STENCIL:
+            return arrSize * arrSize * iterations * 16 # buffer duplo: le arr (os vizinhos vem da cache) e escreve arr_new
+        case _:
+            return 0
 
-    usedThreads = 0
-    iterationCount = 0
-    arrSize = 0
-    allMeasures = []
+class MeasureParser:
+    def __init__(self, result: Result | None = None) -> None:
+        # o cabecalho (threads, iteracoes, tamanho) e gravado no result conforme aparece
+        self.result: Result = result if result is not None else Result()
+        self.currentMeasure: Measure | None = None
 
-    currentMeasure: Measure = None
-    for line in lines:
+    def feed(self, line: str) -> Measure | None:
         splitLine = line.split(" ")
         match splitLine[0]:
+            case "Probe":
+                if splitLine[1] == "Bandwidth": # Probe Bandwidth (triad): X GB/s
+                    self.result.bandwidth = float(splitLine[3])
+                else: # Probe Compute: X GFLOP/s
+                    self.result.peakFlops = float(splitLine[2])
+            case "Host:": # Host: NOME (job ID, tarefa ID)
+                self.result.host = splitLine[1]
+                self.result.job = parseTagValue(splitLine[3].rstrip(","))
+                self.result.task = parseTagValue(splitLine[5].strip().rstrip(")"))
+            case "Variante": # Variante alterada para NOME
+                self.result.variant = splitLine[3].strip()
             case "Tamanho": # Tamanho do array alterado para NxN
-                arrSize = int(splitLine[5].split("x")[0])
+                self.result.arraySize = int(splitLine[5].split("x")[0])
             case "Quantidade":
-                if splitLine[1] == "maxima": # Quantidade maxima de threads alterada para N
-                    usedThreads = int(splitLine[6])
+                if splitLine[1] == "maxima":
+                    if splitLine[4] == "inicial:": # Quantidade maxima de threads inicial: N (saida padrao)
+                        self.result.threads = int(splitLine[5])
+                    else: # Quantidade maxima de threads alterada para N
+                        self.result.threads = int(splitLine[6])
                 if splitLine[1] == "de": # Quantidade de iteracoes alterado para N
-                    iterationCount = int(splitLine[5])
+                    self.result.iterations = int(splitLine[5])
             case "Measuring": # Measuring idle (1s)
-                currentMeasure = Measure()
-                currentMeasure.type = MeasureType.IDLE
-                currentMeasure.executionTime = 1.0
+                self.currentMeasure = Measure()
+                self.currentMeasure.type = MeasureType.IDLE
+                self.currentMeasure.variant = self.result.variant
+                self.currentMeasure.host = self.result.host
+                self.currentMeasure.executionTime = 1.0
             case "Initialize": # Initialize ALGORITHM (NxM array)
-                currentMeasure = Measure()
+                self.currentMeasure = Measure()
+                self.currentMeasure.variant = self.result.variant
+                self.currentMeasure.host = self.result.host
                 match splitLine[1]:
                     case "Map":
-                        currentMeasure.type = MeasureType.MAP
+                        self.currentMeasure.type = MeasureType.MAP
                     case "Reduction":
-                        currentMeasure.type = MeasureType.REDUCTION
+                        self.currentMeasure.type = MeasureType.REDUCTION
                     case "Stencil":
-                        currentMeasure.type = MeasureType.STENCIL
+                        self.currentMeasure.type = MeasureType.STENCIL
                     case _:
                         print(f"Unknown algorithm '{splitLine[1]}'")
-            case "Execution": # Execution time: TIMEs
-                currentMeasure.executionTime = float(splitLine[2][:-2])
+            case "Execution":
+                if splitLine[1] == "peak": # Execution peak RSS: NMB
+                    self.currentMeasure.peakRss = parseMemory(splitLine[3])
+                else: # Execution time: TIMEs
+                    self.currentMeasure.executionTime = float(splitLine[2][:-2])
             case "Package": # Package N: PKG=XJ, PP0=YJ, PP1=WJ, DRAM=ZJ
-                currentPackage = PackageMeasure()
-                currentPackage.pkgNumber = int(splitLine[1][0])
-                for i in range(2,len(splitLine)):
-                    value = float(splitLine[i].split("=")[1].split("J")[0])
-                    if splitLine[i].startswith("PKG="):
-                        currentPackage.pkg = value
-                    elif splitLine[i].startswith("PP0="):
-                        currentPackage.pp0 = value
-                    elif splitLine[i].startswith("PP1="):
-                        currentPackage.pp1 = value
-                    elif splitLine[i].startswith("DRAM="):
-                        currentPackage.dram = value
-                    else:
-                        print(f"Unknown RAPL domain '{splitLine[i]}'")
-                currentMeasure.packages.append(currentPackage)
+                self.currentMeasure.packages.append(parsePackage(splitLine))
+            case "Phase":
+                if splitLine[2] == "Package": # Phase FASE Package N: PKG=XJ, ...
+                    self.currentMeasure.phases[splitLine[1]].packages.append(parsePackage(splitLine[2:]))
+                else: # Phase FASE: TIMEs, N threads, peak RSS NMB
+                    phase = PhaseMeasure()
+                    phase.time = float(splitLine[2][:-2])
+                    phase.threads = int(splitLine[3])
+                    phase.peakRss = parseMemory(splitLine[7])
+                    self.currentMeasure.phases[splitLine[1][:-1]] = phase
             case "\n":
-                if currentMeasure is not None:
-                    allMeasures.append(currentMeasure)
-                    currentMeasure = None
-    
+                if self.currentMeasure is not None:
+                    measure = self.currentMeasure
+                    self.currentMeasure = None
+                    return measure
+        return None
+
+def parsePackage(splitLine: list[str]) -> PackageMeasure:
+    currentPackage = PackageMeasure()
+    currentPackage.pkgNumber = int(splitLine[1][:-1])
+    for i in range(2,len(splitLine)):
+        value = float(splitLine[i].split("=")[1].split("J")[0])
+        if splitLine[i].startswith("PKG="):
+            currentPackage.pkg = value
+        elif splitLine[i].startswith("PP0="):
+            currentPackage.pp0 = value
+        elif splitLine[i].startswith("PP1="):
+            currentPackage.pp1 = value
+        elif splitLine[i].startswith("DRAM="):
+            currentPackage.dram = value
+        else:
+            print(f"Unknown RAPL domain '{splitLine[i]}'")
+    return currentPackage
+
+def parseMemory(value: str) -> float | None:
+    value = value.strip()
+    return float(value[:-2]) if value.endswith("MB") else None # "-": sem /proc nem getrusage
+
+def parseTagValue(value: str) -> str | None:
+    return None if value == "-" else value # fora do slurm
+
+def parseRecordValue(value: str) -> float | None:
+    number = float(value)
+    return None if number != number else number # nan: dominio (ou pico de RSS) indisponivel
+
+def parseRecordPackages(fields: list[str]) -> list[PackageMeasure]:
+    packages: list[PackageMeasure] = []
+    for i in range(int(fields[RECORD_PACKAGES])):
+        start = RECORD_FIXED_COLUMNS + i * RECORD_PACKAGE_COLUMNS
+        currentPackage = PackageMeasure()
+        currentPackage.pkgNumber = int(fields[start])
+        currentPackage.pkg = float(fields[start + 1])
+        currentPackage.pp0 = parseRecordValue(fields[start + 2])
+        currentPackage.pp1 = parseRecordValue(fields[start + 3])
+        currentPackage.dram = parseRecordValue(fields[start + 4])
+        packages.append(currentPackage)
+    return packages
+
+def parseRecordHost(line: str, result: Result):
+    # # host NOME job ID tarefa ID
+    splitLine = line.split()
+    result.host, result.job, result.task = splitLine[2], parseTagValue(splitLine[4]), parseTagValue(splitLine[6])
+
+class RecordParser:
+    # mesma interface do MeasureParser, para os registros CSV (uma linha por medicao)
+    def __init__(self, result: Result | None = None) -> None:
+        self.result: Result = result if result is not None else Result()
+        # "# phase,ESTAGIO,RSS,<linha>": as fases vem antes da linha do kernel a que pertencem
+        self.pendingPhases: dict[str, PhaseMeasure] = {}
+        self.pendingPeakRss: float | None = None
+
+    def feedPhase(self, line: str):
+        splitLine = line.split(",", 3)
+        fields = splitLine[3].split(",")
+        stage = int(splitLine[1])
+        if stage == PHASE_EXECUTE: # mesma linha do kernel, so o pico de RSS e novo
+            self.pendingPeakRss = parseRecordValue(splitLine[2])
+            return
+        phase = PhaseMeasure()
+        phase.time = float(fields[RECORD_TIME])
+        phase.threads = int(fields[RECORD_THREADS])
+        phase.peakRss = parseRecordValue(splitLine[2])
+        phase.packages = parseRecordPackages(fields)
+        self.pendingPhases[PHASE_NAMES[stage]] = phase
+
+    def feed(self, line: str) -> Measure | None:
+        if line.startswith("# phase,"):
+            self.feedPhase(line)
+            return None
+        if line.startswith("# host "):
+            parseRecordHost(line, self.result)
+            return None
+        if line.startswith("#") or line.strip() == "":
+            return None
+        fields = line.split(",")
+        self.result.variant = KERNEL_VARIANTS[int(fields[RECORD_VARIANT])]
+        self.result.threads = int(fields[RECORD_THREADS])
+        self.result.arraySize = int(fields[RECORD_SIZE])
+        self.result.iterations = int(fields[RECORD_ITERATIONS])
+        measure = Measure()
+        measure.type = int(fields[RECORD_TYPE])
+        measure.variant = self.result.variant
+        measure.host = self.result.host
+        measure.executionTime = float(fields[RECORD_TIME])
+        measure.packages = parseRecordPackages(fields)
+        if measure.type != MeasureType.IDLE:
+            measure.phases, measure.peakRss = self.pendingPhases, self.pendingPeakRss
+            self.pendingPhases, self.pendingPeakRss = {}, None
+        return measure
+
+def isRecordFile(filePath: str) -> bool:
+    return pathlib.Path(filePath).suffix == RECORD_EXTENSION
+
+def isRecordLog(filePath: str) -> bool:
+    # CSV gravado pelo tccgreen -d, e nao outro CSV na mesma pasta (ex.: o export das metricas)
+    with openLog(filePath) as file:
+        return file.readline().startswith(RECORD_HEADER)
+
+def getParser(filePath: str, result: Result | None = None) -> MeasureParser | RecordParser:
+    return RecordParser(result) if isRecordFile(filePath) else MeasureParser(result)
+
+def streamMeasures(file: Iterable[str], result: Result | None = None, parser: MeasureParser | RecordParser | None = None) -> Iterator[Measure]:
+    # gera uma medicao por vez, sem carregar o arquivo inteiro em memoria
+    if parser is None:
+        parser = MeasureParser(result)
+    for line in file:
+        measure = parser.feed(line)
+        if measure is not None:
+            yield measure
+
+def openLog(filePath: str) -> TextIO:
+    return open(filePath, "r", encoding=LOG_ENCODING, errors=LOG_ERRORS)
+
+def loadRecords(filePath: str) -> np.ndarray:
+    # le o CSV inteiro de uma vez; colunas de pacotes ausentes ficam nan
+    try:
+        return np.loadtxt(filePath, delimiter=",", comments="#", ndmin=2)
+    except ValueError:
+        pass # sessoes com quantidades de pacotes diferentes ou ultima linha incompleta
+    rows: list[list[float]] = []
+    with openLog(filePath) as file:
+        for line in file:
+            if line.endswith("\n") and not line.startswith("#") and line.strip() != "":
+                rows.append([float(value) for value in line.split(",")])
+    table = np.full((len(rows), max((len(row) for row in rows), default=RECORD_FIXED_COLUMNS)), np.nan)
+    for i, row in enumerate(rows):
+        table[i, :len(row)] = row
+    return table
+
+def loadPhaseRecords(filePath: str, result: Result | None = None) -> np.ndarray:
+    # linhas "# phase" do CSV (ignoradas pelo loadRecords): estagio, pico de RSS e as colunas de um registro
+    # na mesma passada, a ultima linha "# host" vai para o result, como no RecordParser
+    rows: list[list[float]] = []
+    with openLog(filePath) as file:
+        for line in file:
+            if line.startswith("# phase,") and line.endswith("\n"):
+                rows.append([float(value) for value in line.split(",")[1:]])
+            elif line.startswith("# host ") and result is not None:
+                parseRecordHost(line, result)
+    table = np.full((len(rows), max((len(row) for row in rows), default=2 + RECORD_FIXED_COLUMNS)), np.nan)
+    for i, row in enumerate(rows):
+        table[i, :len(row)] = row
+    return table
+
+def analyzeFile(filePath: str) -> Result:
     result = Result()
-    result.fileName = pathlib.Path(file.name).stem
-    result.threads = usedThreads
-    result.iterations = iterationCount
-    result.arraySize = arrSize
-    result.measures = allMeasures
-    return result
\ No newline at end of file
+    result.fileName = pathlib.Path(filePath).stem
+    with openLog(filePath) as file:
+        result.measures = list(streamMeasures(file, result, getParser(filePath, result)))
+    return result
+
+def copyHeader(source: Result, target: Result):
+    # tudo menos a variante e as medicoes
+    target.fileName, target.threads, target.iterations, target.arraySize = source.fileName, source.threads, source.iterations, source.arraySize
+    target.bandwidth, target.peakFlops = source.bandwidth, source.peakFlops
+    target.host, target.job, target.task = source.host, source.job, source.task
+
+def groupByVariant(result: Result) -> list[Result]:
+    # um Result por variante, na ordem em que aparecem no log, com o mesmo cabecalho do arquivo
+    variantResults: dict[str, Result] = {}
+    for measure in result.measures:
+        if measure.variant not in variantResults:
+            variantResult = Result()
+            copyHeader(result, variantResult)
+            variantResult.variant = measure.variant
+            variantResults[measure.variant] = variantResult
+        variantResults[measure.variant].measures.append(measure)
+    return list(variantResults.values()) if len(variantResults) > 0 else [result]
+
+def analyzeFileVariants(filePath: str) -> list[Result]:
+    return groupByVariant(analyzeFile(filePath))
@@ -0,0 +1,275 @@
+import argparse
+import json
+import math
+import os
+import pathlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import numpy as np
+from measure import MeasureType, Result, getMeasureTypeName, getOptimizationLevel, getParser, openLog, streamMeasures
+from ingest import findLogs
+
+SKETCH_ACCURACY = 0.01 # erro relativo dos quantis do sketch
+SUMMARY_VERSION = 1
+SUMMARY_EXTENSION = ".json"
+SUMMARY_METRICS = ["time", "energy"]
+
+class QuantileSketch:
+    # histograma em escala logaritmica (como o DDSketch): quantis com erro relativo limitado,
+    # e juntar dois sketches e somar as contagens, entao a ordem do merge nao importa
+    def __init__(self, relativeAccuracy: float = SKETCH_ACCURACY) -> None:
+        self.relativeAccuracy: float = relativeAccuracy
+        self.gamma: float = (1 + relativeAccuracy) / (1 - relativeAccuracy)
+        self.positive: dict[int, int] = {}
+        self.negative: dict[int, int] = {} # energia dinamica pode ser negativa
+        self.zeros: int = 0
+
+    def __bucket(self, value: float) -> int:
+        return math.ceil(math.log(value) / math.log(self.gamma))
+
+    def __value(self, bucket: int) -> float:
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+    def add(self, value: float):
+        if value > 0:
+            bucket = self.__bucket(value)
+            self.positive[bucket] = self.positive.get(bucket, 0) + 1
+        elif value < 0:
+            bucket = self.__bucket(-value)
+            self.negative[bucket] = self.negative.get(bucket, 0) + 1
+        else:
+            self.zeros += 1
+
+    def merge(self, other: "QuantileSketch"):
+        if other.relativeAccuracy != self.relativeAccuracy:
+            raise ValueError(f"Can't merge sketches with accuracy {self.relativeAccuracy} and {other.relativeAccuracy}")
+        for bucket, count in other.positive.items():
+            self.positive[bucket] = self.positive.get(bucket, 0) + count
+        for bucket, count in other.negative.items():
+            self.negative[bucket] = self.negative.get(bucket, 0) + count
+        self.zeros += other.zeros
+
+    def count(self) -> int:
+        return sum(self.positive.values()) + sum(self.negative.values()) + self.zeros
+
+    def quantile(self, q: float) -> float:
+        count = self.count()
+        if count == 0:
+            return math.nan
+        rank = q * (count - 1)
+        seen = 0
+        for bucket in sorted(self.negative, reverse=True): # do mais negativo para o zero
+            seen += self.negative[bucket]
+            if seen > rank:
+                return -self.__value(bucket)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return self.__value(bucket)
+        return self.__value(max(self.positive))
+
+    def toDict(self) -> dict:
+        return {"accuracy": self.relativeAccuracy, "positive": self.positive, "negative": self.negative, "zeros": self.zeros}
+
+    @staticmethod
+    def fromDict(data: dict) -> "QuantileSketch":
+        sketch = QuantileSketch(data["accuracy"])
+        sketch.positive = {int(bucket): count for bucket, count in data["positive"].items()}
+        sketch.negative = {int(bucket): count for bucket, count in data["negative"].items()}
+        sketch.zeros = data["zeros"]
+        return sketch
+
+class RunningSummary:
+    # contagem, media, M2 (soma dos quadrados dos desvios), min e max: juntar dois resumos da o mesmo resultado de
+    # calcular sobre a uniao dos valores (Chan et al.), em qualquer ordem
+    def __init__(self, sketch: bool = True) -> None:
+        self.count: int = 0
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+        self.min: float = math.inf
+        self.max: float = -math.inf
+        self.sketch: QuantileSketch | None = QuantileSketch() if sketch else None
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min, self.max = min(self.min, value), max(self.max, value)
+        if self.sketch is not None:
+            self.sketch.add(value)
+
+    def merge(self, other: "RunningSummary"):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        if self.sketch is not None and other.sketch is not None:
+            self.sketch.merge(other.sketch)
+        else:
+            self.sketch = None # um lado sem sketch: os quantis deixam de ser exatos para a uniao
+
+    def stdDev(self) -> float:
+        # desvio padrao populacional, como o AverageValues
+        return math.sqrt(self.m2 / self.count) if self.count > 0 else math.nan
+
+    def confidenceInterval95(self) -> float:
+        return 1.96 * self.stdDev() / math.sqrt(self.count) if self.count > 0 else math.nan
+
+    def quantile(self, q: float) -> float:
+        return self.sketch.quantile(q) if self.sketch is not None else math.nan
+
+    def toDict(self) -> dict:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.min, "max": self.max,
+                "sketch": self.sketch.toDict() if self.sketch is not None else None}
+
+    @staticmethod
+    def fromDict(data: dict) -> "RunningSummary":
+        summary = RunningSummary(sketch=False)
+        summary.count, summary.mean, summary.m2, summary.min, summary.max = data["count"], data["mean"], data["m2"], data["min"], data["max"]
+        summary.sketch = QuantileSketch.fromDict(data["sketch"]) if data["sketch"] is not None else None
+        return summary
+
+# algoritmo, otimizacao, variante, threads, tamanho, iteracoes
+SummaryKey = tuple[int, str, str, int, int, int]
+
+class ConfigurationSummary:
+    def __init__(self, sketch: bool = True) -> None:
+        self.metrics: dict[str, RunningSummary] = {metric: RunningSummary(sketch) for metric in SUMMARY_METRICS}
+        self.hosts: dict[str, dict[str, RunningSummary]] = {} # mesmas metricas separadas por no
+        self.jobs: set[str] = set() # job/tarefa do slurm que contribuiram
+
+    def add(self, values: dict[str, float], host: str | None, sketch: bool = True):
+        hostSummary = self.hosts.setdefault(host or "-", {metric: RunningSummary(sketch) for metric in SUMMARY_METRICS})
+        for metric, value in values.items():
+            self.metrics[metric].add(value)
+            hostSummary[metric].add(value)
+
+    def merge(self, other: "ConfigurationSummary"):
+        for metric in SUMMARY_METRICS:
+            self.metrics[metric].merge(other.metrics[metric])
+        for host, otherHost in other.hosts.items():
+            if host not in self.hosts:
+                self.hosts[host] = {metric: RunningSummary(sketch=False) for metric in SUMMARY_METRICS}
+                for metric in SUMMARY_METRICS:
+                    self.hosts[host][metric].sketch = QuantileSketch() if otherHost[metric].sketch is not None else None
+            for metric in SUMMARY_METRICS:
+                self.hosts[host][metric].merge(otherHost[metric])
+        self.jobs |= other.jobs
+
+    def hostSpread(self, metric: str) -> float:
+        # variacao entre nos: desvio padrao das medias de cada no relativo a media geral
+        means = np.array([host[metric].mean for host in self.hosts.values() if host[metric].count > 0])
+        return float(means.std() / self.metrics[metric].mean) if len(means) > 1 and self.metrics[metric].mean != 0 else math.nan
+
+    def toDict(self) -> dict:
+        return {"metrics": {metric: summary.toDict() for metric, summary in self.metrics.items()},
+                "hosts": {host: {metric: summary.toDict() for metric, summary in metrics.items()} for host, metrics in self.hosts.items()},
+                "jobs": sorted(self.jobs)}
+
+    @staticmethod
+    def fromDict(data: dict) -> "ConfigurationSummary":
+        configuration = ConfigurationSummary(sketch=False)
+        configuration.metrics = {metric: RunningSummary.fromDict(summary) for metric, summary in data["metrics"].items()}
+        configuration.hosts = {host: {metric: RunningSummary.fromDict(summary) for metric, summary in metrics.items()} for host, metrics in data["hosts"].items()}
+        configuration.jobs = set(data["jobs"])
+        return configuration
+
+def summarizeFile(filePath: str, sketch: bool = True) -> dict[SummaryKey, ConfigurationSummary]:
+    # uma passada pelo log, sem guardar as medicoes; o cabecalho e lido no momento de cada medicao
+    summaries: dict[SummaryKey, ConfigurationSummary] = {}
+    optimization = getOptimizationLevel(pathlib.Path(filePath).stem)
+    result = Result()
+    with openLog(filePath) as file:
+        for measure in streamMeasures(file, result, getParser(filePath, result)):
+            if measure.type == MeasureType.IDLE:
+                continue
+            key = (int(measure.type), optimization, measure.variant, result.threads, result.arraySize, result.iterations)
+            if key not in summaries:
+                summaries[key] = ConfigurationSummary(sketch)
+            summaries[key].add({"time": measure.executionTime, "energy": sum(package.pkg for package in measure.packages)}, measure.host, sketch)
+            if result.job is not None:
+                summaries[key].jobs.add(f"{result.job}/{result.task or '-'}")
+    return summaries
+
+def mergeSummaries(target: dict[SummaryKey, ConfigurationSummary], other: dict[SummaryKey, ConfigurationSummary]) -> dict[SummaryKey, ConfigurationSummary]:
+    for key, configuration in other.items():
+        if key in target:
+            target[key].merge(configuration)
+        else:
+            target[key] = configuration
+    return target
+
+def saveSummaries(summaries: dict[SummaryKey, ConfigurationSummary], filePath: str):
+    data = {"version": SUMMARY_VERSION, "configurations": [{"key": list(key), "summary": configuration.toDict()} for key, configuration in sorted(summaries.items())]}
+    with open(filePath, "w") as file:
+        json.dump(data, file)
+
+def loadSummaries(filePath: str) -> dict[SummaryKey, ConfigurationSummary]:
+    with open(filePath) as file:
+        data = json.load(file)
+    if data.get("version") != SUMMARY_VERSION:
+        raise ValueError(f"Unsupported summary version {data.get('version')} in '{filePath}'")
+    return {tuple(entry["key"]): ConfigurationSummary.fromDict(entry["summary"]) for entry in data["configurations"]}
+
+def summarizeTree(roots: list[str], workers: int | None = None, sketch: bool = True) -> dict[SummaryKey, ConfigurationSummary]:
+    # logs resumidos em paralelo e resumos parciais (.json de outros nos) juntados no fim, na ordem em que chegam
+    partials = [root for root in roots if root.endswith(SUMMARY_EXTENSION)]
+    filePaths = [filePath for root in roots if not root.endswith(SUMMARY_EXTENSION) for filePath in findLogs(root)]
+    summaries: dict[SummaryKey, ConfigurationSummary] = {}
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(filePaths))
+    if workers <= 1:
+        for filePath in filePaths:
+            mergeSummaries(summaries, summarizeFile(filePath, sketch))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for fileSummaries in executor.map(summarizeFile, filePaths, repeat(sketch)):
+                mergeSummaries(summaries, fileSummaries)
+    for partial in partials:
+        mergeSummaries(summaries, loadSummaries(partial))
+    return summaries
+
+def getSummaryKeyName(key: SummaryKey) -> str:
+    measureType, optimization, variant, threads, arraySize, iterations = key
+    return f"{getMeasureTypeName(measureType)} {optimization} {variant} {threads}T {arraySize}x{arraySize} {iterations}it"
+
+def showSummaries(summaries: dict[SummaryKey, ConfigurationSummary]):
+    for key, configuration in sorted(summaries.items()):
+        print(f"{getSummaryKeyName(key)} ({len(configuration.hosts)} host(s){', ' + str(len(configuration.jobs)) + ' task(s)' if configuration.jobs else ''}):")
+        for metric, unit in [("time", "s"), ("energy", "J")]:
+            summary = configuration.metrics[metric]
+            spread = configuration.hostSpread(metric)
+            print(f"┣━━ {metric.capitalize()}: {summary.mean:.6g}{unit} ± {summary.confidenceInterval95():.3g} (n={summary.count}, min {summary.min:.6g}, max {summary.max:.6g}, "
+                  f"p50 {summary.quantile(0.5):.6g}, p95 {summary.quantile(0.95):.6g})" + (f", host spread {spread:.2%}" if not math.isnan(spread) else ""))
+        hosts = sorted(configuration.hosts.items())
+        for i, (host, metrics) in enumerate(hosts):
+            prefix = "┗━━" if i == len(hosts) - 1 else "┣━━"
+            time, energy = metrics["time"], metrics["energy"]
+            print(f"{prefix} {host}: n={time.count}, {time.mean:.6g}s ± {time.stdDev():.3g}, {energy.mean:.6g}J ± {energy.stdDev():.3g}")
+        print()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mergeable per-configuration summaries: summarize each node's logs, then reduce the partial .json files in any order")
+    parser.add_argument("roots", nargs="+", help="results folders, logs or partial summaries (.json)")
+    parser.add_argument("-o", "--output", default=None, help="save the merged summary as JSON (partial for a later reduce)")
+    parser.add_argument("--no-sketch", action="store_true", help="skip the quantile sketches (smaller files, no p50/p95)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print the summaries")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    summaries = summarizeTree(args.roots, args.jobs, not args.no_sketch)
+    if not args.quiet:
+        showSummaries(summaries)
+    if args.output is not None:
+        saveSummaries(summaries, args.output)
+        print(f"{len(summaries)} configuration(s) saved to {args.output}", file=sys.stderr)
@@ -0,0 +1,173 @@
+import argparse
+import csv
+import sys
+from typing import Callable
+import numpy as np
+from measure import getMeasureTypeBytes, getMeasureTypeFlops, getMeasureTypeName, getResultLabel
+from average import IDLE_SECONDS, OUTLIER_METHODS, AverageValues, PackageAverage, PhaseAverage, ResultAverage
+from ingest import ingestTree
+
+class ResultTable:
+    # uma linha por ResultAverage, uma coluna numpy por grandeza; as metricas sao funcoes vetorizadas sobre as colunas
+    def __init__(self, calculatedAvgs: list[ResultAverage]) -> None:
+        self.averages: list[ResultAverage] = calculatedAvgs
+        self.names: list[str] = [getMeasureTypeName(calcAvg.measureType) for calcAvg in calculatedAvgs]
+        self.labels: list[str] = [getResultLabel(calcAvg.baseResult) for calcAvg in calculatedAvgs]
+        self.measureType = np.array([calcAvg.measureType if calcAvg.measureType is not None else -1 for calcAvg in calculatedAvgs], dtype=int)
+        self.threads = np.array([calcAvg.baseResult.threads for calcAvg in calculatedAvgs], dtype=int)
+        self.arraySize = np.array([calcAvg.baseResult.arraySize for calcAvg in calculatedAvgs], dtype=float)
+        self.iterations = np.array([calcAvg.baseResult.iterations for calcAvg in calculatedAvgs], dtype=float)
+        self.time = self.__column(calcAvg.executionTimeAverage for calcAvg in calculatedAvgs)
+        self.timeStdDev = self.__column((calcAvg.executionTimeAverage for calcAvg in calculatedAvgs), "stdDev")
+        self.energy = self.__column(calcAvg.allPackageAverage.pkg for calcAvg in calculatedAvgs)
+        self.energyStdDev = self.__column((calcAvg.allPackageAverage.pkg for calcAvg in calculatedAvgs), "stdDev")
+        self.dram = self.__column(calcAvg.allPackageAverage.dram for calcAvg in calculatedAvgs)
+        self.dramShare = np.array([self.__dramShare(calcAvg.allPackageAverage) for calcAvg in calculatedAvgs], dtype=float)
+        # o idle e medido por pacote; a potencia ociosa da maquina soma todos os pacotes
+        self.idlePower = self.__column(calcAvg.idleAverage.pkg for calcAvg in calculatedAvgs) * np.array([max(len(calcAvg.packageAverages), 1) for calcAvg in calculatedAvgs]) / IDLE_SECONDS
+        # energia acima do idle pareado de cada repeticao; sem idle ao redor, estima pela media de todos os idles do log
+        dynamic = [calcAvg.dynamicAllPackageAverage for calcAvg in calculatedAvgs]
+        self.dynamicEnergy = self.__column(pkgAvg.pkg if pkgAvg is not None else None for pkgAvg in dynamic)
+        self.dynamicEnergy = np.where(np.isnan(self.dynamicEnergy), self.energy - self.idlePower * self.time, self.dynamicEnergy)
+        self.dynamicEnergyStdDev = self.__column((pkgAvg.pkg if pkgAvg is not None else None for pkgAvg in dynamic), "stdDev")
+        self.dynamicDram = self.__column(pkgAvg.dram if pkgAvg is not None else None for pkgAvg in dynamic)
+        # preparo e limpeza (linhas Phase); NaN nos logs antigos, que so mediam o kernel
+        self.initTime = self.__phaseColumn(calculatedAvgs, "init", lambda phaseAvg: phaseAvg.time)
+        self.initEnergy = self.__phaseColumn(calculatedAvgs, "init", lambda phaseAvg: phaseAvg.energy.pkg)
+        self.initThreads = np.array([calcAvg.phaseAverages["init"].threads if "init" in calcAvg.phaseAverages else -1 for calcAvg in calculatedAvgs], dtype=int)
+        self.initPeakRss = self.__phaseColumn(calculatedAvgs, "init", lambda phaseAvg: phaseAvg.peakRss)
+        self.cleanTime = self.__phaseColumn(calculatedAvgs, "clean", lambda phaseAvg: phaseAvg.time)
+        self.cleanEnergy = self.__phaseColumn(calculatedAvgs, "clean", lambda phaseAvg: phaseAvg.energy.pkg)
+        self.peakRss = self.__column(calcAvg.peakRssAverage for calcAvg in calculatedAvgs)
+        # o job de ponta a ponta: o que o usuario paga, nao so o kernel
+        self.jobTime = self.initTime + self.time + self.cleanTime
+        self.jobEnergy = self.initEnergy + self.energy + self.cleanEnergy
+        self.flops = np.array([getMeasureTypeFlops(calcAvg.measureType, calcAvg.baseResult.arraySize, calcAvg.baseResult.iterations) if calcAvg.measureType is not None else np.nan
+                               for calcAvg in calculatedAvgs], dtype=float)
+        self.bytes = np.array([getMeasureTypeBytes(calcAvg.measureType, calcAvg.baseResult.arraySize, calcAvg.baseResult.iterations) if calcAvg.measureType is not None else np.nan
+                               for calcAvg in calculatedAvgs], dtype=float)
+
+    @staticmethod
+    def __column(values, statistic: str = "avg") -> np.ndarray:
+        return np.array([getattr(value, statistic)() if value is not None else np.nan for value in values], dtype=float)
+
+    @staticmethod
+    def __dramShare(pkgAvg: PackageAverage) -> float:
+        # so as repeticoes com o pacote e a DRAM validos: uma leitura rejeitada tira a repeticao dos dois lados da razao
+        if pkgAvg.dram is None or pkgAvg.dram.count() != pkgAvg.pkg.count():
+            return np.nan
+        pkg, dram = pkgAvg.pkg.values(), pkgAvg.dram.values()
+        valid = ~np.isnan(pkg) & ~np.isnan(dram)
+        return float(100 * dram[valid].sum() / (pkg[valid] + dram[valid]).sum()) if valid.any() else np.nan
+
+    @staticmethod
+    def __phaseColumn(calculatedAvgs: list[ResultAverage], phase: str, values: Callable[[PhaseAverage], AverageValues | None]) -> np.ndarray:
+        return ResultTable.__column(values(calcAvg.phaseAverages[phase]) if phase in calcAvg.phaseAverages else None for calcAvg in calculatedAvgs)
+
+    def __len__(self) -> int:
+        return len(self.averages)
+
+class Metric:
+    def __init__(self, name: str, label: str, unit: str, suffix: str, value: Callable[[ResultTable], np.ndarray],
+                 error: Callable[[ResultTable], np.ndarray] | None = None) -> None:
+        self.name: str = name # nome digitado no result.py
+        self.label: str = label # eixo y dos graficos
+        self.unit: str = unit
+        self.suffix: str = suffix # <Algoritmo>_<Sufixo>.png no --render e coluna do CSV
+        self.value = value
+        self.error = error # barra de erro, quando a metrica tem desvio padrao proprio
+
+METRICS: dict[str, Metric] = {}
+
+def addMetric(metric: Metric):
+    METRICS[metric.name] = metric
+
+def getMetric(name: str) -> Metric | None:
+    return METRICS.get(name.lower())
+
+def getMetricNames() -> list[str]:
+    return list(METRICS)
+
+addMetric(Metric("energy", "Energia (J)", "J", "Energy", lambda table: table.energy, lambda table: table.energyStdDev))
+addMetric(Metric("time", "Tempo (s)", "s", "Time", lambda table: table.time, lambda table: table.timeStdDev))
+addMetric(Metric("j/s", "Energia por Tempo (J/s)", "W", "JpS", lambda table: table.energy / table.time))
+addMetric(Metric("mflops", "Megaflop por segundo (MFlop/s)", "MFlop/s", "MflopsRate", lambda table: table.flops / table.time / 1e6))
+addMetric(Metric("mflops/w", "Megaflop por Watt (MFlop/W)", "MFlop/W", "Mflops", lambda table: table.flops / 1e6 / table.energy))
+addMetric(Metric("edp", "Energia x Tempo (J*s)", "J*s", "EDP", lambda table: table.energy * table.time))
+addMetric(Metric("dram", "Parcela da DRAM na energia (%)", "%", "Dram", lambda table: table.dramShare))
+addMetric(Metric("intensity", "Intensidade aritmetica (FLOP/B)", "FLOP/B", "Intensity", lambda table: table.flops / table.bytes))
+addMetric(Metric("gb/s", "Banda de memoria (GB/s)", "GB/s", "Bandwidth", lambda table: table.bytes / table.time / 1e9))
+addMetric(Metric("dram/b", "Energia da DRAM por byte (nJ/B)", "nJ/B", "DramPerByte", lambda table: table.dram / table.bytes * 1e9))
+addMetric(Metric("dynamic", "Energia acima do idle (J)", "J", "Dynamic", lambda table: table.dynamicEnergy, lambda table: table.dynamicEnergyStdDev))
+addMetric(Metric("static", "Parcela ociosa na energia (%)", "%", "Static", lambda table: 100 * (table.energy - table.dynamicEnergy) / table.energy))
+addMetric(Metric("dynamic-mflops/w", "Megaflop por Watt acima do idle (MFlop/W)", "MFlop/W", "DynamicMflops", lambda table: table.flops / 1e6 / table.dynamicEnergy))
+addMetric(Metric("dynamic-edp", "Energia acima do idle x Tempo (J*s)", "J*s", "DynamicEDP", lambda table: table.dynamicEnergy * table.time))
+addMetric(Metric("dynamic-dram", "Energia da DRAM acima do idle (J)", "J", "DynamicDram", lambda table: table.dynamicDram))
+addMetric(Metric("init", "Energia do preparo (J)", "J", "InitEnergy", lambda table: table.initEnergy))
+addMetric(Metric("init-time", "Tempo do preparo (s)", "s", "InitTime", lambda table: table.initTime))
+addMetric(Metric("clean", "Energia da limpeza (J)", "J", "CleanEnergy", lambda table: table.cleanEnergy))
+addMetric(Metric("job", "Energia do job, preparo + kernel + limpeza (J)", "J", "JobEnergy", lambda table: table.jobEnergy))
+addMetric(Metric("job-time", "Tempo do job, preparo + kernel + limpeza (s)", "s", "JobTime", lambda table: table.jobTime))
+addMetric(Metric("setup", "Parcela do preparo e da limpeza na energia do job (%)", "%", "Setup", lambda table: 100 * (table.initEnergy + table.cleanEnergy) / table.jobEnergy))
+addMetric(Metric("job-mflops/w", "Megaflop por Watt do job (MFlop/W)", "MFlop/W", "JobMflops", lambda table: table.flops / 1e6 / table.jobEnergy))
+addMetric(Metric("peak-rss", "Pico de memoria residente na execucao (MB)", "MB", "PeakRss", lambda table: table.peakRss))
+
+def calculateMetric(metric: Metric, table: ResultTable) -> tuple[np.ndarray, np.ndarray | None]:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (metric.value(table), metric.error(table) if metric.error is not None else None)
+
+def groupByConfiguration(table: ResultTable) -> tuple[list[str], list[str], np.ndarray, np.ndarray]:
+    # categorias (algoritmo + threads) no eixo x e series (otimizacao/variante) nas barras, por indice de dict
+    categoryIndex: dict[tuple[int, int], int] = {}
+    categoryNames: list[str] = []
+    seriesIndex: dict[str, int] = {}
+    for i in range(len(table)):
+        key = (int(table.measureType[i]), int(table.threads[i]))
+        if key not in categoryIndex:
+            categoryIndex[key] = len(categoryNames)
+            categoryNames.append(f"{table.names[i]} {table.threads[i]}T")
+        seriesIndex.setdefault(table.labels[i], len(seriesIndex))
+    categories = np.array([categoryIndex[(int(table.measureType[i]), int(table.threads[i]))] for i in range(len(table))], dtype=int)
+    series = np.array([seriesIndex[label] for label in table.labels], dtype=int)
+    return (categoryNames, list(seriesIndex), categories, series)
+
+def hasDupes(table: ResultTable) -> bool:
+    # mais de um resultado com o mesmo algoritmo e threads: grafico agrupado por otimizacao
+    return len(set(zip(table.measureType.tolist(), table.threads.tolist()))) < len(table)
+
+def exportCsv(table: ResultTable, output, metrics: list[Metric] | None = None):
+    metrics = metrics if metrics is not None else list(METRICS.values())
+    columns = [calculateMetric(metric, table)[0] for metric in metrics]
+    writer = csv.writer(output)
+    writer.writerow(["file", "label", "algorithm", "variant", "threads", "size", "iterations", "runs"] + [f"{metric.suffix} ({metric.unit})" for metric in metrics])
+    for i, calcAvg in enumerate(table.averages):
+        result = calcAvg.baseResult
+        writer.writerow([result.fileName, table.labels[i], table.names[i], result.variant, result.threads, result.arraySize, result.iterations,
+                         calcAvg.executionTimeAverage.count()] + [f"{column[i]:.9g}" for column in columns])
+
+def addExportArguments(parser: argparse.ArgumentParser):
+    parser.add_argument("roots", nargs="+", help="results folders or logs")
+    parser.add_argument("-o", "--output", default=None, help="CSV file (default: standard output)")
+    parser.add_argument("-m", "--metrics", nargs="+", choices=getMetricNames(), default=None, help="metrics to export (default: all)")
+    parser.add_argument("-w", "--warmup", type=int, default=0, help="discard the first N repetitions of each log")
+    parser.add_argument("--outliers", choices=OUTLIER_METHODS, default=None, help="reject repetitions whose execution time is an outlier")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+
+def runExport(args: argparse.Namespace) -> int:
+    ingested = ingestTree(args.roots, args.jobs, warmup=args.warmup, outliers=args.outliers)
+    for ingestedFile in ingested:
+        if ingestedFile.error is not None:
+            print(f"Error in '{ingestedFile.path}': {ingestedFile.error}", file=sys.stderr)
+    table = ResultTable([ingestedFile.average for ingestedFile in ingested if ingestedFile.error is None and ingestedFile.average.measureType is not None])
+    metrics = [METRICS[name] for name in args.metrics] if args.metrics is not None else None
+    if args.output is None:
+        exportCsv(table, sys.stdout, metrics)
+    else:
+        with open(args.output, "w", newline="") as file:
+            exportCsv(table, file, metrics)
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export every registered metric of the results folders as CSV")
+    addExportArguments(parser)
+    sys.exit(runExport(parser.parse_args()))
@@ -0,0 +1,162 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from measure import MeasureType, getMeasureTypeName
+from average import ResultAverage
+from ingest import IngestedFile, findLogs, ingestFiles
+from metrics import METRICS, ResultTable, calculateMetric, getMetric, groupByConfiguration, hasDupes
+from roofline import MachineProfile, analyzeRoofline, findMachineProfile, plotRoofline
+
+def finishGraph(output: str | None):
+    import matplotlib.pyplot as plt
+    if output is None:
+        plt.show()
+    else:
+        plt.savefig(output)
+        plt.close("all")
+
+def showGraphSingle(graph: str, calculatedAvgs: ResultAverage, output: str | None = None) -> bool:
+    graph = graph.lower()
+    if graph == "jxs": # Energia (J) x Tempo (s) 
+        import matplotlib.pyplot as plt
+        valuesPkg = calculatedAvgs.allPackageAverage.pkg.values()
+        valuesTime = calculatedAvgs.executionTimeAverage.values()
+
+        for i in range(0, len(valuesPkg)):
+            plt.plot(valuesTime[i], valuesPkg[i], ".", label=f"Teste {i+1}")
+        
+        executionTimeAvg = calculatedAvgs.executionTimeAverage.avg()
+        allPackageAvg = calculatedAvgs.allPackageAverage.pkg.avg()
+        executionTimeStdDev = calculatedAvgs.executionTimeAverage.stdDev()
+        allPackageStdDev = calculatedAvgs.allPackageAverage.pkg.stdDev()
+        plt.plot(executionTimeAvg, allPackageAvg, "o", label="Média", color="black")
+        plt.errorbar(executionTimeAvg, allPackageAvg, xerr=executionTimeStdDev, yerr=allPackageStdDev)
+
+        plt.xlabel("Tempo de execução (s)")
+        plt.ylabel("Energia (J)")
+        plt.legend()
+        
+        finishGraph(output)
+        return True
+    return showGraphMultiple(graph, [calculatedAvgs], output) # metricas registradas, com uma barra so
+
+def showGraphMultiple(graph: str, calculatedAvgs: list[ResultAverage], output: str | None = None) -> bool:
+    metric = getMetric(graph)
+    if metric is None:
+        return False
+    import matplotlib.pyplot as plt # so quando um grafico e pedido de fato: o import custa mais que o resto da analise
+    params = {'legend.fontsize': 'x-large',
+          'figure.figsize': (15, 5),
+         'axes.labelsize': 'x-large',
+         'axes.titlesize':'x-large',
+         'xtick.labelsize':'x-large',
+         'ytick.labelsize':'x-large'}
+    plt.rcParams.update(params)
+    table = ResultTable(calculatedAvgs)
+    values, errors = calculateMetric(metric, table)
+    if hasDupes(table):
+        # uma barra por otimizacao/variante dentro de cada algoritmo + threads
+        categoryNames, seriesNames, categories, series = groupByConfiguration(table)
+        grid = np.zeros((len(seriesNames), len(categoryNames)))
+        grid[series, categories] = values
+
+        x = np.arange(len(categoryNames))  # the label locations
+        width = 1.0/(len(seriesNames)+1)  # the width of the bars
+
+        fig, ax = plt.subplots(layout='constrained')
+
+        for multiplier, (attribute, measurement) in enumerate(zip(seriesNames, grid)):
+            offset = width * multiplier
+            rects = ax.bar(x + offset, measurement, width, label=attribute)
+            ax.bar_label(rects, padding=5, fmt="{:,.02f}", rotation=90, fontsize="x-large")
+
+        ax.set_ylabel(metric.label)
+        ax.set_xticks(x + width * (len(seriesNames) - 1) / 2, categoryNames)
+        ax.legend()
+        ax.set_ylim(min(0, ax.get_ylim()[0]*1.2), ax.get_ylim()[1]*1.2) # metricas como dynamic podem ser negativas
+    else:
+        testNames = [f"{name} - {threads}T" for name, threads in zip(table.names, table.threads.tolist())]
+
+        fig, ax = plt.subplots()
+        bar_container = ax.bar(testNames, values)
+        if errors is not None:
+            ax.errorbar(testNames, values, yerr=errors, color="black", fmt=".")
+        ax.set_ylabel(metric.label)
+        ax.bar_label(bar_container, fmt="{:,.02f}", rotation=90, fontsize="x-large")
+        ax.set_ylim(min(0, ax.get_ylim()[0]*1.2), ax.get_ylim()[1]*1.2) # metricas como dynamic podem ser negativas
+    finishGraph(output)
+    return True
+
+# um grafico por metrica registrada em <pasta>/graphs/<Algoritmo>_<Sufixo>.png
+
+class RenderJob:
+    def __init__(self) -> None:
+        self.graph: str = ""
+        self.output: str = ""
+        self.calculatedAvgs: list[ResultAverage] = []
+        self.profile: MachineProfile | None = None # so no grafico roofline
+
+def renderJob(job: RenderJob) -> str:
+    if job.graph == "roofline":
+        plotRoofline(analyzeRoofline(job.calculatedAvgs, job.profile), job.profile, job.output)
+    else:
+        showGraphMultiple(job.graph, job.calculatedAvgs, job.output)
+    return job.output
+
+def planRender(folder: str, force: bool = False, workers: int | None = None) -> tuple[list[RenderJob], list[IngestedFile]]:
+    ingested = ingestFiles(findLogs(folder), workers)
+
+    byAlgorithm: dict[MeasureType, list[ResultAverage]] = {}
+    lastChange: dict[MeasureType, float] = {}
+    for ingestedFile in ingested:
+        if ingestedFile.error is None and ingestedFile.average.measureType is not None:
+            measureType = ingestedFile.average.measureType
+            byAlgorithm.setdefault(measureType, []).append(ingestedFile.average)
+            lastChange[measureType] = max(lastChange.get(measureType, 0.0), os.path.getmtime(ingestedFile.path))
+
+    profile = findMachineProfile(folder)
+    graphs = {graph: metric.suffix for graph, metric in METRICS.items()}
+    if profile.ridge() is not None:
+        graphs["roofline"] = "Roofline" # so com o perfil da maquina (tccgreen -p) em algum log da pasta
+    jobs: list[RenderJob] = []
+    for measureType, calculatedAvgs in sorted(byAlgorithm.items()):
+        calculatedAvgs.sort(key=lambda calcAvg: (calcAvg.baseResult.threads, calcAvg.baseResult.fileName))
+        table = ResultTable(calculatedAvgs)
+        for graph, suffix in graphs.items():
+            if graph in METRICS and np.isnan(calculateMetric(METRICS[graph], table)[0]).all():
+                continue # metrica sem dado nenhum nesses logs (ex.: fases nos logs anteriores a elas)
+            output = os.path.join(folder, "graphs", f"{getMeasureTypeName(measureType)}_{suffix}.png")
+            if not force and os.path.isfile(output) and os.path.getmtime(output) >= lastChange[measureType]:
+                continue # nenhum log mudou desde que o grafico foi gerado
+            job = RenderJob()
+            job.graph = graph
+            job.output = output
+            job.calculatedAvgs = calculatedAvgs
+            job.profile = profile
+            jobs.append(job)
+    return (jobs, [ingestedFile for ingestedFile in ingested if ingestedFile.error is not None])
+
+def renderGraphs(folders: list[str], force: bool = False, workers: int | None = None) -> int:
+    jobs: list[RenderJob] = []
+    errors = 0
+    for folder in folders:
+        folderJobs, failed = planRender(folder, force, workers)
+        for ingestedFile in failed:
+            print(f"Error in '{ingestedFile.path}': {ingestedFile.error}", file=sys.stderr)
+        errors += len(failed)
+        jobs.extend(folderJobs)
+        if len(folderJobs) > 0:
+            os.makedirs(os.path.join(folder, "graphs"), exist_ok=True)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if min(workers, len(jobs)) <= 1:
+        outputs = [renderJob(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outputs = list(executor.map(renderJob, jobs))
+    for output in outputs:
+        print(f"Rendered {output}")
+    print(f"{len(outputs)} graph(s) rendered")
+    return errors
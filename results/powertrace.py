@@ -0,0 +1,152 @@
+import argparse
+import os
+import numpy as np
+from measure import MeasureType, getMeasureTypeName
+
+# formato gravado por tccgreen -t (sampler.cpp); o nome evita conflito com o modulo trace da biblioteca padrao
+TRACE_MAGIC = b"TCCTRACE"
+TRACE_VERSION = 1
+TRACE_HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("packages", "<u4")])
+TRACE_DOMAINS = ["pkg", "pp0", "pp1", "dram"]
+TRACE_CHUNK = 1 << 20 # registros por bloco ao varrer o trace inteiro
+TRACE_NO_KERNEL = -1
+
+class TraceStage:
+    NONE = 0
+    INIT = 1
+    EXECUTE = 2
+    CLEAN = 3
+
+def getTraceStageName(stage: TraceStage) -> str:
+    match stage:
+        case TraceStage.NONE:
+            return "Wait"
+        case TraceStage.INIT:
+            return "Init"
+        case TraceStage.EXECUTE:
+            return "Execute"
+        case TraceStage.CLEAN:
+            return "Clean"
+        case _:
+            return "Unknown"
+
+class TracePhase:
+    def __init__(self) -> None:
+        self.measureType: MeasureType | None = None # None: entre kernels
+        self.stage: TraceStage = TraceStage.NONE
+        self.samples: int = 0
+        self.duration: float = 0.0
+        self.energy: float = 0.0
+        self.percentiles: dict[float, float] = {}
+
+    def avgPower(self) -> float:
+        return self.energy / self.duration if self.duration > 0 else float("nan")
+
+def getTraceDtype(packages: int) -> np.dtype:
+    return np.dtype([("time", "<f8"), ("kind", "<i4"), ("stage", "<i4"), ("energy", "<f8", (packages, len(TRACE_DOMAINS)))])
+
+def openTrace(filePath: str) -> np.ndarray:
+    # mapeia o arquivo sem ler: so as fatias acessadas sao carregadas
+    header = np.fromfile(filePath, dtype=TRACE_HEADER, count=1)
+    if len(header) == 0 or header["magic"][0] != TRACE_MAGIC:
+        raise ValueError(f"'{filePath}' is not a tccgreen trace")
+    if header["version"][0] != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version {header['version'][0]} in '{filePath}'")
+    dtype = getTraceDtype(int(header["packages"][0]))
+    # um registro incompleto no fim (harness ainda gravando) fica de fora
+    count = (os.path.getsize(filePath) - TRACE_HEADER.itemsize) // dtype.itemsize
+    if count <= 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(filePath, dtype=dtype, mode="r", offset=TRACE_HEADER.itemsize, shape=(count,))
+
+def traceEnergy(records: np.ndarray, domain: str = "pkg", package: int | None = None) -> np.ndarray:
+    # energia acumulada (J); package=None soma todos os pacotes
+    energy = records["energy"][:, :, TRACE_DOMAINS.index(domain)]
+    if package is not None:
+        return energy[:, package]
+    return np.where(np.isnan(energy).all(axis=1), np.nan, np.nansum(energy, axis=1))
+
+def tracePower(trace: np.ndarray, domain: str = "pkg", package: int | None = None, maxPoints: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    # potencia media entre amostras consecutivas; com maxPoints le so maxPoints+1 registros espalhados,
+    # e como a energia e acumulada a media de cada janela continua exata
+    if maxPoints is not None and len(trace) > maxPoints + 1:
+        records = trace[np.unique(np.linspace(0, len(trace) - 1, maxPoints + 1).astype(np.int64))]
+    else:
+        records = trace[:]
+    energy = traceEnergy(records, domain, package)
+    return (records["time"][1:], np.diff(energy) / np.diff(records["time"]))
+
+def summarizeTrace(trace: np.ndarray, domain: str = "pkg", package: int | None = None, percentiles: list[float] = [50, 90, 99]) -> list[TracePhase]:
+    # cada intervalo pertence a fase gravada na amostra que o fecha; percorre o trace em blocos
+    powers: dict[tuple[int, int], list[np.ndarray]] = {}
+    phases: dict[tuple[int, int], TracePhase] = {}
+    for start in range(0, max(len(trace) - 1, 0), TRACE_CHUNK):
+        block = trace[start:start + TRACE_CHUNK + 1]
+        durations = np.diff(block["time"])
+        energies = np.diff(traceEnergy(block, domain, package))
+        keys = np.stack([block["kind"][1:], block["stage"][1:]], axis=1)
+        for kind, stage in np.unique(keys, axis=0):
+            mask = (keys[:, 0] == kind) & (keys[:, 1] == stage)
+            key = (int(kind), int(stage))
+            if key not in phases:
+                phase = TracePhase()
+                phase.measureType = None if kind == TRACE_NO_KERNEL else int(kind)
+                phase.stage = int(stage)
+                phases[key] = phase
+            phase = phases[key]
+            phase.samples += int(mask.sum())
+            phase.duration += float(durations[mask].sum())
+            phase.energy += float(np.nansum(energies[mask]))
+            powers.setdefault(key, []).append((energies[mask] / durations[mask]).astype(np.float32))
+
+    for key, phase in phases.items():
+        values = np.concatenate(powers[key])
+        values = values[np.isfinite(values)]
+        if len(values) > 0:
+            phase.percentiles = dict(zip(percentiles, (float(v) for v in np.percentile(values, percentiles))))
+    return [phases[key] for key in sorted(phases)]
+
+def plotTrace(trace: np.ndarray, output: str | None = None, domain: str = "pkg", package: int | None = None, maxPoints: int = 5000):
+    import matplotlib.pyplot as plt # so quem plota precisa do matplotlib
+
+    times, power = tracePower(trace, domain, package, maxPoints)
+    plt.figure(figsize=(12, 5))
+    plt.plot(times, power, linewidth=0.8)
+    # destaca os trechos de execucao dos kernels (na resolucao do grafico)
+    step = max(1, len(trace) // maxPoints)
+    marks = trace[::step]
+    executing = (marks["stage"] == TraceStage.EXECUTE) & (marks["kind"] > MeasureType.IDLE)
+    edges = np.flatnonzero(np.diff(np.concatenate([[False], executing, [False]]).astype(np.int8)))
+    for begin, end in zip(edges[::2], edges[1::2]):
+        plt.axvspan(marks["time"][begin], marks["time"][end - 1], color="orange", alpha=0.2)
+    label = "all packages" if package is None else f"package {package}"
+    plt.title(f"{domain.upper()} power ({label})")
+    plt.xlabel("Time (s)")
+    plt.ylabel("Power (W)")
+    if output is not None:
+        plt.savefig(output)
+        plt.close()
+    else:
+        plt.show()
+
+def showTraceSummary(phases: list[TracePhase], domain: str):
+    for phase in phases:
+        name = getMeasureTypeName(phase.measureType) if phase.measureType is not None else "Between kernels"
+        percentiles = ", ".join(f"p{p:g}={v:.2f}W" for p, v in phase.percentiles.items())
+        print(f"{name:<15} {getTraceStageName(phase.stage):<7} {phase.duration:>10.3f}s {phase.energy:>12.3f}J "
+              f"avg={phase.avgPower():.2f}W {percentiles} ({phase.samples} samples, {domain})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Power over time from a tccgreen -t trace")
+    parser.add_argument("trace")
+    parser.add_argument("-d", "--domain", choices=TRACE_DOMAINS, default="pkg")
+    parser.add_argument("-p", "--package", type=int, default=None, help="single package (default: sum of all)")
+    parser.add_argument("--percentiles", nargs="+", type=float, default=[50, 90, 99])
+    parser.add_argument("--plot", nargs="?", const="", default=None, metavar="PNG", help="plot power over time (to PNG if given)")
+    args = parser.parse_args()
+
+    trace = openTrace(args.trace)
+    print(f"{len(trace)} samples, {trace['time'][-1] if len(trace) > 0 else 0:.3f}s, {trace.dtype['energy'].shape[0]} package(s)")
+    showTraceSummary(summarizeTrace(trace, args.domain, args.package, args.percentiles), args.domain)
+    if args.plot is not None:
+        plotTrace(trace, args.plot if args.plot != "" else None, args.domain, args.package)
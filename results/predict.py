@@ -0,0 +1,229 @@
+import argparse
+import math
+import sys
+import numpy as np
+from measure import DEFAULT_VARIANT, KERNEL_VARIANTS, MeasureType, getMeasureTypeBytes, getMeasureTypeByName, getMeasureTypeFlops, getMeasureTypeName, getOptimizationLevel
+from average import OUTLIER_METHODS, ResultAverage
+from ingest import IngestedFile, ingestTree
+from metrics import ResultTable
+
+# unidade e trabalho analitico (coluna do ResultTable) que move cada grandeza
+PREDICT_TARGETS = {"time": ("s", "flops"), "energy": ("J", "flops"), "dram": ("J", "bytes")}
+WORK_FUNCTIONS = {"flops": getMeasureTypeFlops, "bytes": getMeasureTypeBytes}
+DEFAULT_TOLERANCE = 0.05 # meia largura relativa do intervalo de predicao aceita para pular uma configuracao
+# quantil 97.5% da t de Student para 1..30 graus de liberdade; acima disso, 1.96
+T_QUANTILES = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+               2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+# maquina, algoritmo, otimizacao, variante
+ModelKey = tuple[str, MeasureType, str, str]
+
+def getTQuantile(degreesOfFreedom: int) -> float:
+    return T_QUANTILES[degreesOfFreedom - 1] if degreesOfFreedom <= len(T_QUANTILES) else 1.96
+
+def getFeatures(work: np.ndarray, threads: np.ndarray) -> np.ndarray:
+    # log(y) = b0 + b1 log(trabalho) + b2 log(p) + b3 log(p)^2: o termo quadratico captura a saturacao da banda
+    # (e o aumento da potencia) com muitas threads, que uma lei de potencia pura nao acompanha
+    logThreads = np.log(np.asarray(threads, dtype=float))
+    return np.column_stack([np.ones(len(logThreads)), np.log(np.asarray(work, dtype=float)), logThreads, logThreads ** 2])
+
+class Prediction:
+    def __init__(self) -> None:
+        self.value: float = math.nan
+        self.low: float = math.nan # intervalo de predicao de 95%
+        self.high: float = math.nan
+
+    def relativeError(self) -> float:
+        return (self.high - self.low) / 2 / self.value
+
+class TargetFit:
+    # minimos quadrados em escala log: o erro do modelo e relativo, como o ruido das medicoes
+    def __init__(self) -> None:
+        self.coefficients: np.ndarray = np.zeros(0)
+        self.covariance: np.ndarray = np.zeros((0, 0)) # (X'X)^-1 (pseudo-inversa)
+        self.residualStdDev: float = math.nan
+        self.degreesOfFreedom: int = 0
+
+    def predict(self, features: np.ndarray) -> Prediction:
+        logValue = float(features @ self.coefficients)
+        spread = getTQuantile(self.degreesOfFreedom) * self.residualStdDev * math.sqrt(1 + float(features @ self.covariance @ features))
+        prediction = Prediction()
+        prediction.value, prediction.low, prediction.high = math.exp(logValue), math.exp(logValue - spread), math.exp(logValue + spread)
+        return prediction
+
+def fitTarget(features: np.ndarray, values: np.ndarray) -> TargetFit | None:
+    rank = int(np.linalg.matrix_rank(features)) if len(values) > 0 else 0
+    if len(values) <= rank: # sem grau de liberdade nao ha como estimar o erro
+        return None
+    fit = TargetFit()
+    logValues = np.log(values)
+    fit.coefficients = np.linalg.lstsq(features, logValues, rcond=None)[0]
+    residuals = logValues - features @ fit.coefficients
+    fit.degreesOfFreedom = len(values) - rank
+    fit.residualStdDev = math.sqrt(float(residuals @ residuals) / fit.degreesOfFreedom)
+    fit.covariance = np.linalg.pinv(features.T @ features)
+    return fit
+
+class PredictiveModel:
+    # um modelo por maquina, algoritmo, otimizacao e variante: dentro de um kernel flops e bytes crescem juntos (N^2 * iteracoes),
+    # entao o trabalho e as threads bastam; maquinas e niveis de otimizacao nao medidos nao tem modelo
+    def __init__(self) -> None:
+        self.machine: str = ""
+        self.measureType: MeasureType = MeasureType.IDLE
+        self.optimization: str = ""
+        self.variant: str = DEFAULT_VARIANT
+        self.count: int = 0
+        self.threads: tuple[int, int] = (0, 0) # faixa medida: fora dela o modelo extrapola
+        self.flops: tuple[float, float] = (0.0, 0.0)
+        self.fits: dict[str, TargetFit] = {}
+
+    def covers(self, threads: int, arraySize: int, iterations: int) -> bool:
+        flops = getMeasureTypeFlops(self.measureType, arraySize, iterations)
+        return self.threads[0] <= threads <= self.threads[1] and self.flops[0] <= flops <= self.flops[1]
+
+    def predict(self, threads: int, arraySize: int, iterations: int) -> dict[str, Prediction]:
+        predictions: dict[str, Prediction] = {}
+        for target, fit in self.fits.items():
+            work = WORK_FUNCTIONS[PREDICT_TARGETS[target][1]](self.measureType, arraySize, iterations)
+            predictions[target] = fit.predict(getFeatures(np.array([work]), np.array([threads]))[0])
+        return predictions
+
+    def getName(self) -> str:
+        variant = f" {self.variant}" if self.variant != DEFAULT_VARIANT else ""
+        return f"{getMeasureTypeName(self.measureType)} {self.optimization}{variant}"
+
+def getMachine(ingestedFile: IngestedFile) -> str:
+    # o no gravado no log (linha Host); logs sem ela ficam com a pasta de resultados, que e uma por maquina
+    host = ingestedFile.average.baseResult.host
+    return host if host is not None and host != "-" else ingestedFile.folder
+
+def getModelKey(calcAvg: ResultAverage, machine: str) -> ModelKey:
+    return (machine, calcAvg.measureType, getOptimizationLevel(calcAvg.baseResult.fileName), calcAvg.baseResult.variant)
+
+def fitModel(key: ModelKey, table: ResultTable, rows: np.ndarray) -> PredictiveModel:
+    model = PredictiveModel()
+    model.machine, model.measureType, model.optimization, model.variant = key
+    model.count = len(rows)
+    model.threads = (int(table.threads[rows].min()), int(table.threads[rows].max()))
+    model.flops = (float(table.flops[rows].min()), float(table.flops[rows].max()))
+    for target, (_, work) in PREDICT_TARGETS.items():
+        values = getattr(table, target)[rows]
+        valid = np.isfinite(values) & (values > 0) # logs sem DRAM ficam sem o modelo de dram
+        fit = fitTarget(getFeatures(getattr(table, work)[rows][valid], table.threads[rows][valid]), values[valid])
+        if fit is not None:
+            model.fits[target] = fit
+    return model
+
+def groupRows(calculatedAvgs: list[ResultAverage], machines: list[str], table: ResultTable) -> dict[ModelKey, np.ndarray]:
+    groups: dict[ModelKey, list[int]] = {}
+    for i, (calcAvg, machine) in enumerate(zip(calculatedAvgs, machines)):
+        if calcAvg.measureType is None or calcAvg.measureType == MeasureType.IDLE or table.threads[i] < 1 or not table.time[i] > 0:
+            continue
+        groups.setdefault(getModelKey(calcAvg, machine), []).append(i)
+    return {key: np.array(rows) for key, rows in groups.items()}
+
+def fitModels(calculatedAvgs: list[ResultAverage], machines: list[str]) -> dict[ModelKey, PredictiveModel]:
+    # machines: a maquina de cada media (getMachine), na mesma ordem
+    table = ResultTable(calculatedAvgs)
+    return {key: fitModel(key, table, rows) for key, rows in sorted(groupRows(calculatedAvgs, machines, table).items())}
+
+def fitIngestedModels(ingested: list[IngestedFile]) -> dict[ModelKey, PredictiveModel]:
+    trained = [ingestedFile for ingestedFile in ingested if ingestedFile.error is None]
+    return fitModels([ingestedFile.average for ingestedFile in trained], [getMachine(ingestedFile) for ingestedFile in trained])
+
+def getModelMachines(models: dict[ModelKey, PredictiveModel]) -> list[str]:
+    return list(dict.fromkeys(key[0] for key in models))
+
+def predictConfiguration(models: dict[ModelKey, PredictiveModel], machine: str, measureType: MeasureType, optimization: str, variant: str,
+                         threads: int, arraySize: int, iterations: int) -> dict[str, Prediction] | None:
+    model = models.get((machine, measureType, optimization, variant))
+    if model is None or not model.covers(threads, arraySize, iterations):
+        return None
+    return model.predict(threads, arraySize, iterations)
+
+def isPredicted(predictions: dict[str, Prediction] | None, tolerance: float) -> bool:
+    # tempo e energia dentro da tolerancia; sem a dram no modelo ela nao impede o pulo
+    return predictions is not None and all(target in predictions and predictions[target].relativeError() <= tolerance for target in ["time", "energy"])
+
+def validateModels(calculatedAvgs: list[ResultAverage], machines: list[str]) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    # leave-one-out: cada configuracao medida e prevista pelo modelo ajustado sem ela (so as que ficam dentro da faixa medida)
+    table = ResultTable(calculatedAvgs)
+    errors: dict[str, list[float]] = {target: [] for target in PREDICT_TARGETS}
+    inside: dict[str, list[bool]] = {target: [] for target in PREDICT_TARGETS}
+    for key, rows in groupRows(calculatedAvgs, machines, table).items():
+        for i in rows:
+            model = fitModel(key, table, rows[rows != i])
+            result = calculatedAvgs[i].baseResult
+            if not model.covers(result.threads, result.arraySize, result.iterations):
+                continue
+            for target, prediction in model.predict(result.threads, result.arraySize, result.iterations).items():
+                actual = float(getattr(table, target)[i])
+                if actual > 0:
+                    errors[target].append(abs(prediction.value - actual) / actual)
+                    inside[target].append(prediction.low <= actual <= prediction.high)
+    return {target: (np.array(errors[target]), np.array(inside[target], dtype=bool)) for target in PREDICT_TARGETS}
+
+def formatPrediction(predictions: dict[str, Prediction]) -> str:
+    return ", ".join(f"{target} {prediction.value:.4g}{PREDICT_TARGETS[target][0]} ± {prediction.relativeError():.1%}" for target, prediction in predictions.items())
+
+def showModels(models: dict[ModelKey, PredictiveModel]):
+    print(f"{'Machine':<16} {'Model':<24} {'Points':>6} {'Threads':>9} " + " ".join(f"{f'{target} resid.':>13}" for target in PREDICT_TARGETS))
+    for model in models.values():
+        residuals = " ".join(f"{f'{math.expm1(model.fits[target].residualStdDev):.1%}' if target in model.fits else '-':>13}" for target in PREDICT_TARGETS)
+        print(f"{model.machine:<16} {model.getName():<24} {model.count:>6} {f'{model.threads[0]}-{model.threads[1]}':>9} {residuals}")
+    print()
+
+def showValidation(validation: dict[str, tuple[np.ndarray, np.ndarray]]):
+    print("Leave-one-out validation (interpolated configurations only):")
+    targets = [target for target in validation if len(validation[target][0]) > 0]
+    for i, target in enumerate(targets):
+        errors, inside = validation[target]
+        prefix = "┗━━" if i == len(targets) - 1 else "┣━━"
+        print(f"{prefix} {target.capitalize()}: {len(errors)} held out, median error {np.median(errors):.1%}, max {errors.max():.1%}, "
+              f"{inside.mean():.0%} inside the 95% prediction interval")
+    print()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit time/energy/DRAM models per algorithm on measured results and predict untested configurations")
+    parser.add_argument("roots", nargs="+", help="results folders or logs used for training")
+    parser.add_argument("-m", "--machines", nargs="+", default=None, help="predict for these machines (host or results folder; default: all fitted)")
+    parser.add_argument("-a", "--algorithms", nargs="+", choices=["map", "reduction", "stencil"], default=None, help="predict these algorithms")
+    parser.add_argument("-O", "--optimizations", nargs="+", default=["O3"])
+    parser.add_argument("-v", "--variants", nargs="+", choices=KERNEL_VARIANTS, default=[DEFAULT_VARIANT])
+    parser.add_argument("-t", "--threads", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("-n", "--size", type=int, default=None, help="array size of the predicted configurations")
+    parser.add_argument("-i", "--iterations", type=int, default=None)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="relative half-width under which a prediction could replace a run")
+    parser.add_argument("--validate", action="store_true", help="leave-one-out check of the models")
+    parser.add_argument("-w", "--warmup", type=int, default=0, help="discard the first N repetitions of each log")
+    parser.add_argument("--outliers", choices=OUTLIER_METHODS, default=None, help="reject repetitions whose execution time is an outlier")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+    if args.algorithms is not None and (args.size is None or args.iterations is None):
+        parser.error("-a needs the array size (-n) and iterations (-i)")
+
+    ingested = ingestTree(args.roots, args.jobs, warmup=args.warmup, outliers=args.outliers)
+    for ingestedFile in ingested:
+        if ingestedFile.error is not None:
+            print(f"Error in '{ingestedFile.path}': {ingestedFile.error}", file=sys.stderr)
+    trained = [ingestedFile for ingestedFile in ingested if ingestedFile.error is None]
+    calculatedAvgs, machines = [ingestedFile.average for ingestedFile in trained], [getMachine(ingestedFile) for ingestedFile in trained]
+    models = fitModels(calculatedAvgs, machines)
+    showModels(models)
+    if args.validate:
+        showValidation(validateModels(calculatedAvgs, machines))
+    if args.algorithms is not None:
+        for machine in (args.machines if args.machines is not None else getModelMachines(models)):
+            print(f"{machine}:")
+            for algorithm in args.algorithms:
+                measureType = getMeasureTypeByName(algorithm)
+                for optimization in args.optimizations:
+                    for variant in args.variants:
+                        for threads in args.threads:
+                            predictions = predictConfiguration(models, machine, measureType, optimization, variant, threads, args.size, args.iterations)
+                            name = f"{getMeasureTypeName(measureType)} {optimization}{f' {variant}' if variant != DEFAULT_VARIANT else ''} {threads}T"
+                            if predictions is None:
+                                print(f"  {name:<28} outside the measured range")
+                            else:
+                                status = " (within tolerance)" if isPredicted(predictions, args.tolerance) else ""
+                                print(f"  {name:<28} {formatPrediction(predictions)}{status}")
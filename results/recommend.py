@@ -0,0 +1,157 @@
+import argparse
+import math
+import sys
+import numpy as np
+from measure import DEFAULT_VARIANT, MeasureType, getMeasureTypeByName, getMeasureTypeName, getOptimizationLevel
+from average import OUTLIER_METHODS, ResultAverage
+from ingest import ingestTree
+from scaling import mergeAverages
+from sweep import ALGORITHM_LETTERS, getBinary, getCompileCommand
+
+class Candidate:
+    def __init__(self) -> None:
+        self.optimization: str = ""
+        self.variant: str = DEFAULT_VARIANT
+        self.threads: int = -1
+        self.time: float = math.nan
+        self.timeCi: float = math.nan
+        self.energy: float = math.nan
+        self.energyCi: float = math.nan
+        self.pareto: bool = False # nao dominado pelas medias
+        self.nearPareto: bool = False # dominado pelas medias, mas nao alem dos intervalos de confianca
+
+    def power(self) -> float:
+        return self.energy / self.time
+
+    def powerCi(self) -> float:
+        # propagacao de erro do quociente
+        return self.power() * math.sqrt((self.energyCi / self.energy) ** 2 + (self.timeCi / self.time) ** 2)
+
+    def getName(self) -> str:
+        variant = f" {self.variant}" if self.variant != DEFAULT_VARIANT else ""
+        return f"{self.optimization}{variant} {self.threads}T"
+
+class ProblemFront:
+    # todas as configuracoes medidas de um algoritmo com o mesmo tamanho e iteracoes
+    def __init__(self) -> None:
+        self.measureType: MeasureType = MeasureType.IDLE
+        self.arraySize: int = -1
+        self.iterations: int = -1
+        self.candidates: list[Candidate] = []
+
+    def getName(self) -> str:
+        return f"{getMeasureTypeName(self.measureType)} {self.arraySize}x{self.arraySize} {self.iterations}it"
+
+def markPareto(candidates: list[Candidate]):
+    # dominancia par a par de uma vez: j domina i se nao e pior em nada e e melhor em algo
+    if len(candidates) == 0:
+        return
+    time = np.array([candidate.time for candidate in candidates])
+    energy = np.array([candidate.energy for candidate in candidates])
+    timeCi = np.nan_to_num(np.array([candidate.timeCi for candidate in candidates]))
+    energyCi = np.nan_to_num(np.array([candidate.energyCi for candidate in candidates]))
+    dominates = (time[:, None] <= time[None, :]) & (energy[:, None] <= energy[None, :]) & ((time[:, None] < time[None, :]) | (energy[:, None] < energy[None, :]))
+    # dominancia robusta: o intervalo inteiro de j fica abaixo do intervalo de i nas duas grandezas
+    robust = ((time + timeCi)[:, None] < (time - timeCi)[None, :]) & ((energy + energyCi)[:, None] < (energy - energyCi)[None, :])
+    pareto = ~dominates.any(axis=0)
+    nearPareto = ~pareto & ~robust.any(axis=0)
+    for i, candidate in enumerate(candidates):
+        candidate.pareto, candidate.nearPareto = bool(pareto[i]), bool(nearPareto[i])
+
+def buildFronts(calculatedAvgs: list[ResultAverage]) -> list[ProblemFront]:
+    groups: dict[tuple, dict[tuple, list[ResultAverage]]] = {}
+    for calcAvg in calculatedAvgs:
+        if calcAvg.measureType is None or calcAvg.executionTimeAverage.count() == 0:
+            continue
+        result = calcAvg.baseResult
+        problem = (calcAvg.measureType, result.arraySize, result.iterations)
+        configuration = (getOptimizationLevel(result.fileName), result.variant, result.threads)
+        groups.setdefault(problem, {}).setdefault(configuration, []).append(calcAvg)
+
+    fronts: list[ProblemFront] = []
+    for problem in sorted(groups):
+        front = ProblemFront()
+        front.measureType, front.arraySize, front.iterations = problem
+        for configuration, calcAvgs in groups[problem].items():
+            times, energies = mergeAverages(calcAvgs)
+            candidate = Candidate()
+            candidate.optimization, candidate.variant, candidate.threads = configuration
+            candidate.time, candidate.timeCi = times.avg(), times.confidenceInterval95()
+            candidate.energy, candidate.energyCi = energies.avg(), energies.confidenceInterval95()
+            front.candidates.append(candidate)
+        front.candidates.sort(key=lambda candidate: candidate.time)
+        markPareto(front.candidates)
+        fronts.append(front)
+    return fronts
+
+def recommend(front: ProblemFront, maxTime: float | None = None, maxPower: float | None = None, conservative: bool = False) -> Candidate | None:
+    # com maxTime: menor energia com tempo <= maxTime; com maxPower: menor tempo com potencia <= maxPower;
+    # conservative usa o limite superior do intervalo de confianca nas restricoes
+    feasible = []
+    for candidate in front.candidates:
+        time = candidate.time + (candidate.timeCi if conservative else 0)
+        power = candidate.power() + (candidate.powerCi() if conservative else 0)
+        if maxTime is not None and not time <= maxTime:
+            continue
+        if maxPower is not None and not power <= maxPower:
+            continue
+        feasible.append(candidate)
+    if len(feasible) == 0:
+        return None
+    if maxTime is not None or maxPower is None:
+        return min(feasible, key=lambda candidate: (candidate.energy, candidate.time))
+    return min(feasible, key=lambda candidate: (candidate.time, candidate.energy))
+
+def getSlurmSnippet(front: ProblemFront, candidate: Candidate) -> str:
+    variant = f" -v {candidate.variant}" if candidate.variant != DEFAULT_VARIANT else ""
+    return "\n".join([
+        f"#### {front.getName()}: {candidate.getName()}, {candidate.time:.6g}s ± {candidate.timeCi:.3g}, {candidate.energy:.6g}J ± {candidate.energyCi:.3g}",
+        f"export OMP_NUM_THREADS={candidate.threads}",
+        "module load GCC",
+        getCompileCommand(".", candidate.optimization),
+        f"time {getBinary('.', candidate.optimization)} -n {front.arraySize} -i {front.iterations} -c {candidate.threads}{variant} -{ALGORITHM_LETTERS[front.measureType]}",
+    ])
+
+def showFront(front: ProblemFront):
+    print(f"{front.getName()}:")
+    print(f"┃   {'Configuration':<16} {'Time (s)':>20} {'Energy (J)':>22} {'Power (W)':>10}")
+    for candidate in front.candidates:
+        status = "Pareto" if candidate.pareto else ("~Pareto (within 95% CI)" if candidate.nearPareto else "")
+        print(f"┃   {candidate.getName():<16} {f'{candidate.time:.4g} ± {candidate.timeCi:.2g}':>20} {f'{candidate.energy:.5g} ± {candidate.energyCi:.2g}':>22} "
+              f"{candidate.power():>10.4g} {status}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time x energy Pareto front per algorithm and the best configuration under a time or power budget")
+    parser.add_argument("roots", nargs="+", help="results folders or logs")
+    parser.add_argument("-a", "--algorithm", default=None, help="only this algorithm (map, reduction, stencil)")
+    parser.add_argument("-T", "--max-time", type=float, default=None, help="minimize energy with execution time <= T seconds")
+    parser.add_argument("-W", "--max-power", type=float, default=None, help="minimize time with average package power <= W watts")
+    parser.add_argument("--conservative", action="store_true", help="apply the constraints to the upper end of the 95%% CI")
+    parser.add_argument("-w", "--warmup", type=int, default=0, help="discard the first N repetitions of each log")
+    parser.add_argument("--outliers", choices=OUTLIER_METHODS, default=None, help="reject repetitions whose execution time is an outlier")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    ingested = ingestTree(args.roots, args.jobs, warmup=args.warmup, outliers=args.outliers)
+    for ingestedFile in ingested:
+        if ingestedFile.error is not None:
+            print(f"Error in '{ingestedFile.path}': {ingestedFile.error}", file=sys.stderr)
+    calculatedAvgs = [ingestedFile.average for ingestedFile in ingested if ingestedFile.error is None]
+    if args.algorithm is not None:
+        measureType = getMeasureTypeByName(args.algorithm)
+        if measureType is None:
+            parser.error(f"Unknown algorithm '{args.algorithm}'")
+        calculatedAvgs = [calcAvg for calcAvg in calculatedAvgs if calcAvg.measureType == measureType]
+
+    unsatisfied = 0
+    for front in buildFronts(calculatedAvgs):
+        showFront(front)
+        best = recommend(front, args.max_time, args.max_power, args.conservative)
+        if best is None:
+            print("┗━━ No configuration satisfies the constraints")
+            unsatisfied += 1
+        else:
+            print(f"┗━━ Recommended: {best.getName()}")
+            print(getSlurmSnippet(front, best))
+        print()
+    sys.exit(1 if unsatisfied > 0 else 0)
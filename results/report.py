@@ -0,0 +1,132 @@
+import numpy as np
+from measure import DEFAULT_VARIANT, getMeasureTypeName
+from average import AverageValues, PackageAverage, PhaseAverage, ResultAverage, getSteadyStateSummary
+from metrics import METRICS, ResultTable, calculateMetric
+
+def printMeasures(values: AverageValues, tabs: int, unit: str, isLast = False, firstTab = "┃   ", bootstrap = False):
+    tabsStr = ""
+    if tabs == 3:
+        if isLast is False:
+            tabsStr = f"{firstTab}┃   "
+        else:
+            tabsStr = f"{firstTab}    "
+    print(f"{tabsStr}┣━━ Min:    {values.min():.6g}{unit}")
+    print(f"{tabsStr}┣━━ Max:    {values.max():.6g}{unit}")
+    print(f"{tabsStr}┣━━ Avg:    {values.avg():.6g}{unit}")
+    print(f"{tabsStr}┣━━ Median: {values.median():.6g}{unit}")
+    print(f"{tabsStr}┣━━ MAD:    {values.mad():.6g}{unit}")
+    if bootstrap:
+        low, high = values.bootstrapCi("median")
+        print(f"{tabsStr}┣━━ StdDev: {values.stdDev():.6g}{unit}")
+        print(f"{tabsStr}┗━━ 95% CI: [{low:.6g}, {high:.6g}]{unit} (median, bootstrap)")
+    else:
+        print(f"{tabsStr}┗━━ StdDev: {values.stdDev():.6g}{unit}")
+    #print(f"{tabsStr}┣━━ StdErr: {values.stdErr()}{unit}")
+    #print(f"{tabsStr}┗━━ 95% CI: {values.avg()} ± {values.confidenceInterval95()}{unit}")
+
+def formatAverage(values: AverageValues | None, unit: str) -> str:
+    if values is None or values.count() == 0:
+        return "-"
+    return f"{values.avg():.6g}{unit} ± {values.stdDev():.3g}{unit}"
+
+def showPhases(result: ResultAverage, table: ResultTable):
+    # logs antigos so tem o kernel
+    if len(result.phaseAverages) == 0 and result.peakRssAverage is None:
+        return
+    print(f"Phases:")
+    phaseAvg: PhaseAverage
+    for name, phaseAvg in result.phaseAverages.items():
+        note = ""
+        if name == "init" and phaseAvg.threads != result.baseResult.threads:
+            # o first touch define em qual no NUMA cada pagina fica; com outra quantidade de threads o kernel le memoria remota
+            note = f", first touch differs from the {result.baseResult.threads} kernel threads"
+        print(f"┣━━ {name.capitalize()} ({phaseAvg.threads} threads{note}):")
+        print(f"┃   ┣━━ Time:     {formatAverage(phaseAvg.time, 's')}")
+        print(f"┃   ┣━━ Energy:   {formatAverage(phaseAvg.energy.pkg, 'J')}")
+        if phaseAvg.energy.dram is not None:
+            print(f"┃   ┣━━ DRAM:     {formatAverage(phaseAvg.energy.dram, 'J')}")
+        print(f"┃   ┗━━ Peak RSS: {formatAverage(phaseAvg.peakRss, 'MB')}")
+    print(f"┣━━ Execution peak RSS: {formatAverage(result.peakRssAverage, 'MB')}")
+    if np.isnan(table.jobEnergy[0]):
+        print(f"┗━━ Job: -")
+    else:
+        setupShare = 100 * (table.initEnergy[0] + table.cleanEnergy[0]) / table.jobEnergy[0]
+        print(f"┗━━ Job (init + kernel + clean): {table.jobTime[0]:.6g}s, {table.jobEnergy[0]:.6g}J ({setupShare:.3g}% outside the kernel)")
+
+def showMeasurements(result: ResultAverage):
+    print(f"Algorithm: {getMeasureTypeName(result.measureType)}")
+    if result.baseResult.variant != DEFAULT_VARIANT:
+        print(f"Variant: {result.baseResult.variant}")
+    print(f"Threads: {result.baseResult.threads}")
+    summary = getSteadyStateSummary(result)
+    if summary is not None:
+        print(f"Repetitions: {result.executionTimeAverage.count()} ({summary})")
+    print(f"Execution time (s):")
+    printMeasures(result.executionTimeAverage, 1, "s", bootstrap=True)
+    print(f"Energy (J):")
+    print(f"┣━━ Idle:")
+    print(f"┃   ┣━━ Pkg:")
+    printMeasures(result.idleAverage.pkg, 3, "J")
+    if result.allPackageAverage.pp0 is not None:
+        print(f"┃   ┣━━ PP0:")
+        printMeasures(result.idleAverage.pp0, 3, "J", isLast=(result.idleAverage.pp1 is None or result.idleAverage.dram is None))
+    if result.allPackageAverage.pp1 is not None:
+        print(f"┃   ┣━━ PP1:")
+        printMeasures(result.idleAverage.pp1, 3, "J", isLast=(result.idleAverage.dram is None))
+    if result.allPackageAverage.pp0 is not None:
+        print(f"┃   ┗━━ DRAM:")
+        printMeasures(result.idleAverage.dram, 3, "J", isLast=True)
+    print(f"┣━━ All:")
+    print(f"┃   ┣━━ Pkg:")
+    printMeasures(result.allPackageAverage.pkg, 3, "J")
+    if result.allPackageAverage.pp0 is not None:
+        print(f"┃   ┣━━ PP0:")
+        printMeasures(result.allPackageAverage.pp0, 3, "J", isLast=(result.allPackageAverage.pp1 is None or result.allPackageAverage.dram is None))
+    if result.allPackageAverage.pp1 is not None:
+        print(f"┃   ┣━━ PP1:")
+        printMeasures(result.allPackageAverage.pp1, 3, "J", isLast=(result.allPackageAverage.dram is None))
+    if result.allPackageAverage.pp0 is not None:
+        print(f"┃   ┗━━ DRAM:")
+        printMeasures(result.allPackageAverage.dram, 3, "J", isLast=True)
+    if result.dynamicAllPackageAverage is not None:
+        dynamic = result.dynamicAllPackageAverage
+        print(f"┣━━ Dynamic (above idle):")
+        print(f"┃   ┣━━ Pkg:")
+        printMeasures(dynamic.pkg, 3, "J")
+        if dynamic.pp0 is not None:
+            print(f"┃   ┣━━ PP0:")
+            printMeasures(dynamic.pp0, 3, "J", isLast=(dynamic.pp1 is None and dynamic.dram is None))
+        if dynamic.pp1 is not None:
+            print(f"┃   ┣━━ PP1:")
+            printMeasures(dynamic.pp1, 3, "J", isLast=(dynamic.dram is None))
+        if dynamic.dram is not None:
+            print(f"┃   ┗━━ DRAM:")
+            printMeasures(dynamic.dram, 3, "J", isLast=True)
+    pkgAvgValue: PackageAverage
+    for pkgAvgValue in result.packageAverages:
+        tabStr = "┃   "
+        if pkgAvgValue.pkgNumber == len(result.packageAverages)-1:
+            tabStr = "    "
+            print(f"┗━━ Package {pkgAvgValue.pkgNumber}:")
+        else:
+            print(f"┣━━ Package {pkgAvgValue.pkgNumber}:")
+        print(f"{tabStr}┣━━ Pkg:")
+        printMeasures(pkgAvgValue.pkg, 3, "J", firstTab=tabStr)
+        if pkgAvgValue.pp0 is not None:
+            print(f"{tabStr}┣━━ PP0:")
+            printMeasures(pkgAvgValue.pp0, 3, "J", isLast=(pkgAvgValue.pp1 is None or pkgAvgValue.dram is None), firstTab=tabStr)
+        if pkgAvgValue.pp1 is not None:
+            print(f"{tabStr}┣━━ PP1:")
+            printMeasures(pkgAvgValue.pp1, 3, "J", isLast=(pkgAvgValue.dram is None), firstTab=tabStr)
+        if pkgAvgValue.pp0 is not None:
+            print(f"{tabStr}┗━━ DRAM:")
+            printMeasures(pkgAvgValue.dram, 3, "J", isLast=True, firstTab=tabStr)
+    table = ResultTable([result])
+    showPhases(result, table)
+    # metricas sem dado no log (ex.: fases nos logs anteriores a elas) ficam de fora, como no showPhases
+    values = [(metric, calculateMetric(metric, table)[0][0]) for metric in METRICS.values()]
+    values = [(metric, value) for metric, value in values if not np.isnan(value)]
+    print(f"Metrics:")
+    for i, (metric, value) in enumerate(values):
+        prefix = "┗━━" if i == len(values) - 1 else "┣━━"
+        print(f"{prefix} {metric.suffix}: {value:.6g}{metric.unit}")
@@ -0,0 +1,142 @@
+import argparse
+import math
+import os
+import sys
+import numpy as np
+from measure import MeasureParser, Result, getMeasureTypeName, getResultLabel, openLog
+from average import ResultAverage
+from ingest import LOG_EXTENSION, ingestTree
+from metrics import ResultTable
+
+class MachineProfile:
+    def __init__(self) -> None:
+        self.bandwidth: float | None = None # GB/s
+        self.peakFlops: float | None = None # GFLOP/s
+        self.sources: list[str] = []
+
+    def ridge(self) -> float | None:
+        # intensidade (FLOP/B) a partir da qual o kernel deixa de ser limitado pela memoria
+        if self.bandwidth is None or self.peakFlops is None:
+            return None
+        return self.peakFlops / self.bandwidth
+
+    def attainable(self, intensity: np.ndarray) -> np.ndarray:
+        return np.minimum(self.peakFlops, self.bandwidth * intensity)
+
+class RooflinePoint:
+    def __init__(self) -> None:
+        self.average: ResultAverage | None = None
+        self.intensity: float = math.nan # FLOP/B
+        self.gflops: float = math.nan
+        self.bandwidth: float = math.nan # GB/s
+        self.attainable: float = math.nan # teto do roofline nessa intensidade
+        self.bound: str = "" # memory ou compute
+        self.dramPerByte: float = math.nan # nJ/B
+
+def findMachineProfile(roots: str | list[str]) -> MachineProfile:
+    # melhor valor de todos os "tccgreen -p" nos logs, como o STREAM (a melhor repeticao e a mais proxima do pico)
+    if isinstance(roots, str):
+        roots = [roots]
+    profile = MachineProfile()
+    for root in roots:
+        logs = [root] if os.path.isfile(root) else [os.path.join(dirPath, fileName) for dirPath, _, fileNames in os.walk(root)
+                                                    for fileName in fileNames if fileName.endswith(LOG_EXTENSION)]
+        for logPath in logs:
+            result = Result()
+            parser = MeasureParser(result)
+            with openLog(logPath) as file:
+                for line in file:
+                    if line.startswith("Probe"):
+                        parser.feed(line)
+            if result.bandwidth is not None or result.peakFlops is not None:
+                profile.sources.append(logPath)
+            if result.bandwidth is not None:
+                profile.bandwidth = max(profile.bandwidth or 0.0, result.bandwidth)
+            if result.peakFlops is not None:
+                profile.peakFlops = max(profile.peakFlops or 0.0, result.peakFlops)
+    return profile
+
+def analyzeRoofline(calculatedAvgs: list[ResultAverage], profile: MachineProfile) -> list[RooflinePoint]:
+    table = ResultTable(calculatedAvgs)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        intensity = table.flops / table.bytes
+        gflops = table.flops / table.time / 1e9
+        bandwidth = table.bytes / table.time / 1e9
+        dramPerByte = table.dram / table.bytes * 1e9
+    attainable = profile.attainable(intensity) if profile.ridge() is not None else np.full(len(table), np.nan)
+    points: list[RooflinePoint] = []
+    for i, calcAvg in enumerate(calculatedAvgs):
+        point = RooflinePoint()
+        point.average = calcAvg
+        point.intensity, point.gflops, point.bandwidth = float(intensity[i]), float(gflops[i]), float(bandwidth[i])
+        point.attainable, point.dramPerByte = float(attainable[i]), float(dramPerByte[i])
+        if profile.ridge() is not None:
+            point.bound = "memory" if point.intensity < profile.ridge() else "compute"
+        points.append(point)
+    return points
+
+def getPointName(point: RooflinePoint) -> str:
+    return f"{getMeasureTypeName(point.average.measureType)} {getResultLabel(point.average.baseResult)} {point.average.baseResult.threads}T"
+
+def showRoofline(points: list[RooflinePoint], profile: MachineProfile):
+    if profile.ridge() is not None:
+        print(f"Machine: {profile.peakFlops:.6g} GFLOP/s, {profile.bandwidth:.6g} GB/s, ridge at {profile.ridge():.3g} FLOP/B")
+    else:
+        print("Machine: no profile (run tccgreen -p or pass --peak and --bandwidth)")
+    print(f"┃   {'Configuration':<24} {'FLOP/B':>7} {'GFLOP/s':>9} {'GB/s':>9} {'Roof use':>9} {'BW use':>7} {'DRAM nJ/B':>10} Bound")
+    for point in points:
+        roofUse = f"{point.gflops / point.attainable:.1%}" if not math.isnan(point.attainable) else "-"
+        bandwidthUse = f"{point.bandwidth / profile.bandwidth:.1%}" if profile.bandwidth is not None else "-"
+        dramPerByte = f"{point.dramPerByte:.3g}" if not math.isnan(point.dramPerByte) else "-"
+        print(f"┃   {getPointName(point):<24} {point.intensity:>7.3g} {point.gflops:>9.4g} {point.bandwidth:>9.4g} {roofUse:>9} {bandwidthUse:>7} {dramPerByte:>10} {point.bound or '-'}")
+    print()
+
+def plotRoofline(points: list[RooflinePoint], profile: MachineProfile, output: str | None = None):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 6), layout="constrained")
+    intensities = np.array([point.intensity for point in points])
+    low = min(np.nanmin(intensities) / 4, profile.ridge() / 8 if profile.ridge() is not None else math.inf)
+    high = max(np.nanmax(intensities) * 4, profile.ridge() * 8 if profile.ridge() is not None else 0)
+    if profile.ridge() is not None:
+        x = np.geomspace(low, high, 200)
+        ax.plot(x, profile.attainable(x), color="black", label=f"Roofline ({profile.bandwidth:.4g} GB/s, {profile.peakFlops:.4g} GFLOP/s)")
+        ax.axvline(profile.ridge(), color="gray", linestyle=":")
+    for point in points:
+        ax.plot(point.intensity, point.gflops, "o", label=getPointName(point))
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlim(low, high)
+    ax.set_xlabel("Intensidade aritmetica (FLOP/B)")
+    ax.set_ylabel("Desempenho (GFLOP/s)")
+    ax.legend(fontsize="small", ncol=2)
+    if output is None:
+        plt.show()
+    else:
+        plt.savefig(output)
+        plt.close("all")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roofline model of the results: arithmetic intensity, achieved GB/s and GFLOP/s, DRAM joules per byte")
+    parser.add_argument("roots", nargs="+", help="results folders or logs")
+    parser.add_argument("--peak", type=float, default=None, help="peak GFLOP/s (default: best 'tccgreen -p' in the logs)")
+    parser.add_argument("--bandwidth", type=float, default=None, help="memory bandwidth in GB/s (default: best 'tccgreen -p' in the logs)")
+    parser.add_argument("-p", "--plot", metavar="PNG", default=None, help="save the roofline chart (use 'show' to open a window)")
+    parser.add_argument("-w", "--warmup", type=int, default=0, help="discard the first N repetitions of each log")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    profile = findMachineProfile(args.roots)
+    if args.peak is not None:
+        profile.peakFlops = args.peak
+    if args.bandwidth is not None:
+        profile.bandwidth = args.bandwidth
+    ingested = ingestTree(args.roots, args.jobs, warmup=args.warmup)
+    for ingestedFile in ingested:
+        if ingestedFile.error is not None:
+            print(f"Error in '{ingestedFile.path}': {ingestedFile.error}", file=sys.stderr)
+    calculatedAvgs = [ingestedFile.average for ingestedFile in ingested if ingestedFile.error is None and ingestedFile.average.measureType is not None]
+    calculatedAvgs.sort(key=lambda calcAvg: (calcAvg.measureType, getResultLabel(calcAvg.baseResult), calcAvg.baseResult.threads))
+    points = analyzeRoofline(calculatedAvgs, profile)
+    showRoofline(points, profile)
+    if args.plot is not None:
+        plotRoofline(points, profile, None if args.plot == "show" else args.plot)
@@ -0,0 +1,143 @@
+import argparse
+import math
+from measure import DEFAULT_VARIANT, MeasureType, getMeasureTypeName, getOptimizationLevel
+from average import AverageValues, OUTLIER_METHODS, ResultAverage
+from ingest import ingestTree
+
+class ScalingPoint:
+    def __init__(self) -> None:
+        self.threads: int = -1
+        self.time: float = 0.0
+        self.timeCi: float = 0.0
+        self.energy: float = 0.0
+        self.energyCi: float = 0.0
+        self.speedup: float = 0.0
+        self.speedupCi: float = 0.0
+        self.efficiency: float = 0.0
+        self.efficiencyCi: float = 0.0
+        self.edp: float = 0.0 # energy-delay product (J*s)
+        self.edpCi: float = 0.0
+        self.ed2p: float = 0.0 # energy-delay^2 product (J*s^2)
+        self.ed2pCi: float = 0.0
+
+class ScalingSeries:
+    def __init__(self) -> None:
+        self.optimization: str = ""
+        self.variant: str = DEFAULT_VARIANT
+        self.measureType: MeasureType = MeasureType.IDLE
+        self.arraySize: int = -1
+        self.iterations: int = -1
+        self.points: list[ScalingPoint] = []
+        self.amdahlSerialFraction: float | None = None
+        self.gustafsonSerialFraction: float | None = None
+
+def relativeError(*terms: tuple[float, float, float]) -> float:
+    # propagacao de erro para produtos/divisoes: (intervalo, valor, expoente)
+    return math.sqrt(sum((exponent * ci / value) ** 2 for ci, value, exponent in terms if value != 0))
+
+def mergeAverages(calculatedAvgs: list[ResultAverage]) -> tuple[AverageValues, AverageValues]:
+    # varios logs com a mesma configuracao viram uma amostra so
+    if len(calculatedAvgs) == 1:
+        return (calculatedAvgs[0].executionTimeAverage, calculatedAvgs[0].allPackageAverage.pkg)
+    times = AverageValues()
+    energies = AverageValues()
+    for calcAvg in calculatedAvgs:
+        times.addMany(calcAvg.executionTimeAverage.values())
+        energies.addMany(calcAvg.allPackageAverage.pkg.values())
+    return (times, energies)
+
+def fitAmdahl(points: list[ScalingPoint]) -> float | None:
+    # 1/S = f + (1-f)/p  =>  1/S - 1/p = f * (1 - 1/p), minimos quadrados em f
+    numerator = sum((1/point.speedup - 1/point.threads) * (1 - 1/point.threads) for point in points if point.threads > 1)
+    denominator = sum((1 - 1/point.threads) ** 2 for point in points if point.threads > 1)
+    return numerator / denominator if denominator > 0 else None
+
+def fitGustafson(points: list[ScalingPoint]) -> float | None:
+    # S = p - a * (p - 1)  =>  p - S = a * (p - 1), minimos quadrados em a
+    numerator = sum((point.threads - point.speedup) * (point.threads - 1) for point in points if point.threads > 1)
+    denominator = sum((point.threads - 1) ** 2 for point in points if point.threads > 1)
+    return numerator / denominator if denominator > 0 else None
+
+def analyzeScaling(calculatedAvgs: list[ResultAverage]) -> list[ScalingSeries]:
+    groups: dict[tuple, dict[int, list[ResultAverage]]] = {}
+    for calcAvg in calculatedAvgs:
+        if calcAvg.measureType is None:
+            continue
+        result = calcAvg.baseResult
+        key = (getOptimizationLevel(result.fileName), calcAvg.measureType, result.arraySize, result.iterations, result.variant)
+        groups.setdefault(key, {}).setdefault(result.threads, []).append(calcAvg)
+
+    allSeries: list[ScalingSeries] = []
+    for key in sorted(groups):
+        series = ScalingSeries()
+        series.optimization, series.measureType, series.arraySize, series.iterations, series.variant = key
+        for threads in sorted(groups[key]):
+            times, energies = mergeAverages(groups[key][threads])
+            point = ScalingPoint()
+            point.threads = threads
+            point.time, point.timeCi = times.avg(), times.confidenceInterval95()
+            point.energy, point.energyCi = energies.avg(), energies.confidenceInterval95()
+            point.edp = point.energy * point.time
+            point.edpCi = point.edp * relativeError((point.energyCi, point.energy, 1), (point.timeCi, point.time, 1))
+            point.ed2p = point.energy * point.time ** 2
+            point.ed2pCi = point.ed2p * relativeError((point.energyCi, point.energy, 1), (point.timeCi, point.time, 2))
+            series.points.append(point)
+
+        baseline = series.points[0] if series.points[0].threads == 1 else None
+        if baseline is not None:
+            for point in series.points:
+                point.speedup = baseline.time / point.time
+                if point is not baseline:
+                    point.speedupCi = point.speedup * relativeError((baseline.timeCi, baseline.time, 1), (point.timeCi, point.time, 1))
+                point.efficiency = point.speedup / point.threads
+                point.efficiencyCi = point.speedupCi / point.threads
+            series.amdahlSerialFraction = fitAmdahl(series.points)
+            series.gustafsonSerialFraction = fitGustafson(series.points)
+        allSeries.append(series)
+    return allSeries
+
+def findOptimal(points: list[ScalingPoint], value: str) -> tuple[ScalingPoint, list[int]]:
+    # alem do minimo, lista as threads cujo intervalo de confianca se sobrepoe ao do minimo
+    best = min(points, key=lambda point: getattr(point, value))
+    bestHigh = getattr(best, value) + getattr(best, f"{value}Ci")
+    equivalent = [point.threads for point in points if point is not best and getattr(point, value) - getattr(point, f"{value}Ci") <= bestHigh]
+    return (best, equivalent)
+
+def showScaling(allSeries: list[ScalingSeries]):
+    for series in allSeries:
+        variant = f" {series.variant}" if series.variant != DEFAULT_VARIANT else ""
+        print(f"{getMeasureTypeName(series.measureType)} {series.optimization}{variant} ({series.arraySize}x{series.arraySize}, {series.iterations} iterations):")
+        print(f"┃   {'Threads':>7} {'Time (s)':>18} {'Energy (J)':>20} {'Speedup':>15} {'Efficiency':>15} {'EDP (J*s)':>22}")
+        for point in series.points:
+            speedup = f"{point.speedup:.2f} ± {point.speedupCi:.2f}" if point.speedup > 0 else "-"
+            efficiency = f"{point.efficiency:.2f} ± {point.efficiencyCi:.2f}" if point.efficiency > 0 else "-"
+            print(f"┃   {point.threads:>7} {f'{point.time:.3f} ± {point.timeCi:.3f}':>18} {f'{point.energy:.1f} ± {point.energyCi:.1f}':>20} "
+                  f"{speedup:>15} {efficiency:>15} {f'{point.edp:.4g} ± {point.edpCi:.2g}':>22}")
+        if series.amdahlSerialFraction is not None:
+            maxSpeedup = f", max speedup {1/series.amdahlSerialFraction:.1f}x" if series.amdahlSerialFraction > 0 else ""
+            print(f"┣━━ Amdahl serial fraction: {series.amdahlSerialFraction:.4f}{maxSpeedup}")
+            print(f"┣━━ Gustafson serial fraction: {series.gustafsonSerialFraction:.4f}")
+        else:
+            print(f"┣━━ No 1 thread baseline, speedup not available")
+        for label, value in [("Time-optimal", "time"), ("Energy-optimal", "energy"), ("EDP-optimal", "edp"), ("ED²P-optimal", "ed2p")]:
+            best, equivalent = findOptimal(series.points, value)
+            equivalentStr = f" (within 95% CI: {', '.join(f'{t}T' for t in equivalent)})" if len(equivalent) > 0 else ""
+            prefix = "┗━━" if value == "ed2p" else "┣━━"
+            print(f"{prefix} {label}: {best.threads}T{equivalentStr}")
+        print()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strong-scaling analysis (speedup, efficiency, Amdahl/Gustafson, EDP) of results folders")
+    parser.add_argument("folders", nargs="+", help="results folders or logs")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("-w", "--warmup", type=int, default=0, help="discard the first N repetitions of each log")
+    parser.add_argument("--outliers", choices=OUTLIER_METHODS, default=None, help="reject repetitions whose execution time is an outlier")
+    args = parser.parse_args()
+
+    for folder in args.folders:
+        ingested = ingestTree(folder, args.jobs, warmup=args.warmup, outliers=args.outliers)
+        for ingestedFile in ingested:
+            if ingestedFile.error is not None:
+                print(f"Error in '{ingestedFile.path}': {ingestedFile.error}")
+        print(f"==== {folder} ====")
+        showScaling(analyzeScaling([ingestedFile.average for ingestedFile in ingested if ingestedFile.error is None]))
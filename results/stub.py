@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# Substituto do tccgreen para testes locais: aceita os mesmos argumentos e escreve o mesmo formato de log,
+# com tempos e energias sinteticos (sem RAPL, sem alocar os arrays e sem esperar).
+import os
+import random
+import socket
+import struct
+import sys
+import time
+
+IDLE_POWER = 45.0 # W por pacote
+ACTIVE_POWER = 6.0 # W por thread ativa, dividido entre os pacotes
+DRAM_POWER = 20.0
+FLOPS_PER_THREAD = {"Map": 4.0e8, "Reduction": 8.0e8, "Stencil": 2.5e8}
+FLOPS_PER_ELEMENT = {"Map": 2, "Reduction": 1, "Stencil": 4}
+NOISE = float(os.environ.get("TCCGREEN_STUB_NOISE", "0.02"))
+PACKAGES = int(os.environ.get("TCCGREEN_STUB_PACKAGES", "2"))
+MEASURE_TYPES = {"Idle": 0, "Map": 1, "Reduction": 2, "Stencil": 3}
+VARIANTS = ["baseline", "contiguous", "simd", "tiled"]
+VARIANT_SPEEDUP = {"baseline": 1.0, "contiguous": 1.3, "simd": 2.5, "tiled": 3.0}
+variant = "baseline"
+records = None # arquivo do -d
+session = int(time.time())
+trace = None # arquivo do -t, com o relogio e a energia acumulada simulados
+traceTime = 0.0
+traceEnergy: list[list[float]] = []
+frequency = 100
+STAGE_NONE, STAGE_INIT, STAGE_EXECUTE, STAGE_CLEAN = range(4)
+BASE_RSS = 4.0 # MB do processo sem os arrays
+
+def noisy(value: float) -> float:
+    return value * random.gauss(1.0, NOISE)
+
+def printPackages(out, seconds: float, activeThreads: int, prefix: str = "") -> list[tuple[float, float]]:
+    energies = []
+    for package in range(PACKAGES):
+        pkg = float(f"{noisy((IDLE_POWER + ACTIVE_POWER * activeThreads / PACKAGES) * seconds):g}")
+        dram = float(f"{noisy((DRAM_POWER * (2 if activeThreads > 0 else 1) / 2) * seconds):g}")
+        print(f"{prefix}Package {package}: PKG={pkg:g}J, DRAM={dram:g}J", file=out)
+        energies.append((pkg, dram))
+    return energies
+
+def writeRecord(name: str, threads: int, size: int, iterations: int, seconds: float, energies: list[tuple[float, float]], prefix: str = ""):
+    if records is None:
+        return
+    fields = [prefix + str(session), str(MEASURE_TYPES[name]), str(VARIANTS.index(variant)), str(threads), str(size), str(iterations), f"{seconds:g}", str(len(energies))]
+    for package, (pkg, dram) in enumerate(energies):
+        fields += [str(package), f"{pkg:g}", "nan", "nan", f"{dram:g}"]
+    print(",".join(fields), file=records, flush=True)
+
+def writePhaseRecord(stage: int, peakRss: float, name: str, threads: int, size: int, iterations: int, seconds: float, energies: list[tuple[float, float]]):
+    writeRecord(name, threads, size, iterations, seconds, energies, f"# phase,{stage},{peakRss:g},")
+
+def printPhase(out, phase: str, seconds: float, threads: int, peakRss: float) -> list[tuple[float, float]]:
+    print(f"Phase {phase}: {seconds:g}s, {threads} threads, peak RSS {int(peakRss)}MB", file=out)
+    return printPackages(out, seconds, threads, f"Phase {phase} ")
+
+def writeTrace(kind: int, stage: int, seconds: float, activeThreads: int):
+    # mesmo formato do sampler.cpp, uma amostra a cada 1/frequency s do tempo simulado
+    global traceTime
+    if trace is None:
+        return
+    steps = max(1, round(seconds * frequency))
+    for _ in range(steps):
+        traceTime += seconds / steps
+        for package in range(PACKAGES):
+            traceEnergy[package][0] += noisy(IDLE_POWER + ACTIVE_POWER * activeThreads / PACKAGES) * seconds / steps
+            traceEnergy[package][3] += noisy(DRAM_POWER * (2 if activeThreads > 0 else 1) / 2) * seconds / steps
+        trace.write(struct.pack("<dii", traceTime, kind, stage) + struct.pack(f"<{4 * PACKAGES}d", *(e for energy in traceEnergy for e in energy)))
+
+def startTrace(path: str):
+    global trace, traceEnergy
+    trace = open(path, "wb")
+    trace.write(b"TCCTRACE" + struct.pack("<II", 1, PACKAGES))
+    traceEnergy = [[0.0, float("nan"), float("nan"), 0.0] for _ in range(PACKAGES)]
+
+def getHostIds() -> tuple[str, str, str]:
+    # mesmas variaveis do utils.cpp; TCCGREEN_STUB_HOST simula varios nos numa maquina so
+    host = os.environ.get("TCCGREEN_STUB_HOST", socket.gethostname())
+    job = os.environ.get("SLURM_ARRAY_JOB_ID", os.environ.get("SLURM_JOB_ID", "-"))
+    task = os.environ.get("SLURM_ARRAY_TASK_ID", os.environ.get("SLURM_PROCID", "-"))
+    return (host, job, task)
+
+def getHostTag() -> str:
+    host, job, task = getHostIds()
+    return f"Host: {host} (job {job}, tarefa {task})"
+
+def measureIdle(out, size: int, iterations: int, threads: int):
+    print("Measuring idle (1s)", file=out)
+    writeTrace(MEASURE_TYPES["Idle"], STAGE_EXECUTE, 1.0, 0)
+    writeRecord("Idle", threads, size, iterations, 1.0, printPackages(out, 1.0, 0))
+    print(file=out)
+
+def testAlgorithm(out, name: str, size: int, iterations: int, threads: int, availableThreads: int):
+    arraySize = size + 2 if name == "Stencil" else size
+    peakRss = BASE_RSS + 8 * arraySize * arraySize * (2 if name == "Stencil" else 1) / 2 ** 20
+    print(f"Initialize {name} ({arraySize}x{arraySize} array)", file=out)
+    # mesmas threads do prepareInitialize: a baseline inicializa com todas as disponiveis
+    initThreads = availableThreads if variant == "baseline" else threads
+    initSeconds = float(f"{noisy(arraySize * arraySize / (2e8 * initThreads ** 0.5)):g}")
+    writeTrace(MEASURE_TYPES[name], STAGE_INIT, initSeconds, initThreads)
+    writePhaseRecord(STAGE_INIT, peakRss, name, initThreads, size, iterations, initSeconds, printPhase(out, "init", initSeconds, initThreads, peakRss))
+    writeTrace(MEASURE_TYPES[name], STAGE_NONE, 1.0, 0)
+    print(f"Execute {name}", file=out)
+    seconds = float(f"{noisy(size * size * iterations * FLOPS_PER_ELEMENT[name] / (FLOPS_PER_THREAD[name] * VARIANT_SPEEDUP[variant] * threads ** 0.9)):g}")
+    writeTrace(MEASURE_TYPES[name], STAGE_EXECUTE, seconds, threads)
+    print(f"Execution time: {seconds:g}s", file=out)
+    energies = printPackages(out, seconds, threads)
+    print(f"Execution peak RSS: {int(peakRss)}MB", file=out)
+    writePhaseRecord(STAGE_EXECUTE, peakRss, name, threads, size, iterations, seconds, energies)
+    print(f"Clean {name}", file=out)
+    cleanSeconds = float(f"{noisy(arraySize * arraySize / 1e9):g}")
+    writeTrace(MEASURE_TYPES[name], STAGE_CLEAN, cleanSeconds, 1)
+    writePhaseRecord(STAGE_CLEAN, peakRss, name, 1, size, iterations, cleanSeconds, printPhase(out, "clean", cleanSeconds, 1, peakRss))
+    writeRecord(name, threads, size, iterations, seconds, energies)
+    print(file=out)
+
+def main(argv: list[str]) -> int:
+    global records, frequency, variant
+    if "TCCGREEN_STUB_SEED" in os.environ:
+        random.seed(int(os.environ["TCCGREEN_STUB_SEED"]))
+    availableThreads = int(os.environ.get("OMP_NUM_THREADS", os.cpu_count() or 1))
+    maxThreads = availableThreads
+    size, iterations = 100, 5000000
+    out = sys.stdout
+    print(f"Quantidade maxima de threads inicial: {availableThreads}", file=out)
+    print(getHostTag(), file=out)
+    print(file=out)
+
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        algorithm = {"-m": "Map", "--map": "Map", "-r": "Reduction", "--reduction": "Reduction", "-s": "Stencil", "--stencil": "Stencil"}.get(arg)
+        if algorithm is not None:
+            measureIdle(out, size, iterations, maxThreads)
+            testAlgorithm(out, algorithm, size, iterations, maxThreads, availableThreads)
+            writeTrace(-1, STAGE_NONE, 1.0, 0)
+            measureIdle(out, size, iterations, maxThreads)
+        elif arg in ["-c", "--cores"]:
+            i += 1
+            maxThreads = int(argv[i])
+            print(f"Quantidade maxima de threads alterada para {maxThreads}\n", file=out)
+        elif arg in ["-o", "--output"]:
+            i += 1
+            out = open(argv[i], "a")
+            print(f"Saida alterada para {argv[i]}", file=out)
+            print(f"{getHostTag()}\n", file=out)
+        elif arg in ["-d", "--data"]:
+            i += 1
+            records = open(argv[i], "a")
+            print("# session,type,variant,threads,size,iterations,time,packages,[package,pkg,pp0,pp1,dram]*packages", file=records)
+            print("# fases do kernel (preparo, execucao, limpeza): # phase,stage,peakRssMb,<mesmas colunas>", file=records)
+            print("# host {} job {} tarefa {}".format(*getHostIds()), file=records, flush=True)
+            print(f"Dados gravados em {argv[i]}\n", file=out)
+        elif arg in ["-f", "--frequency"]:
+            i += 1
+            frequency = int(argv[i])
+            print(f"Frequencia do trace alterada para {frequency}Hz\n", file=out)
+        elif arg in ["-t", "--trace"]:
+            i += 1
+            startTrace(argv[i])
+            print(f"Trace gravado em {argv[i]} ({frequency}Hz)\n", file=out)
+        elif arg in ["-v", "--variant"]:
+            i += 1
+            if argv[i] not in VARIANTS:
+                print("Variante deve ser baseline, contiguous, simd ou tiled", file=out)
+                return 127
+            variant = argv[i]
+            print(f"Variante alterada para {variant}\n", file=out)
+        elif arg in ["-p", "--probe"]:
+            print(f"Probe Bandwidth (triad): {noisy(12.0 * maxThreads ** 0.5):g} GB/s", file=out)
+            print(f"Probe Compute: {noisy(8.0 * maxThreads):g} GFLOP/s\n", file=out)
+        elif arg in ["-n", "--number"]:
+            i += 1
+            size = int(argv[i])
+            print(f"Tamanho do array alterado para {size}x{size}\n", file=out)
+        elif arg in ["-i", "--iter"]:
+            i += 1
+            iterations = int(argv[i])
+            print(f"Quantidade de iteracoes alterado para {iterations}\n", file=out)
+        else:
+            print(f"Argumento desconhecido na posicao {i + 1}\n", file=out)
+        i += 1
+    out.flush()
+    if trace is not None:
+        trace.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import sys
+from measure import DEFAULT_VARIANT, KERNEL_VARIANTS, MeasureType, Result, getMeasureTypeByName, getMeasureTypeName, openLog, streamMeasures
+from average import OUTLIER_METHODS
+from ingest import IngestedFile, ingestTree
+from predict import DEFAULT_TOLERANCE, ModelKey, Prediction, PredictiveModel, fitIngestedModels, formatPrediction, getMachine, isPredicted, predictConfiguration
+
+SOURCE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+ALGORITHM_LETTERS = {MeasureType.MAP: "m", MeasureType.REDUCTION: "r", MeasureType.STENCIL: "s"}
+SLURM_HEADER = """#!/bin/bash
+#####definir particao/fila de uso. Checar as filas disponiveis com sinfo
+#SBATCH --partition={partition}
+#####definir tempo maximo de execucao. Nao deve ultrapassar o maximo da fila
+#SBATCH --time={time}
+#SBATCH --ntasks={tasks}
+#####nome que aparece na fila de execucao do slurm
+#SBATCH --job-name=tccgreen
+#####usa de forma exclusiva (sozinho) o no ou nao
+#SBATCH --exclusive
+#####uma tarefa do array por configuracao pendente
+#SBATCH --array=0-{last}
+cd $SLURM_SUBMIT_DIR
+#### Lista no em execucao
+echo $SLURM_JOB_NODELIST
+
+module load GCC
+"""
+
+class SweepConfig:
+    def __init__(self) -> None:
+        self.optimization: str = "O3"
+        self.measureType: MeasureType = MeasureType.MAP
+        self.variant: str = DEFAULT_VARIANT
+        self.threads: int = 1
+        self.arraySize: int = 100
+        self.iterations: int = 1
+        self.repetitions: int = 5
+        self.completed: int = 0
+        self.prediction: dict[str, Prediction] | None = None # previsto dentro da tolerancia: nao entra no plano
+
+    def remaining(self) -> int:
+        return max(self.repetitions - self.completed, 0) if self.prediction is None else 0
+
+    def logName(self) -> str:
+        # mesma convencao dos scripts: <OTIMIZACAO>-<algoritmo><threads>.txt, com -<variante> quando nao e a baseline
+        variant = f"-{self.variant}" if self.variant != DEFAULT_VARIANT else ""
+        return f"{self.optimization}-{ALGORITHM_LETTERS[self.measureType]}{self.threads}{variant}.txt"
+
+def loadGrid(gridPath: str) -> list[SweepConfig]:
+    # {"optimizations": ["O3"], "threads": [32, 16, ...], "repetitions": 5, "variants": ["baseline", "simd"],
+    #  "algorithms": [{"algorithm": "m", "size": 40000, "iterations": 31}, ...]}
+    with open(gridPath, "r") as file:
+        grid = json.load(file)
+    configs: list[SweepConfig] = []
+    for optimization in grid["optimizations"]:
+        for algorithm in grid["algorithms"]:
+            name = algorithm["algorithm"]
+            measureType = {"m": MeasureType.MAP, "r": MeasureType.REDUCTION, "s": MeasureType.STENCIL}.get(name)
+            if measureType is None:
+                measureType = getMeasureTypeByName(name)
+            if measureType is None or measureType == MeasureType.IDLE:
+                raise ValueError(f"Unknown algorithm '{name}' in {gridPath}")
+            variants = algorithm.get("variants", grid.get("variants", [DEFAULT_VARIANT]))
+            for variant in variants:
+                if variant not in KERNEL_VARIANTS:
+                    raise ValueError(f"Unknown variant '{variant}' in {gridPath}")
+            for variant in variants:
+                for threads in algorithm.get("threads", grid["threads"]):
+                    config = SweepConfig()
+                    config.optimization = optimization
+                    config.measureType = measureType
+                    config.variant = variant
+                    config.threads = threads
+                    config.arraySize = algorithm["size"]
+                    config.iterations = algorithm["iterations"]
+                    config.repetitions = algorithm.get("repetitions", grid.get("repetitions", 5))
+                    configs.append(config)
+    return configs
+
+def countCompleted(logPath: str) -> dict[tuple[MeasureType, str, int, int, int], int]:
+    # medicoes completas (bloco terminado por linha em branco) por (algoritmo, variante, threads, tamanho, iteracoes)
+    counts: dict[tuple[MeasureType, str, int, int, int], int] = {}
+    if not os.path.isfile(logPath):
+        return counts
+    result = Result()
+    with openLog(logPath) as file:
+        for measure in streamMeasures(file, result):
+            if measure.type != MeasureType.IDLE and len(measure.packages) > 0:
+                key = (measure.type, measure.variant, result.threads, result.arraySize, result.iterations)
+                counts[key] = counts.get(key, 0) + 1
+    return counts
+
+def checkCompleted(configs: list[SweepConfig], outputFolder: str):
+    counts: dict[str, dict] = {}
+    for config in configs:
+        logName = config.logName()
+        if logName not in counts:
+            counts[logName] = countCompleted(os.path.join(outputFolder, logName))
+        config.completed = counts[logName].get((config.measureType, config.variant, config.threads, config.arraySize, config.iterations), 0)
+
+def getSweepMachine(outputFolder: str, ingested: list[IngestedFile]) -> str:
+    # a maquina dos logs ja medidos na pasta do sweep; sem nenhum, o nome da pasta (mesmo fallback do getMachine)
+    outputFolder = os.path.abspath(outputFolder)
+    machines = [getMachine(ingestedFile) for ingestedFile in ingested
+                if ingestedFile.error is None and os.path.dirname(os.path.abspath(ingestedFile.path)) == outputFolder]
+    return max(set(machines), key=machines.count) if len(machines) > 0 else os.path.basename(outputFolder)
+
+def checkPredicted(configs: list[SweepConfig], models: dict[ModelKey, PredictiveModel], machine: str, tolerance: float = DEFAULT_TOLERANCE) -> int:
+    # so configuracoes ainda sem nenhuma medicao e dentro da faixa medida (interpolacao); as ja comecadas terminam de rodar
+    # so os modelos da maquina do sweep: outra maquina tem outro tempo e outra energia para a mesma configuracao
+    predicted = 0
+    for config in configs:
+        if config.completed > 0:
+            continue
+        predictions = predictConfiguration(models, machine, config.measureType, config.optimization, config.variant, config.threads, config.arraySize, config.iterations)
+        if isPredicted(predictions, tolerance):
+            config.prediction = predictions
+            predicted += 1
+    return predicted
+
+def orderPending(configs: list[SweepConfig]) -> list[SweepConfig]:
+    # um binario por nivel de otimizacao; configuracoes com o mesmo tamanho de array ficam juntas
+    # (maior primeiro) e cada uma roda todas as repeticoes que faltam numa unica chamada
+    optimizations = list(dict.fromkeys(config.optimization for config in configs))
+    pending = [config for config in configs if config.remaining() > 0]
+    return sorted(pending, key=lambda config: (optimizations.index(config.optimization), -config.arraySize, config.iterations, config.measureType,
+                                               KERNEL_VARIANTS.index(config.variant), -config.threads))
+
+def getBinary(sourceFolder: str, optimization: str) -> str:
+    return os.path.join(sourceFolder, f"tccgreen{optimization}")
+
+def getCompileCommand(sourceFolder: str, optimization: str) -> str:
+    return f"g++ {os.path.join(sourceFolder, '*.cpp')} -o {getBinary(sourceFolder, optimization)} -{optimization} -fopenmp -Wall -lm"
+
+def getRunCommand(config: SweepConfig, sourceFolder: str, binary: str | None = None) -> str:
+    flags = " ".join(f"-{ALGORITHM_LETTERS[config.measureType]}" for _ in range(config.remaining()))
+    binary = binary if binary is not None else getBinary(sourceFolder, config.optimization)
+    variant = f" -v {config.variant}" if config.variant != DEFAULT_VARIANT else ""
+    return (f"OMP_NUM_THREADS={config.threads} {binary} -o {config.logName()} "
+            f"-n {config.arraySize} -i {config.iterations} -c {config.threads}{variant} {flags}")
+
+def writeLocalPlan(pending: list[SweepConfig], sourceFolder: str, outputFolder: str, scriptPath: str, binary: str | None = None):
+    # binary substitui os executaveis compilados (ex.: 'python3 stub.py' para testar o plano)
+    lines = ["#!/bin/bash", "# gerado por sweep.py; rode de novo o sweep.py para retomar de onde parou", "set -e", f"cd {outputFolder}"]
+    compiled: set[str] = set()
+    for config in pending:
+        if binary is None and config.optimization not in compiled:
+            lines.append(getCompileCommand(sourceFolder, config.optimization))
+            compiled.add(config.optimization)
+        lines.append(getRunCommand(config, sourceFolder, binary))
+    with open(scriptPath, "w") as file:
+        file.write("\n".join(lines) + "\n")
+    os.chmod(scriptPath, 0o755)
+
+def writeSlurmPlan(pending: list[SweepConfig], sourceFolder: str, outputFolder: str, scriptPath: str, partition: str = "cpulong", time: str = "05:00:00", tasks: int = 32):
+    lines = [SLURM_HEADER.format(partition=partition, time=time, tasks=tasks, last=max(len(pending) - 1, 0))]
+    lines.append(f"cd {outputFolder}")
+    lines.append("case $SLURM_ARRAY_TASK_ID in")
+    for i, config in enumerate(pending):
+        # flock: so a primeira tarefa de cada otimizacao compila, as outras esperam
+        binary = getBinary(sourceFolder, config.optimization)
+        lines.append(f"    {i})")
+        lines.append(f"        flock {binary}.lock -c \"[ -x {binary} ] || {getCompileCommand(sourceFolder, config.optimization)}\"")
+        lines.append(f"        {getRunCommand(config, sourceFolder)}")
+        lines.append("        ;;")
+    lines.append("esac")
+    with open(scriptPath, "w") as file:
+        file.write("\n".join(lines) + "\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumable parameter sweep: skips configurations whose logs already have enough measurements")
+    parser.add_argument("grid", help="JSON grid (optimizations, threads, repetitions, algorithms)")
+    parser.add_argument("-d", "--directory", default=".", help="folder with the logs (default: current folder)")
+    parser.add_argument("--source", default=SOURCE_FOLDER, help="folder with the harness sources")
+    parser.add_argument("--local", metavar="SCRIPT", help="write a bash script running the pending configurations")
+    parser.add_argument("--slurm", metavar="SCRIPT", help="write a slurm job-array script, one task per pending configuration")
+    parser.add_argument("--binary", default=None, help="command used instead of the compiled harness in --local (e.g. 'python3 stub.py')")
+    parser.add_argument("--predict", nargs="*", metavar="FOLDER", default=None,
+                        help="skip unmeasured configurations predicted within --tolerance by models fitted on these folders (default: -d)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="relative half-width of the 95%% prediction interval accepted by --predict")
+    parser.add_argument("--outliers", choices=OUTLIER_METHODS, default=None, help="reject outlier repetitions before fitting the --predict models")
+    parser.add_argument("--machine", default=None, help="machine whose --predict models are used (host or results folder; default: the one of the logs in -d)")
+    parser.add_argument("--partition", default="cpulong")
+    parser.add_argument("--time", default="05:00:00", help="slurm time limit per task")
+    args = parser.parse_args()
+
+    configs = loadGrid(args.grid)
+    checkCompleted(configs, args.directory)
+    predicted = 0
+    if args.predict is not None:
+        ingested = ingestTree(args.predict or [args.directory], outliers=args.outliers)
+        machine = args.machine if args.machine is not None else getSweepMachine(args.directory, ingested)
+        predicted = checkPredicted(configs, fitIngestedModels(ingested), machine, args.tolerance)
+    pending = orderPending(configs)
+    for config in configs:
+        if config.prediction is not None:
+            status = f"predicted: {formatPrediction(config.prediction)}"
+        else:
+            status = "done" if config.remaining() == 0 else f"{config.remaining()} to run"
+        print(f"{config.logName():<20} {getMeasureTypeName(config.measureType):<9} {config.arraySize}x{config.arraySize} {config.iterations}it: "
+              f"{config.completed}/{config.repetitions} ({status})")
+    print(f"{len(pending)} of {len(configs)} configuration(s) pending" + (f", {predicted} skipped as predicted within ±{args.tolerance:.0%}" if args.predict is not None else ""))
+
+    if args.local is not None:
+        writeLocalPlan(pending, os.path.abspath(args.source), os.path.abspath(args.directory), args.local, args.binary)
+    if args.slurm is not None:
+        if len(pending) == 0:
+            print("Nothing to run, slurm script not written")
+            sys.exit(0)
+        writeSlurmPlan(pending, os.path.abspath(args.source), os.path.abspath(args.directory), args.slurm, args.partition, args.time)
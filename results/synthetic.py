@@ -0,0 +1,110 @@
+import argparse
+import os
+import random
+from typing import TextIO
+from measure import KERNEL_VARIANTS, MeasureType, getMeasureTypeByName, getMeasureTypeName
+from stub import ACTIVE_POWER, DRAM_POWER, FLOPS_PER_ELEMENT, FLOPS_PER_THREAD, IDLE_POWER, VARIANT_SPEEDUP
+from sweep import ALGORITHM_LETTERS
+
+DOMAINS = ["PKG", "PP0", "PP1", "DRAM"]
+DOMAIN_SHARE = {"PKG": 1.0, "PP0": 0.9, "PP1": 0.005} # fracao da energia do pacote em cada dominio, como nos logs do i7-9750h
+
+class SyntheticConfig:
+    def __init__(self) -> None:
+        self.measureType: MeasureType = MeasureType.MAP
+        self.optimization: str = "O3"
+        self.variant: str = "baseline"
+        self.threads: int = 1
+        self.arraySize: int = 40000
+        self.iterations: int = 31
+        self.repetitions: int = 5
+        self.packages: int = 2
+        self.domains: list[str] = ["PKG", "DRAM"]
+        self.noise: float = 0.02 # desvio relativo de cada medida
+        self.outlierRate: float = 0.0 # fracao das repeticoes com um pico de tempo e energia
+        self.outlierScale: float = 1.5
+
+    def getLogName(self) -> str:
+        # mesmo nome do sweep.py
+        variant = f"-{self.variant}" if self.variant != "baseline" else ""
+        return f"{self.optimization}-{ALGORITHM_LETTERS[self.measureType]}{self.threads}{variant}.txt"
+
+def writePackages(out: TextIO, config: SyntheticConfig, rng: random.Random, seconds: float, activeThreads: int, scale: float = 1.0):
+    for package in range(config.packages):
+        pkg = (IDLE_POWER + ACTIVE_POWER * activeThreads / config.packages) * seconds * rng.gauss(1.0, config.noise) * scale
+        dram = DRAM_POWER * (2 if activeThreads > 0 else 1) / 2 * seconds * rng.gauss(1.0, config.noise) * scale
+        values = {domain: pkg * share for domain, share in DOMAIN_SHARE.items()} | {"DRAM": dram}
+        print(f"Package {package}: " + ", ".join(f"{domain}={values[domain]:g}J" for domain in DOMAINS if domain in config.domains), file=out)
+
+def writeIdle(out: TextIO, config: SyntheticConfig, rng: random.Random):
+    print("Measuring idle (1s)", file=out)
+    writePackages(out, config, rng, 1.0, 0)
+    print(file=out)
+
+def writeLog(out: TextIO, config: SyntheticConfig, logName: str | None = None, seed: int | None = None):
+    # mesmo texto do tccgreen: cabecalho dos argumentos e, por repeticao, idle, algoritmo e idle
+    rng = random.Random(seed)
+    name = getMeasureTypeName(config.measureType)
+    arraySize = config.arraySize + 2 if config.measureType == MeasureType.STENCIL else config.arraySize
+    print(f"Saida alterada para {logName or config.getLogName()}\n", file=out)
+    if config.variant != "baseline":
+        print(f"Variante alterada para {config.variant}\n", file=out)
+    print(f"Tamanho do array alterado para {config.arraySize}x{config.arraySize}\n", file=out)
+    print(f"Quantidade de iteracoes alterado para {config.iterations}\n", file=out)
+    print(f"Quantidade maxima de threads alterada para {config.threads}\n", file=out)
+    flops = config.arraySize * config.arraySize * config.iterations * FLOPS_PER_ELEMENT[name]
+    for _ in range(config.repetitions):
+        scale = config.outlierScale if rng.random() < config.outlierRate else 1.0
+        seconds = flops / (FLOPS_PER_THREAD[name] * VARIANT_SPEEDUP[config.variant] * config.threads ** 0.9) * rng.gauss(1.0, config.noise) * scale
+        writeIdle(out, config, rng)
+        print(f"Initialize {name} ({arraySize}x{arraySize} array)", file=out)
+        print(f"Execute {name}", file=out)
+        print(f"Execution time: {seconds:g}s", file=out)
+        writePackages(out, config, rng, seconds, config.threads)
+        print(f"Clean {name}", file=out)
+        print(file=out)
+        writeIdle(out, config, rng)
+
+def generateTree(folder: str, base: SyntheticConfig, measureTypes: list[MeasureType], optimizations: list[str], threads: list[int],
+                 variants: list[str], seed: int | None = None) -> list[str]:
+    # um log por configuracao, como uma pasta de resultados do sweep
+    os.makedirs(folder, exist_ok=True)
+    paths: list[str] = []
+    rng = random.Random(seed)
+    for measureType in measureTypes:
+        for optimization in optimizations:
+            for variant in variants:
+                for threadCount in threads:
+                    config = SyntheticConfig()
+                    config.__dict__.update(base.__dict__)
+                    config.measureType, config.optimization, config.variant, config.threads = measureType, optimization, variant, threadCount
+                    path = os.path.join(folder, config.getLogName())
+                    with open(path, "w") as file:
+                        writeLog(file, config, seed=rng.getrandbits(32))
+                    paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic tccgreen logs in the harness text format")
+    parser.add_argument("folder", help="output folder")
+    parser.add_argument("-a", "--algorithms", nargs="+", choices=["map", "reduction", "stencil"], default=["map", "reduction", "stencil"])
+    parser.add_argument("-O", "--optimizations", nargs="+", default=["O0", "O3"])
+    parser.add_argument("-t", "--threads", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("-v", "--variants", nargs="+", default=["baseline"], choices=KERNEL_VARIANTS)
+    parser.add_argument("-r", "--repetitions", type=int, default=5, help="repetitions per log")
+    parser.add_argument("-p", "--packages", type=int, default=2)
+    parser.add_argument("-d", "--domains", nargs="+", choices=DOMAINS, default=["PKG", "DRAM"], help="RAPL domains in each Package line")
+    parser.add_argument("-n", "--size", type=int, default=40000)
+    parser.add_argument("-i", "--iterations", type=int, default=31)
+    parser.add_argument("--noise", type=float, default=0.02, help="relative standard deviation of every measure")
+    parser.add_argument("--outlier-rate", type=float, default=0.0, help="fraction of repetitions with a time and energy spike")
+    parser.add_argument("--outlier-scale", type=float, default=1.5, help="size of the spikes")
+    parser.add_argument("-s", "--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    base = SyntheticConfig()
+    base.arraySize, base.iterations, base.repetitions = args.size, args.iterations, args.repetitions
+    base.packages, base.domains, base.noise = args.packages, args.domains, args.noise
+    base.outlierRate, base.outlierScale = args.outlier_rate, args.outlier_scale
+    paths = generateTree(args.folder, base, [getMeasureTypeByName(name) for name in args.algorithms], args.optimizations, args.threads, args.variants, args.seed)
+    print(f"{len(paths)} log(s) written to {args.folder} ({len(paths) * args.repetitions} repetitions)")
@@ -0,0 +1,12 @@
+import os
+import sys
+import pytest
+
+# os modulos do results/ sao importados pelo nome, como quando rodados de dentro da pasta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from helpers import runStub
+
+@pytest.fixture
+def stubLog(tmp_path):
+    # mapa na baseline, depois o stencil tiled: cobre a troca de variante no meio do log
+    return runStub(str(tmp_path), "O3-m4", ["-c", "4", "-n", "200", "-i", "2", "-m", "-m", "-v", "tiled", "-s", "-s"], records=True)
@@ -0,0 +1,47 @@
+import math
+import os
+import subprocess
+import sys
+import numpy as np
+from average import AverageValues, PackageAverage, PhaseAverage, ResultAverage
+from measure import Measure, PackageMeasure, PhaseMeasure, Result
+
+RESULTS_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def runStub(folder: str, name: str, arguments: list[str], records: bool = False) -> str:
+    # log sintetico do stub.py (mesmo formato do tccgreen); com records=True tambem grava o CSV da mesma execucao
+    logPath = os.path.join(folder, f"{name}.txt")
+    recordArguments = ["-d", os.path.join(folder, f"{name}.csv")] if records else []
+    subprocess.run([sys.executable, os.path.join(RESULTS_FOLDER, "stub.py"), "-o", logPath] + recordArguments + arguments,
+                   check=True, stdout=subprocess.DEVNULL, env=dict(os.environ, OMP_NUM_THREADS="4"))
+    return logPath
+
+def snapshot(value):
+    # estrutura comparavel com == dos objetos do parser e das medias (sem o estado temporario do addMeasure)
+    match value:
+        case AverageValues():
+            return ("values", snapshot(value.values()))
+        case Result():
+            return {name: snapshot(field) for name, field in vars(value).items()}
+        case ResultAverage():
+            return {name: snapshot(field) for name, field in vars(value).items() if name not in ["lastIdle", "pendingKernel"]}
+        case PackageAverage() | PhaseAverage() | Measure() | PackageMeasure() | PhaseMeasure():
+            return {name: snapshot(field) for name, field in vars(value).items()}
+        case dict():
+            return {key: snapshot(field) for key, field in value.items()}
+        case list() | tuple():
+            return [snapshot(field) for field in value]
+        case np.ndarray():
+            return snapshot(value.tolist())
+        case float() if math.isnan(value):
+            return None # NaN != NaN: leitura rejeitada igual nos dois lados
+        case _:
+            return value
+
+def snapshotAverages(averages: list[ResultAverage]) -> list:
+    return [snapshot(average) for average in averages]
+
+def withoutMeasures(snapshots: list) -> list:
+    for average in snapshots:
+        average["baseResult"]["measures"] = []
+    return snapshots
@@ -0,0 +1,125 @@
+import math
+import os
+import numpy as np
+import pytest
+from average import AverageValues, applySteadyState, calculateRecordAverages, calculateVariantAverages, getSteadyStateSummary
+from measure import analyzeFile
+from metrics import METRICS, ResultTable, calculateMetric
+from roofline import MachineProfile, analyzeRoofline
+from helpers import RESULTS_FOLDER, snapshotAverages, withoutMeasures
+
+def averageOf(values) -> AverageValues:
+    average = AverageValues()
+    average.addMany(values)
+    return average
+
+def testStatistics():
+    values = np.array([1.0, 2.0, 2.5, 3.0, 100.0])
+    average = averageOf(values)
+    assert average.avg() == pytest.approx(values.mean())
+    assert average.stdDev() == pytest.approx(values.std()) # populacional
+    assert average.median() == 2.5
+    assert average.mad() == pytest.approx(np.median(np.abs(values - 2.5)))
+    assert average.trimmedMean(0.2) == pytest.approx(np.mean([2.0, 2.5, 3.0]))
+    assert average.percentile([25, 75]).tolist() == np.percentile(values, [25, 75]).tolist()
+
+def testSmallValuesKeepPrecision():
+    # tempos abaixo de 1e-4 s nao podem virar 0 por arredondamento
+    average = averageOf([3e-5, 4e-5, 5e-5])
+    assert average.avg() == pytest.approx(4e-5) and average.min() == 3e-5 and 0 < average.stdDev() < 1e-4
+
+def testEmpty():
+    average = AverageValues()
+    assert np.isnan(average.avg()) and np.isnan(average.median()) and np.isnan(average.trimmedMean())
+
+def testIncrementalAdd():
+    # add de um por um (crescendo o array) e addMany dao os mesmos valores e estatisticas
+    values = np.linspace(0.5, 2.0, 37)
+    single = AverageValues()
+    for value in values:
+        single.add(value)
+    assert single.values().tolist() == averageOf(values).values().tolist()
+    assert single.stdDev() == averageOf(values).stdDev()
+
+@pytest.mark.parametrize("method", ["mad", "iqr"])
+def testOutliers(method):
+    average = averageOf([1.0, 1.1, 0.9, 1.05, 0.95, 10.0])
+    assert average.outliers(method).tolist() == [False] * 5 + [True]
+
+def testBootstrapCi():
+    average = averageOf(np.random.default_rng(1).normal(10.0, 1.0, 200))
+    low, high = average.bootstrapCi("median")
+    assert low < average.median() < high
+    assert average.bootstrapCi("median") == (low, high) # semente fixa: reproduzivel
+
+def testSteadyStateKeepsRepetitionsAligned(stubLog):
+    # descartar aquecimento e outliers remove a repeticao inteira: tempo, energias e fases continuam com o mesmo tamanho
+    allAvg = calculateVariantAverages(analyzeFile(stubLog))[0]
+    times = allAvg.executionTimeAverage.values().tolist()
+    applySteadyState([allAvg], warmup=1)
+    assert allAvg.executionTimeAverage.values().tolist() == times[1:]
+    counts = {values.count() for values in allAvg.repetitionValues()}
+    assert counts == {len(times) - 1}
+    assert allAvg.phaseAverages["init"].time.count() == len(times) - 1
+
+def testRejectedValues():
+    # NaN e leitura rejeitada: ocupa a posicao da repeticao, mas nao entra nas estatisticas
+    average = averageOf([1.0, math.nan, 3.0, 2.0])
+    assert (average.count(), average.validCount()) == (4, 3)
+    assert (average.min(), average.max(), average.avg(), average.median()) == (1.0, 3.0, 2.0, 2.0)
+    assert average.percentile(50) == 2.0
+    assert average.outliers("iqr").tolist() == [False, False, False, False]
+    assert math.isnan(averageOf([math.nan]).avg())
+
+def testNegativeReadings():
+    # O0-m1 do cluster: o contador da DRAM do pacote 1 deu a volta na primeira repeticao (DRAM=-257097J)
+    allAvg = calculateVariantAverages(analyzeFile(os.path.join(RESULTS_FOLDER, "cluster_large", "O0-m1.txt")))[0]
+    assert allAvg.invalidReadings() == {"dram": 1}
+    assert getSteadyStateSummary(allAvg) == "discarded 1 negative DRAM reading(s)"
+    dram = allAvg.allPackageAverage.dram
+    assert (dram.count(), dram.validCount()) == (allAvg.executionTimeAverage.count(), allAvg.executionTimeAverage.count() - 1)
+    assert math.isnan(dram.values()[0]) and math.isnan(allAvg.packageAverages[1].dram.values()[0])
+    assert dram.min() > 0
+    table = ResultTable([allAvg])
+    dramPerByte = calculateMetric(METRICS["dram/b"], table)[0][0]
+    assert 0 < dramPerByte == pytest.approx(dram.avg() / table.bytes[0] * 1e9)
+    assert analyzeRoofline([allAvg], MachineProfile())[0].dramPerByte == pytest.approx(dramPerByte)
+    # a repeticao com a leitura invalida era a primeira: descartada como aquecimento, nao sobra nada a relatar
+    applySteadyState([allAvg], warmup=1)
+    assert allAvg.invalidReadings() == {} and dram.validCount() == dram.count()
+    assert getSteadyStateSummary(allAvg) == "discarded 1 warm-up"
+
+def testNegativeRecordReadings(stubLog):
+    # mesmas leituras negativas no CSV: a agregacao por coluna rejeita igual a feita medicao por medicao
+    recordPath = stubLog.replace(".txt", ".csv")
+    with open(recordPath) as file:
+        lines = file.read().splitlines()
+    kernel = next(i for i, line in enumerate(lines) if not line.startswith("#") and line.split(",")[1] != "0")
+    idle = next(i for i, line in enumerate(lines) if not line.startswith("#") and line.split(",")[1] == "0")
+    phase = next(i for i, line in enumerate(lines) if line.startswith("# phase,1,"))
+    for row, column in [(kernel, -1), (idle, -4), (phase, -1)]: # DRAM do ultimo pacote, PKG do ultimo pacote, DRAM da fase
+        fields = lines[row].split(",")
+        fields[column] = f"-{fields[column]}"
+        lines[row] = ",".join(fields)
+    with open(recordPath, "w") as file:
+        file.write("\n".join(lines) + "\n")
+    expected = calculateVariantAverages(analyzeFile(recordPath))
+    assert expected[0].invalidReadings() == {"dram": 2, "pkg": 1}
+    assert snapshotAverages(calculateRecordAverages(recordPath)) == withoutMeasures(snapshotAverages(expected))
+
+def testDramShareSkipsInvalidRepetitions():
+    # a parcela da DRAM usa o pacote so das repeticoes em que a DRAM e valida
+    allAvg = calculateVariantAverages(analyzeFile(os.path.join(RESULTS_FOLDER, "cluster_large", "O0-m1.txt")))[0]
+    pkg, dram = allAvg.allPackageAverage.pkg.values()[1:], allAvg.allPackageAverage.dram.values()[1:]
+    share = calculateMetric(METRICS["dram"], ResultTable([allAvg]))[0][0]
+    assert share == pytest.approx(100 * dram.sum() / (pkg + dram).sum())
+    assert 0 < share < 100
+
+def testDynamicSkipsInvalidReadings():
+    # a correcao pelo idle nao se aplica a uma leitura invalida do kernel: a repeticao fica fora da DRAM dinamica
+    allAvg = calculateVariantAverages(analyzeFile(os.path.join(RESULTS_FOLDER, "cluster_large", "O0-m1.txt")))[0]
+    dynamicDram = allAvg.dynamicAllPackageAverage.dram
+    assert math.isnan(dynamicDram.values()[0]) and math.isnan(allAvg.dynamicPackageAverages[1].dram.values()[0])
+    assert dynamicDram.validCount() == dynamicDram.count() - 1 and dynamicDram.min() > 0
+    assert not np.isnan(allAvg.dynamicPackageAverages[0].dram.values()).any() # o outro pacote continua inteiro
+    assert calculateMetric(METRICS["dynamic-dram"], ResultTable([allAvg]))[0][0] == pytest.approx(dynamicDram.avg())
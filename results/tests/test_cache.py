@@ -0,0 +1,61 @@
+import os
+import shutil
+import pytest
+from average import calculateVariantAverages
+from cache import getCachePath, loadResults
+from measure import analyzeFile
+from helpers import RESULTS_FOLDER, snapshot, withoutMeasures
+
+def freshParse(filePath: str) -> list:
+    return [snapshot(average) for average in calculateVariantAverages(analyzeFile(filePath))]
+
+def cachedLoad(filePath: str, withMeasures: bool = True) -> list:
+    return [snapshot(average) for _, average in loadResults(filePath, withMeasures=withMeasures, minBytes=0)]
+
+@pytest.mark.parametrize("extension", [".txt", ".csv"])
+def testCachedEqualsFresh(stubLog, extension):
+    filePath = stubLog[:-len(".txt")] + extension
+    expected = freshParse(filePath)
+    assert cachedLoad(filePath) == expected # grava o cache
+    assert os.path.isfile(getCachePath(filePath))
+    assert cachedLoad(filePath) == expected # le do cache
+    assert cachedLoad(filePath, withMeasures=False) == withoutMeasures(expected)
+
+def testCachedFields(stubLog):
+    # campos que o cache nao guardava: host/job/tarefa, probe, fases e pico de RSS por medicao
+    cachedLoad(stubLog)
+    result, average = loadResults(stubLog, minBytes=0)[0]
+    assert result.host is not None and result.bandwidth is None
+    kernel = next(measure for measure in result.measures if measure.phases)
+    assert kernel.host == result.host and kernel.peakRss is not None
+    assert list(kernel.phases) == ["init", "clean"] and len(kernel.phases["init"].packages) == 2
+    assert average.phaseAverages["init"].time.count() == average.executionTimeAverage.count()
+
+def testProbe(tmp_path):
+    logPath = os.path.join(str(tmp_path), "O3-m4.txt")
+    with open(logPath, "w") as file:
+        file.write("Probe Bandwidth (triad): 12.5 GB/s\nProbe Compute: 30 GFLOP/s\n\n")
+    cachedLoad(logPath)
+    result, _ = loadResults(logPath, minBytes=0)[0]
+    assert (result.bandwidth, result.peakFlops) == (12.5, 30.0)
+
+def testStaleCache(stubLog):
+    cachedLoad(stubLog)
+    with open(stubLog, "a") as file:
+        file.write("Measuring idle (1s)\nPackage 0: PKG=45J, DRAM=10J\nPackage 1: PKG=45J, DRAM=10J\n\n")
+    assert cachedLoad(stubLog) == freshParse(stubLog)
+
+def testTouchedFile(stubLog):
+    # mesmo conteudo com outra data: o cache e reaproveitado pelo hash
+    expected = cachedLoad(stubLog)
+    os.utime(stubLog, (0, 0))
+    assert cachedLoad(stubLog) == expected
+
+def testShippedFolder(tmp_path):
+    folder = shutil.copytree(os.path.join(RESULTS_FOLDER, "cluster_small"), str(tmp_path / "cluster_small"), ignore=shutil.ignore_patterns("__cache__", "graphs"))
+    for fileName in sorted(os.listdir(folder)):
+        filePath = os.path.join(folder, fileName)
+        if os.path.isfile(filePath):
+            expected = freshParse(filePath)
+            cachedLoad(filePath)
+            assert cachedLoad(filePath) == expected, fileName
@@ -0,0 +1,79 @@
+import argparse
+import math
+import os
+import re
+import warnings
+import numpy as np
+import pytest
+from compare import addCompareArguments, permutationTest, runCompare, studentTwoSided, welchTest
+from helpers import runStub
+
+def parseCompare(arguments: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    addCompareArguments(parser)
+    return parser.parse_args(arguments)
+
+@pytest.mark.parametrize("t", [0.0, 0.1, 0.5, 1.0, 2.0, 4.303, 10.0, 100.0])
+def testStudentClosedForm(t):
+    # df=1 e Cauchy, df=2 tem forma fechada: conferem a beta incompleta nos dois ramos da simetria
+    tValues = np.array([t, -t])
+    assert studentTwoSided(tValues, np.full(2, 1.0)) == pytest.approx(1 - 2 / math.pi * math.atan(t), rel=1e-9, abs=1e-12)
+    assert studentTwoSided(tValues, np.full(2, 2.0)) == pytest.approx(1 - t / math.sqrt(t * t + 2), rel=1e-9, abs=1e-12)
+
+def testWelch():
+    base, new = np.array([[1.0, 2, 3, 4, 5]]), np.array([[3.0, 4, 5, 6, 7]])
+    assert welchTest(base, new)[0] == pytest.approx(0.0805, abs=5e-5)
+    assert welchTest(new, base)[0] == pytest.approx(welchTest(base, new)[0])
+    # amostras de tamanhos diferentes no mesmo array, completadas com nan
+    padded = welchTest(np.array([[1.0, 2, 3, 4, 5], [1.0, 2, 3, np.nan, np.nan]]), np.array([[3.0, 4, 5, 6, 7], [3.0, 4, 5, 6, 7]]))
+    assert padded[0] == pytest.approx(0.0805, abs=5e-5)
+    assert 0 < padded[1] < 1
+
+def testZeroVariance():
+    base = np.array([[2.0, 2.0, 2.0], [2.0, 2.0, 2.0]])
+    new = np.array([[2.0, 2.0, 2.0], [3.0, 3.0, 3.0]])
+    assert welchTest(base, new).tolist() == [1.0, 0.0]
+    assert permutationTest(base, new, resamples=200)[0] == 1.0
+
+def testTooFewSamples():
+    base = np.array([[1.0, np.nan, np.nan], [1.0, 2.0, 3.0]])
+    new = np.array([[5.0, 6.0, 7.0], [4.0, np.nan, np.nan]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning) # sem p-valor, e sem aviso do numpy na saida do compare
+        assert np.isnan(welchTest(base, new)).all()
+        assert np.isnan(permutationTest(base, new, resamples=200)).all()
+
+def testPermutation():
+    base, new = np.array([[1.0, 2, 3, 4, 5]]), np.array([[3.0, 4, 5, 6, 7]])
+    assert permutationTest(base, new, resamples=2000)[0] == pytest.approx(32 / 252, abs=0.02) # exato: 32 das C(10,5) divisoes
+    assert permutationTest(base, base, resamples=2000)[0] == 1.0
+    separated = permutationTest(base, base + 100, resamples=2000)[0]
+    assert separated == pytest.approx(2 / 252, abs=0.01) # so as 2 das C(10,5) divisoes tao extremas quanto a observada
+
+def slowDown(folder: str, factor: float):
+    # regressao injetada: todos os tempos de execucao do log multiplicados
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        with open(path) as file:
+            text = file.read()
+        text = re.sub(r"Execution time: ([0-9.e+-]+)s", lambda match: f"Execution time: {float(match.group(1)) * factor:g}s", text)
+        with open(path, "w") as file:
+            file.write(text)
+
+@pytest.mark.parametrize("test", ["welch", "permutation"])
+def testRunCompare(tmp_path, capsys, test):
+    folders = []
+    for name in ["base", "same", "slow"]:
+        folder = tmp_path / name
+        folder.mkdir()
+        runStub(str(folder), "O3-m4", ["-c", "4", "-n", "200", "-i", "2"] + ["-m"] * 6)
+        folders.append(str(folder))
+    slowDown(folders[2], 1.5)
+    options = ["--test", test, "--resamples", "2000", "--min-change", "0.1", "-j", "1"] # acima do ruido de 2% do stub
+    assert runCompare(parseCompare([folders[0], folders[1]] + options)) == 0
+    assert runCompare(parseCompare([folders[0], folders[2]] + options)) == 1
+    output = capsys.readouterr().out
+    assert "REGRESSION" in output and "1 significant regression(s)" in output
+    assert runCompare(parseCompare([folders[2], folders[0]] + options)) == 0 # mais rapido e melhora, nao regressao
+    assert "improvement" in capsys.readouterr().out
+    assert runCompare(parseCompare([folders[0]])) == 2
@@ -0,0 +1,65 @@
+import os
+import shutil
+import pytest
+from average import calculateVariantAverages
+from database import ingestLog, openDatabase, queryAverages
+from measure import analyzeFile
+
+def storedRows(connection) -> list[tuple]:
+    measures = connection.execute("SELECT sequence, type, variant, threads, iterations, arraySize, executionTime, pkg, pp0, pp1, dram FROM measures ORDER BY sequence").fetchall()
+    packages = connection.execute("SELECT m.sequence, p.pkgNumber, p.pkg, p.pp0, p.pp1, p.dram FROM packages p JOIN measures m ON m.id = p.measureId ORDER BY m.sequence, p.pkgNumber").fetchall()
+    return measures + packages
+
+def ingestOnce(tmp_path, logPath: str) -> list[tuple]:
+    connection = openDatabase(str(tmp_path / "once.db"))
+    ingestLog(connection, logPath)
+    rows = storedRows(connection)
+    connection.close()
+    return rows
+
+def testResumeEveryLine(tmp_path, stubLog):
+    # o log cortado em qualquer linha e completado depois deve gerar as mesmas linhas do log inteiro de uma vez
+    expected = ingestOnce(tmp_path, stubLog)
+    assert {row[2] for row in expected if isinstance(row[2], str)} == {"baseline", "tiled"}
+    with open(stubLog, "rb") as file:
+        lines = file.readlines()
+    growing = str(tmp_path / "growing" / os.path.basename(stubLog))
+    os.makedirs(os.path.dirname(growing))
+    for cut in range(1, len(lines)):
+        databasePath = tmp_path / "resumed.db"
+        if databasePath.exists():
+            databasePath.unlink()
+        connection = openDatabase(str(databasePath))
+        with open(growing, "wb") as file:
+            file.writelines(lines[:cut])
+        ingestLog(connection, growing)
+        with open(growing, "ab") as file:
+            file.writelines(lines[cut:])
+        ingestLog(connection, growing)
+        assert storedRows(connection) == expected, f"corte na linha {cut}"
+        connection.close()
+
+def testRewrittenLog(tmp_path, stubLog):
+    # um log reescrito por outra execucao substitui as medicoes antigas em vez de somar a elas
+    connection = openDatabase(str(tmp_path / "results.db"))
+    copy = str(tmp_path / "copy.txt")
+    shutil.copy(stubLog, copy)
+    ingestLog(connection, copy)
+    with open(copy, "w") as file:
+        file.write("Quantidade maxima de threads alterada para 2\n\n")
+    ingestLog(connection, copy)
+    assert connection.execute("SELECT COUNT(*) FROM measures").fetchone()[0] == 0
+    connection.close()
+
+def testQueryMatchesLogAverages(tmp_path, stubLog):
+    # o banco agrega as mesmas medicoes do log, sem arredondar (tempos do stub ficam abaixo de 1e-4 s)
+    connection = openDatabase(str(tmp_path / "results.db"))
+    ingestLog(connection, stubLog)
+    for calcAvg in calculateVariantAverages(analyzeFile(stubLog)):
+        average = queryAverages(connection, "time", measureType=calcAvg.measureType, variant=calcAvg.baseResult.variant)[0]
+        expected = calcAvg.executionTimeAverage
+        assert average.count == expected.count()
+        assert (average.min, average.max) == (expected.min(), expected.max())
+        assert average.avg == pytest.approx(expected.avg(), rel=1e-12)
+        assert average.stdDev == pytest.approx(expected.stdDev(), rel=1e-6)
+    connection.close()
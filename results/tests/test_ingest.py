@@ -0,0 +1,22 @@
+import os
+from ingest import findLogs, ingestTree
+from metrics import ResultTable, exportCsv
+from helpers import runStub
+
+def testFindLogs(tmp_path, stubLog):
+    # o CSV do tccgreen -d substitui o .txt da mesma execucao; o export das metricas na mesma pasta nao e log
+    folder = str(tmp_path)
+    runStub(folder, "O3-r4", ["-c", "4", "-n", "200", "-i", "2", "-r"])
+    table = ResultTable([ingested.average for ingested in ingestTree(folder, workers=1)])
+    with open(os.path.join(folder, "metrics.csv"), "w", newline="") as file:
+        exportCsv(table, file)
+    assert [os.path.basename(path) for path in findLogs(folder)] == ["O3-m4.csv", "O3-r4.txt"]
+    assert all(ingested.error is None for ingested in ingestTree(folder, workers=1))
+
+def testExportNextToTextLog(tmp_path):
+    # export com o mesmo nome de um log em texto nao esconde o log
+    folder = str(tmp_path)
+    runStub(folder, "O3-m2", ["-c", "2", "-n", "200", "-i", "2", "-m"])
+    with open(os.path.join(folder, "O3-m2.csv"), "w") as file:
+        file.write("file,label,algorithm\n")
+    assert [os.path.basename(path) for path in findLogs(folder)] == ["O3-m2.txt"]
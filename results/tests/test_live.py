@@ -0,0 +1,44 @@
+import os
+from average import calculateFileAverages
+from live import LiveLog
+from helpers import runStub
+
+def liveTimes(liveLog: LiveLog) -> dict[str, list[float]]:
+    return {variant: allAvg.executionTimeAverage.values().tolist() for variant, allAvg in liveLog.averages.items()}
+
+def fileTimes(filePath: str) -> dict[str, list[float]]:
+    return {allAvg.baseResult.variant: allAvg.executionTimeAverage.values().tolist() for allAvg in calculateFileAverages(filePath)}
+
+def testAppend(tmp_path, stubLog):
+    with open(stubLog, "rb") as file:
+        content = file.read()
+    growing = str(tmp_path / "growing.txt")
+    liveLog = LiveLog(growing)
+    for cut in [0, len(content) // 3, len(content) // 2 + 7, len(content)]:
+        with open(growing, "ab") as file:
+            file.write(content[os.path.getsize(growing) if os.path.exists(growing) else 0:cut])
+        liveLog.poll()
+    assert liveTimes(liveLog) == fileTimes(stubLog)
+
+def testReplacedBySameSizeOrLarger(tmp_path, stubLog):
+    # outra execucao grava no mesmo caminho: as medias sao as do arquivo novo, nao a continuacao do antigo
+    liveLog = LiveLog(stubLog)
+    liveLog.poll()
+    newLog = runStub(str(tmp_path), "new", ["-c", "2", "-n", "300", "-i", "3"] + ["-r"] * 8)
+    os.replace(newLog, stubLog)
+    liveLog.poll()
+    assert liveTimes(liveLog) == fileTimes(stubLog)
+
+def testRewrittenInPlace(stubLog):
+    # mesmo inode e mesmo tamanho, conteudo diferente
+    liveLog = LiveLog(stubLog)
+    liveLog.poll()
+    with open(stubLog, "r") as file:
+        content = file.read()
+    modified = os.stat(stubLog).st_mtime_ns
+    with open(stubLog, "w") as file:
+        file.write(content.replace("PKG=4", "PKG=5"))
+    os.utime(stubLog, ns=(modified + 10 ** 9, modified + 10 ** 9)) # o relogio do sistema de arquivos pode nao ter avancado
+    liveLog.poll()
+    assert liveTimes(liveLog) == fileTimes(stubLog)
+    assert [allAvg.idleAverage.pkg.values().tolist() for allAvg in liveLog.averages.values()] == [allAvg.idleAverage.pkg.values().tolist() for allAvg in calculateFileAverages(stubLog)]
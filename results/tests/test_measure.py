@@ -0,0 +1,80 @@
+import glob
+import io
+import os
+import pytest
+from average import calculateFileAverages, calculateRecordAverages, calculateVariantAverages
+from measure import MeasureType, analyzeFile, streamMeasures
+from helpers import RESULTS_FOLDER, snapshotAverages, withoutMeasures
+
+SHIPPED_LOGS = sorted(glob.glob(os.path.join(RESULTS_FOLDER, "*_*", "*.txt")))
+
+LOG = """Tamanho do array alterado para 40000x40000
+
+Quantidade de iteracoes alterado para 31
+
+Quantidade maxima de threads alterada para 8
+
+Measuring idle (1s)
+Package 0: PKG=48.5685J, DRAM=25.0001J
+Package 1: PKG=43.8859J, DRAM=22.4765J
+
+Initialize Map (40000x40000 array)
+Execute Map
+Execution time: 8.55776s
+Package 0: PKG=546.235J, PP0=500J, DRAM=665.67J
+Package 1: PKG=513.489J, DRAM=691.095J
+Clean Map
+
+"""
+
+def testParseLog():
+    measures = list(streamMeasures(io.StringIO(LOG)))
+    assert [measure.type for measure in measures] == [MeasureType.IDLE, MeasureType.MAP]
+    assert measures[0].executionTime == 1.0
+    kernel = measures[1]
+    assert kernel.executionTime == 8.55776
+    assert [(p.pkgNumber, p.pkg, p.pp0, p.pp1, p.dram) for p in kernel.packages] == [(0, 546.235, 500.0, None, 665.67), (1, 513.489, None, None, 691.095)]
+
+def testParseHeader(tmp_path):
+    logPath = tmp_path / "O3-m8.txt"
+    logPath.write_text(LOG)
+    result = analyzeFile(str(logPath))
+    assert (result.fileName, result.threads, result.iterations, result.arraySize) == ("O3-m8", 8, 31, 40000)
+
+def testIncompleteBlock():
+    # log interrompido no meio de uma medicao: so as completas (terminadas pela linha em branco) contam
+    cut = LOG.index("Clean Map")
+    assert len(list(streamMeasures(io.StringIO(LOG[:cut])))) == 1
+
+def testLineByLine():
+    # o parser guarda o estado entre as linhas: alimentar uma linha por vez da o mesmo resultado
+    whole = list(streamMeasures(io.StringIO(LOG)))
+    lines = list(streamMeasures(iter(LOG.splitlines(keepends=True))))
+    assert [(m.type, m.executionTime) for m in whole] == [(m.type, m.executionTime) for m in lines]
+
+@pytest.mark.parametrize("logPath", SHIPPED_LOGS + [None])
+def testFileAverages(logPath, stubLog):
+    # a agregacao em stream e igual a de analyzeFile + calculateVariantAverages
+    logPath = logPath if logPath is not None else stubLog
+    expected = withoutMeasures(snapshotAverages(calculateVariantAverages(analyzeFile(logPath))))
+    assert snapshotAverages(calculateFileAverages(logPath)) == expected
+
+def measureFields(measure) -> tuple:
+    # o RSS sai inteiro no texto e com :g no CSV: comparado a parte, com tolerancia
+    return (measure.type, measure.variant, measure.host, measure.executionTime, [(p.pkgNumber, p.pkg, p.dram) for p in measure.packages],
+            {name: (phase.time, phase.threads) for name, phase in measure.phases.items()})
+
+def testRecordLog(stubLog):
+    # o CSV do tccgreen -d e o texto da mesma execucao dao as mesmas medicoes e as mesmas medias
+    recordPath = stubLog.replace(".txt", ".csv")
+    text, records = analyzeFile(stubLog), analyzeFile(recordPath)
+    assert (records.threads, records.iterations, records.arraySize, records.host) == (text.threads, text.iterations, text.arraySize, text.host)
+    assert len(records.measures) == len(text.measures) > 0
+    assert {measure.variant for measure in records.measures} == {"baseline", "tiled"}
+    for recordMeasure, textMeasure in zip(records.measures, text.measures):
+        assert measureFields(recordMeasure) == measureFields(textMeasure)
+        if textMeasure.peakRss is not None:
+            assert recordMeasure.peakRss == pytest.approx(textMeasure.peakRss, abs=1)
+    expected = withoutMeasures(snapshotAverages(calculateVariantAverages(records)))
+    assert snapshotAverages(calculateRecordAverages(recordPath)) == expected
+    assert snapshotAverages(calculateFileAverages(recordPath)) == expected
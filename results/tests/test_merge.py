@@ -0,0 +1,127 @@
+import os
+import random
+import numpy as np
+import pytest
+from measure import MeasureType, analyzeFile
+from merge import QuantileSketch, RunningSummary, loadSummaries, mergeSummaries, saveSummaries, summarizeFile, summarizeTree
+from helpers import runStub
+
+def checkSummary(summary: RunningSummary, expected: RunningSummary):
+    # contagem, extremos e sketch sao exatos em qualquer ordem; media e M2 so ate o arredondamento
+    assert summary.count == expected.count
+    assert (summary.min, summary.max) == (expected.min, expected.max)
+    assert summary.mean == pytest.approx(expected.mean, rel=1e-12)
+    assert summary.m2 == pytest.approx(expected.m2, rel=1e-9, abs=1e-12)
+    assert (summary.sketch is None) == (expected.sketch is None)
+    if summary.sketch is not None:
+        assert summary.sketch.toDict() == expected.sketch.toDict()
+
+def checkSummaries(summaries, expected):
+    assert sorted(summaries) == sorted(expected)
+    for key, configuration in summaries.items():
+        for metric, summary in configuration.metrics.items():
+            checkSummary(summary, expected[key].metrics[metric])
+        assert sorted(configuration.hosts) == sorted(expected[key].hosts)
+        for host, metrics in configuration.hosts.items():
+            for metric, summary in metrics.items():
+                checkSummary(summary, expected[key].hosts[host][metric])
+        assert configuration.jobs == expected[key].jobs
+
+def testRunningSummaryMerge():
+    generator = random.Random(7)
+    values = [generator.lognormvariate(0, 1) for _ in range(500)] + [0.0, -3.5, -0.25]
+    generator.shuffle(values)
+    expected = RunningSummary()
+    for value in values:
+        expected.add(value)
+    assert expected.mean == pytest.approx(np.mean(values))
+    assert expected.stdDev() == pytest.approx(np.std(values))
+
+    chunks = [values[start:start + 60] for start in range(0, len(values), 60)]
+    partials = []
+    for chunk in chunks:
+        partial = RunningSummary()
+        for value in chunk:
+            partial.add(value)
+        partials.append(partial)
+    for order in [partials, partials[::-1], generator.sample(partials, len(partials))]:
+        merged = RunningSummary()
+        for partial in order:
+            merged.merge(RunningSummary.fromDict(partial.toDict()))
+        checkSummary(merged, expected)
+
+    # em arvore: pares juntados ate sobrar um
+    level = [RunningSummary.fromDict(partial.toDict()) for partial in partials]
+    while len(level) > 1:
+        for left, right in zip(level[::2], level[1::2]):
+            left.merge(right)
+        level = level[::2]
+    checkSummary(level[0], expected)
+
+def testMergeWithoutSketch():
+    summary, other = RunningSummary(), RunningSummary(sketch=False)
+    summary.add(1.0)
+    other.add(2.0)
+    summary.merge(other)
+    assert summary.count == 2 and summary.sketch is None and np.isnan(summary.quantile(0.5))
+    empty = RunningSummary()
+    empty.merge(RunningSummary())
+    assert empty.count == 0 and np.isnan(empty.stdDev())
+
+def testSketchQuantiles():
+    generator = random.Random(11)
+    values = [generator.uniform(0.001, 1000) for _ in range(2000)]
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    ordered = sorted(values)
+    for q in [0.0, 0.05, 0.5, 0.95, 1.0]:
+        exact = ordered[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=sketch.relativeAccuracy)
+    with pytest.raises(ValueError):
+        sketch.merge(QuantileSketch(0.05))
+    assert np.isnan(QuantileSketch().quantile(0.5))
+
+@pytest.fixture
+def nodeLogs(tmp_path):
+    # mesma configuracao rodada em tres "nos", mais um algoritmo so no ultimo
+    logs = []
+    for node, arguments in [("node1", ["-m", "-m", "-m"]), ("node2", ["-m", "-m"]), ("node3", ["-m", "-s", "-v", "tiled", "-s"])]:
+        folder = tmp_path / node
+        folder.mkdir()
+        logs.append(runStub(str(folder), "O3-m4", ["-c", "4", "-n", "200", "-i", "2"] + arguments))
+    return logs
+
+def testSummarizeMatchesMeasures(nodeLogs):
+    summaries = summarizeTree([os.path.dirname(log) for log in nodeLogs], workers=1)
+    measures = [measure for log in nodeLogs for measure in analyzeFile(log).measures if measure.type != MeasureType.IDLE]
+    for key, configuration in summaries.items():
+        selected = [measure for measure in measures if (int(measure.type), measure.variant) == key[:1] + key[2:3]]
+        times = [measure.executionTime for measure in selected]
+        energies = [sum(package.pkg for package in measure.packages) for measure in selected]
+        assert configuration.metrics["time"].count == len(times)
+        assert configuration.metrics["time"].mean == pytest.approx(np.mean(times))
+        assert configuration.metrics["time"].stdDev() == pytest.approx(np.std(times))
+        assert configuration.metrics["energy"].mean == pytest.approx(np.mean(energies))
+        assert (configuration.metrics["energy"].min, configuration.metrics["energy"].max) == (min(energies), max(energies))
+    assert sum(configuration.metrics["time"].count for configuration in summaries.values()) == len(measures)
+
+@pytest.mark.parametrize("sketch", [True, False])
+def testMergeOrder(tmp_path, nodeLogs, sketch):
+    # um resumo por no juntado em qualquer ordem, direto ou pelos .json parciais, da o mesmo que resumir tudo junto
+    expected = summarizeTree([os.path.dirname(log) for log in nodeLogs], workers=1, sketch=sketch)
+    perFile = [summarizeFile(log, sketch) for log in nodeLogs]
+    for order in [perFile, perFile[::-1], [perFile[1], perFile[2], perFile[0]]]:
+        merged = {}
+        for summaries in order:
+            mergeSummaries(merged, loadSummaries(saveSummary(tmp_path, summaries)))
+        checkSummaries(merged, expected)
+
+    partials = [saveSummary(tmp_path, summaries) for summaries in perFile[::-1]]
+    checkSummaries(summarizeTree(partials), expected)
+    checkSummaries(summarizeTree([os.path.dirname(nodeLogs[0])] + partials[:2], workers=1, sketch=sketch), expected)
+
+def saveSummary(folder, summaries) -> str:
+    filePath = os.path.join(str(folder), f"partial{len(os.listdir(folder))}.json")
+    saveSummaries(summaries, filePath)
+    return filePath
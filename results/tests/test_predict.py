@@ -0,0 +1,81 @@
+import math
+import pytest
+from measure import MeasureType
+from ingest import ingestTree
+from metrics import ResultTable
+from predict import fitIngestedModels, getMachine, isPredicted, predictConfiguration, validateModels
+from sweep import SweepConfig, checkPredicted
+from synthetic import SyntheticConfig, generateTree
+
+TRAIN_THREADS = [1, 2, 4, 8, 16, 32]
+HELD_OUT_THREADS = [3, 6, 12, 24]
+
+def generate(folder, threads: list[int], seed: int):
+    # o synthetic.py segue uma lei de potencia conhecida: tempo ~ trabalho / threads^0.9, potencia linear nas threads
+    base = SyntheticConfig()
+    base.arraySize, base.iterations, base.repetitions, base.noise = 4000, 31, 5, 0.01
+    generateTree(str(folder), base, [MeasureType.MAP, MeasureType.STENCIL], ["O3"], threads, ["baseline"], seed)
+    return ingestTree(str(folder), workers=1)
+
+@pytest.fixture
+def trained(tmp_path):
+    ingested = generate(tmp_path / "train", TRAIN_THREADS, 1)
+    return (fitIngestedModels(ingested), getMachine(ingested[0]))
+
+def testPowerLaw(trained):
+    models, machine = trained
+    assert sorted(key[1] for key in models) == [MeasureType.MAP, MeasureType.STENCIL]
+    for model in models.values():
+        assert model.machine == machine and model.count == len(TRAIN_THREADS) and model.threads == (1, 32)
+        assert set(model.fits) == {"time", "energy", "dram"}
+        # log(tempo) = ... - 0.9 log(p) + 0 log(p)^2
+        assert model.fits["time"].coefficients[2:].tolist() == pytest.approx([-0.9, 0.0], abs=0.05)
+
+def testHeldOutInsideInterval(tmp_path, trained):
+    models, machine = trained
+    heldOut = generate(tmp_path / "heldout", HELD_OUT_THREADS, 2)
+    table = ResultTable([ingestedFile.average for ingestedFile in heldOut])
+    for i, ingestedFile in enumerate(heldOut):
+        result = ingestedFile.average.baseResult
+        predictions = predictConfiguration(models, machine, ingestedFile.average.measureType, "O3", "baseline", result.threads, result.arraySize, result.iterations)
+        assert predictions is not None and set(predictions) == {"time", "energy", "dram"}
+        for target, prediction in predictions.items():
+            actual = float(getattr(table, target)[i])
+            assert prediction.low <= actual <= prediction.high, (result.fileName, target)
+            assert abs(prediction.value - actual) / actual < 0.05
+
+def testValidation(tmp_path):
+    ingested = generate(tmp_path, TRAIN_THREADS, 3)
+    validation = validateModels([ingestedFile.average for ingestedFile in ingested], [getMachine(ingestedFile) for ingestedFile in ingested])
+    for target, (errors, inside) in validation.items():
+        # leave-one-out so nas 4 threads do meio de cada algoritmo: as pontas ficariam fora da faixa
+        assert len(errors) == 2 * (len(TRAIN_THREADS) - 2), target
+        assert inside.all() and errors.max() < 0.05, target
+
+def testNoExtrapolation(trained):
+    # com --predict, covers e o que impede o sweep de pular configuracoes fora da faixa medida
+    models, machine = trained
+    model = models[(machine, MeasureType.MAP, "O3", "baseline")]
+    assert model.covers(12, 4000, 31)
+    assert not model.covers(64, 4000, 31) # mais threads do que as medidas
+    assert not model.covers(12, 8000, 31) and not model.covers(12, 4000, 62) # mais trabalho
+    assert not model.covers(12, 2000, 31) # menos trabalho
+    assert predictConfiguration(models, machine, MeasureType.MAP, "O3", "baseline", 64, 4000, 31) is None
+    assert predictConfiguration(models, machine, MeasureType.MAP, "O0", "baseline", 12, 4000, 31) is None # otimizacao nao medida
+    assert predictConfiguration(models, "other", MeasureType.MAP, "O3", "baseline", 12, 4000, 31) is None # outra maquina
+    assert not isPredicted(None, math.inf)
+
+def testSweepSkipsOnlyInterpolated(trained):
+    models, machine = trained
+    configs = []
+    for threads, arraySize, completed in [(12, 4000, 0), (12, 4000, 2), (64, 4000, 0), (12, 8000, 0)]:
+        config = SweepConfig()
+        config.threads, config.arraySize, config.iterations, config.completed = threads, arraySize, 31, completed
+        configs.append(config)
+    # a energia nao e lei de potencia pura (potencia linear nas threads): intervalo de ~9% com 6 pontos
+    assert checkPredicted(configs, models, machine, tolerance=0.1) == 1
+    assert [config.remaining() for config in configs] == [0, 3, 5, 5]
+    assert configs[0].prediction is not None and isPredicted(configs[0].prediction, 0.1)
+    # tolerancia menor que o intervalo de predicao: roda mesmo dentro da faixa
+    configs[0].prediction = None
+    assert checkPredicted(configs[:1], models, machine, tolerance=1e-4) == 0
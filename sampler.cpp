@@ -0,0 +1,109 @@
+#include "sampler.h"
+#include <atomic>
+#include <chrono>
+#include <cmath>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+
+using namespace std;
+
+// Trace binario (lido por results/powertrace.py), registros de tamanho fixo para poder mapear em memoria:
+//   cabecalho: "TCCTRACE", uint32 versao, uint32 quantidade de pacotes
+//   registro:  double tempo (s desde o inicio), int32 algoritmo (-1 fora de um kernel), int32 fase,
+//              double energia[pacotes][4] (pkg, pp0, pp1, dram em J acumulados, nan se indisponivel)
+static const char TRACE_MAGIC[8] = {'T', 'C', 'C', 'T', 'R', 'A', 'C', 'E'};
+static const uint32_t TRACE_VERSION = 1;
+
+struct TraceSample {
+    double time;
+    int32_t kind;
+    int32_t stage;
+};
+
+static FILE* traceFile = NULL;
+static vector<EnergyPackage*> tracePackages; // instancias proprias, o sampler nao mexe nas da thread principal
+static thread traceThread;
+static atomic<bool> traceRunning(false);
+static atomic<int> traceKind(-1);
+static atomic<int> traceStage(STAGE_NONE);
+
+static void writeSample(double start, vector<double>& energies) {
+    TraceSample sample;
+    sample.kind = traceKind.load();
+    sample.stage = traceStage.load();
+    for (size_t i = 0; i < tracePackages.size(); ++i) {
+        EnergyPackage* r = tracePackages[i];
+        r->sample();
+        energies[4*i] = r->pkg_total_energy();
+        energies[4*i + 1] = r->pp0_available() ? r->pp0_total_energy() : NAN;
+        energies[4*i + 2] = r->pp1_available() ? r->pp1_total_energy() : NAN;
+        energies[4*i + 3] = r->dram_available() ? r->dram_total_energy() : NAN;
+    }
+    sample.time = omp_get_wtime() - start;
+    fwrite(&sample, sizeof(sample), 1, traceFile);
+    fwrite(energies.data(), sizeof(double), energies.size(), traceFile);
+}
+
+static void traceLoop(double period) {
+    vector<double> energies(4 * tracePackages.size());
+    double start = omp_get_wtime();
+    chrono::steady_clock::time_point next = chrono::steady_clock::now();
+    chrono::steady_clock::duration step = chrono::duration_cast<chrono::steady_clock::duration>(chrono::duration<double>(period));
+    while (traceRunning.load()) {
+        writeSample(start, energies);
+        // sleep_until em vez de sleep_for: o tempo de leitura dos MSRs nao acumula atraso
+        next += step;
+        this_thread::sleep_until(next);
+    }
+    writeSample(start, energies);
+}
+
+bool startTrace(const char* path, int frequency, vector<EnergyPackage*> packages) {
+    #ifdef _WIN32
+    return false;
+    #endif
+    stopTrace();
+    traceFile = fopen(path, "wb");
+    if (traceFile == NULL)
+        return false;
+    setvbuf(traceFile, NULL, _IOFBF, 1 << 20);
+    for (EnergyPackage* r : packages)
+        tracePackages.push_back(r->clone());
+
+    uint32_t packageCount = tracePackages.size();
+    fwrite(TRACE_MAGIC, sizeof(TRACE_MAGIC), 1, traceFile);
+    fwrite(&TRACE_VERSION, sizeof(TRACE_VERSION), 1, traceFile);
+    fwrite(&packageCount, sizeof(packageCount), 1, traceFile);
+
+    static bool registered = false;
+    if (!registered) {
+        atexit(stopTrace); // um exit() no meio dos testes nao pode destruir a thread ainda rodando
+        registered = true;
+    }
+    traceRunning = true;
+    traceThread = thread(traceLoop, 1.0 / frequency);
+    return true;
+}
+
+void setTracePhase(MeasureKind kind, TraceStage stage) {
+    traceKind = kind;
+    traceStage = stage;
+}
+
+void clearTracePhase() {
+    traceKind = -1;
+    traceStage = STAGE_NONE;
+}
+
+void stopTrace() {
+    if (!traceRunning.load())
+        return;
+    traceRunning = false;
+    traceThread.join();
+    fclose(traceFile);
+    traceFile = NULL;
+    for (EnergyPackage* r : tracePackages)
+        delete r;
+    tracePackages.clear();
+}
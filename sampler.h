@@ -0,0 +1,19 @@
+#ifndef SAMPLER_H
+#define SAMPLER_H
+
+#include "utils.h"
+
+// fase do kernel em cada amostra do trace
+enum TraceStage {
+    STAGE_NONE = 0,
+    STAGE_INIT = 1,
+    STAGE_EXECUTE = 2,
+    STAGE_CLEAN = 3
+};
+
+bool startTrace(const char* path, int frequency, std::vector<EnergyPackage*> packages);
+void setTracePhase(MeasureKind kind, TraceStage stage);
+void clearTracePhase();
+void stopTrace();
+
+#endif
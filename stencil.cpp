@@ -27,3 +27,99 @@ void stencil(double** arr, double** arr_new, int m, int n, int iterations)
         }
     }
 }
+
+// array contiguo, laco interno vetorizado
+void stencilSimd(double* arr, double* arr_new, int m, int n, int iterations)
+{
+    #pragma omp parallel shared(arr,arr_new) firstprivate(m,n,iterations)
+    {
+        for (int it = 0; it < iterations; ++it)
+        {
+            #pragma omp for schedule(static)
+            for (int x = 1; x < m - 1; ++x)
+            {
+                const double* up = arr + (long long)(x - 1) * n;
+                const double* row = arr + (long long)x * n;
+                const double* down = arr + (long long)(x + 1) * n;
+                double* out = arr_new + (long long)x * n;
+                #pragma omp simd
+                for (int y = 1; y < n - 1; ++y)
+                    out[y] = (up[y] + down[y] + row[y - 1] + row[y + 1]) / 4;
+            }
+
+            #pragma omp single
+            {
+                double* temp = arr;
+                arr = arr_new;
+                arr_new = temp;
+            }
+        }
+    }
+}
+
+// Bloqueio espacial e temporal com blocos sobrepostos: cada bloco copia sua regiao mais STENCIL_STEPS
+// celulas de borda para um buffer local e avanca STENCIL_STEPS iteracoes ali, na cache, antes de gravar
+// de volta; a borda e recalculada pelos vizinhos (trabalho extra ~ (1 + 2*STEPS/TILE)^2), sem sincronizacao
+// entre blocos. As contas sao as mesmas do stencil(), na mesma ordem.
+#define STENCIL_TILE 256
+#define STENCIL_STEPS 4
+
+static void stencilTile(const double* arr, double* arr_new, int m, int n, int x0, int y0, int steps, double* local, int stride)
+{
+    const int x1 = x0 + STENCIL_TILE < m - 1 ? x0 + STENCIL_TILE : m - 1;
+    const int y1 = y0 + STENCIL_TILE < n - 1 ? y0 + STENCIL_TILE : n - 1;
+    const int lx0 = x0 - steps > 0 ? x0 - steps : 0, lx1 = x1 + steps < m ? x1 + steps : m;
+    const int ly0 = y0 - steps > 0 ? y0 - steps : 0, ly1 = y1 + steps < n ? y1 + steps : n;
+    double* a = local;
+    double* b = local + stride * stride;
+    for (int x = lx0; x < lx1; ++x)
+        for (int y = ly0; y < ly1; ++y)
+            a[(x - lx0) * stride + (y - ly0)] = b[(x - lx0) * stride + (y - ly0)] = arr[(long long)x * n + y];
+
+    for (int s = 1; s <= steps; ++s)
+    {
+        // a cada passo a regiao valida encolhe 1 celula, exceto nas paredes fixas do array
+        const int vx0 = lx0 > 0 ? lx0 + s : 1, vx1 = lx1 < m ? lx1 - s : m - 1;
+        const int vy0 = ly0 > 0 ? ly0 + s : 1, vy1 = ly1 < n ? ly1 - s : n - 1;
+        for (int x = vx0; x < vx1; ++x)
+        {
+            const int row = (x - lx0) * stride - ly0;
+            #pragma omp simd
+            for (int y = vy0; y < vy1; ++y)
+                b[row + y] = (a[row - stride + y] + a[row + stride + y] + a[row + y - 1] + a[row + y + 1]) / 4;
+        }
+        double* temp = a;
+        a = b;
+        b = temp;
+    }
+
+    for (int x = x0; x < x1; ++x)
+        for (int y = y0; y < y1; ++y)
+            arr_new[(long long)x * n + y] = a[(x - lx0) * stride + (y - ly0)];
+}
+
+void stencilTiled(double* arr, double* arr_new, int m, int n, int iterations)
+{
+    const int stride = STENCIL_TILE + 2 * STENCIL_STEPS;
+    const int tilesX = (m - 2 + STENCIL_TILE - 1) / STENCIL_TILE, tilesY = (n - 2 + STENCIL_TILE - 1) / STENCIL_TILE;
+    #pragma omp parallel shared(arr,arr_new) firstprivate(m,n,iterations)
+    {
+        double* local = new double[2 * stride * stride];
+        for (int it = 0; it < iterations; it += STENCIL_STEPS)
+        {
+            const int steps = iterations - it < STENCIL_STEPS ? iterations - it : STENCIL_STEPS;
+            #pragma omp for collapse(2) schedule(static)
+            for (int tx = 0; tx < tilesX; ++tx)
+                for (int ty = 0; ty < tilesY; ++ty)
+                    stencilTile(arr, arr_new, m, n, 1 + tx * STENCIL_TILE, 1 + ty * STENCIL_TILE, steps, local, stride);
+
+            #pragma omp single
+            {
+                double* temp = arr;
+                arr = arr_new;
+                arr_new = temp;
+            }
+        }
+        delete []local;
+    }
+}
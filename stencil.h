@@ -6,5 +6,7 @@
 #include <cstdlib>
 
 void stencil(double** arr, double** arr_new, int m, int n, int iterations);
+void stencilSimd(double* arr, double* arr_new, int m, int n, int iterations);
+void stencilTiled(double* arr, double* arr_new, int m, int n, int iterations);
 
 #endif
@@ -1,46 +1,74 @@
 #include "utils.h"
+#include <cstdio>
+#include <cstdlib>
+#include <ctime>
+#include <fstream>
+#ifdef __linux__
+#include <unistd.h>
+#include <sys/resource.h>
+#endif
 
 using namespace std;
 
-void initializePackages(vector<Rapl*> *packages) {
+// registros estruturados (CSV, uma linha por medicao), alem do log em texto
+static FILE* recordFile = NULL;
+static long recordSession = 0;
+
+static const char* VARIANT_NAMES[] = {"baseline", "contiguous", "simd", "tiled"};
+
+const char* getVariantName(KernelVariant variant) {
+    return VARIANT_NAMES[variant];
+}
+
+bool parseVariant(const string& name, KernelVariant* variant) {
+    for (int v = VARIANT_BASELINE; v <= VARIANT_TILED; ++v) {
+        if (name == VARIANT_NAMES[v]) {
+            *variant = (KernelVariant)v;
+            return true;
+        }
+    }
+    return false;
+}
+
+void initializePackages(vector<EnergyPackage*> *packages, const string& backend) {
     #ifdef _WIN32
     return;
     #endif
-    const unsigned int processor_count = std::thread::hardware_concurrency();
-    for (unsigned int i=0; i<processor_count; ++i){
-        Rapl* r = new Rapl(i);
-        bool is_new = true;
-        for (Rapl* rapl : *packages)
-            if (rapl->get_package() == r->get_package())
-                is_new = false;
-        if (is_new)
-            packages->push_back(r);
-    }
+    // sem pacotes as medicoes seguem so com o tempo, como no Windows
+    if (!createPackages(backend, packages))
+        cout << "Nenhum pacote disponivel para medir energia (backend " << backend << ")" << endl;
 }
 
-void resetPackages(vector<Rapl*> packages) {
+void resetPackages(vector<EnergyPackage*> packages) {
     #ifdef _WIN32
     return;
     #endif
-    for (Rapl* r : packages)
+    for (EnergyPackage* r : packages)
         r->reset();
 }
 
-void samplePackages(vector<Rapl*> packages) {
+void samplePackages(vector<EnergyPackage*> packages) {
     #ifdef _WIN32
     return;
     #endif
-    for (Rapl* r : packages)
+    for (EnergyPackage* r : packages)
         r->sample();
 }
 
-void printPackages(vector<Rapl*> packages) {
+vector<EnergyPackage*> clonePackages(vector<EnergyPackage*> packages) {
+    vector<EnergyPackage*> clones;
+    for (EnergyPackage* r : packages)
+        clones.push_back(r->clone());
+    return clones;
+}
+
+void printPackages(vector<EnergyPackage*> packages, const char* prefix) {
     #ifdef _WIN32
     return;
     #endif
-    for (Rapl* r : packages)
+    for (EnergyPackage* r : packages)
     {
-        cout << "Package " << r->get_package() << ": PKG=" << r->pkg_total_energy() << "J";
+        cout << prefix << "Package " << r->get_package() << ": PKG=" << r->pkg_total_energy() << "J";
         if (r->pp0_available()) {
             cout << ", PP0=" << r->pp0_total_energy() << "J";
         }
@@ -56,4 +84,132 @@ void printPackages(vector<Rapl*> packages) {
 
 void printExecutionTime(double clock_start, double clock_end) {
     cout << "Execution time: " << (clock_end - clock_start) << "s" << endl;
-}
\ No newline at end of file
+}
+
+void resetPeakMemory() {
+    #ifdef __linux__
+    // "5" zera o VmHWM (Linux 4.0+); sem permissao o pico continua sendo o do processo inteiro
+    ofstream clearRefs("/proc/self/clear_refs");
+    if (clearRefs)
+        clearRefs << "5";
+    #endif
+}
+
+double getPeakMemory() {
+    #ifdef __linux__
+    ifstream status("/proc/self/status");
+    string line;
+    while (getline(status, line)) {
+        if (line.compare(0, 6, "VmHWM:") == 0)
+            return stod(line.substr(6)) / 1024; // kB
+    }
+    struct rusage usage;
+    if (getrusage(RUSAGE_SELF, &usage) == 0)
+        return usage.ru_maxrss / 1024.0;
+    #endif
+    return -1;
+}
+
+static void printMemory(double peakMemory) {
+    if (peakMemory < 0)
+        cout << "-";
+    else
+        cout << (long)peakMemory << "MB";
+}
+
+void printExecutionMemory(double peakMemory) {
+    cout << "Execution peak RSS: ";
+    printMemory(peakMemory);
+    cout << endl;
+}
+
+void printPhase(const char* phase, double seconds, int threads, double peakMemory, vector<EnergyPackage*> packages) {
+    cout << "Phase " << phase << ": " << seconds << "s, " << threads << " threads, peak RSS ";
+    printMemory(peakMemory);
+    cout << endl;
+    string prefix = string("Phase ") + phase + " ";
+    printPackages(packages, prefix.c_str());
+}
+
+static string getEnvironment(const char* name, const char* fallback) {
+    const char* value = getenv(name);
+    return value != NULL && value[0] != '\0' ? value : fallback;
+}
+
+// identifica o no e a tarefa do slurm, para juntar os logs de um job array espalhado por varios nos
+static string getHostName() {
+    #ifdef __linux__
+    char name[256];
+    if (gethostname(name, sizeof(name)) == 0) {
+        name[sizeof(name) - 1] = '\0';
+        return name;
+    }
+    #endif
+    return getEnvironment("COMPUTERNAME", "-");
+}
+
+static string getJobId() {
+    // num job array o SLURM_JOB_ID muda por tarefa; o id do array e o mesmo para todas
+    return getEnvironment("SLURM_ARRAY_JOB_ID", getEnvironment("SLURM_JOB_ID", "-").c_str());
+}
+
+static string getTaskId() {
+    return getEnvironment("SLURM_ARRAY_TASK_ID", getEnvironment("SLURM_PROCID", "-").c_str());
+}
+
+string getHostTag() {
+    return "Host: " + getHostName() + " (job " + getJobId() + ", tarefa " + getTaskId() + ")";
+}
+
+bool openRecordFile(const char* path) {
+    FILE* fp = fopen(path, "a");
+    if (fp == NULL)
+        return false;
+    if (recordFile != NULL)
+        fclose(recordFile);
+    recordFile = fp;
+    recordSession = (long)time(NULL);
+    fprintf(recordFile, "# session,type,variant,threads,size,iterations,time,packages,[package,pkg,pp0,pp1,dram]*packages\n");
+    fprintf(recordFile, "# fases do kernel (preparo, execucao, limpeza): # phase,stage,peakRssMb,<mesmas colunas>\n");
+    fprintf(recordFile, "# host %s job %s tarefa %s\n", getHostName().c_str(), getJobId().c_str(), getTaskId().c_str());
+    fflush(recordFile);
+    return true;
+}
+
+static void writeEnergy(bool available, double energy) {
+    if (available)
+        fprintf(recordFile, ",%.9g", energy);
+    else
+        fprintf(recordFile, ",nan");
+}
+
+static void writeRow(MeasureKind kind, KernelVariant variant, int threads, int arrSize, int iterations, double executionTime, vector<EnergyPackage*> packages) {
+    fprintf(recordFile, "%ld,%d,%d,%d,%d,%d,%.9g,%zu", recordSession, (int)kind, (int)variant, threads, arrSize, iterations, executionTime, packages.size());
+    for (EnergyPackage* r : packages)
+    {
+        fprintf(recordFile, ",%d", r->get_package());
+        writeEnergy(true, r->pkg_total_energy());
+        writeEnergy(r->pp0_available(), r->pp0_total_energy());
+        writeEnergy(r->pp1_available(), r->pp1_total_energy());
+        writeEnergy(r->dram_available(), r->dram_total_energy());
+    }
+    fprintf(recordFile, "\n");
+    fflush(recordFile); // cada linha e uma medicao completa, mesmo se o job for interrompido
+}
+
+void writeRecord(MeasureKind kind, KernelVariant variant, int threads, int arrSize, int iterations, double executionTime, vector<EnergyPackage*> packages) {
+    if (recordFile == NULL)
+        return;
+    writeRow(kind, variant, threads, arrSize, iterations, executionTime, packages);
+}
+
+// comentario para quem le o CSV como tabela; as fases vem antes da linha do kernel a que pertencem
+void writePhaseRecord(int stage, double peakMemory, MeasureKind kind, KernelVariant variant, int threads, int arrSize, int iterations, double seconds, vector<EnergyPackage*> packages) {
+    if (recordFile == NULL)
+        return;
+    if (peakMemory < 0)
+        fprintf(recordFile, "# phase,%d,nan,", stage);
+    else
+        fprintf(recordFile, "# phase,%d,%.9g,", stage, peakMemory);
+    writeRow(kind, variant, threads, arrSize, iterations, seconds, packages);
+}
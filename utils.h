@@ -1,16 +1,45 @@
 #ifndef UTILS_H
 #define UTILS_H
 
-#include "rapl.h"
+#include "energy.h"
 #include <omp.h>
 #include <iostream>
 #include <vector>
 #include <thread>
 
-void initializePackages(std::vector<Rapl*> *packages);
-void resetPackages(std::vector<Rapl*> packages);
-void samplePackages(std::vector<Rapl*> packages);
-void printPackages(std::vector<Rapl*> packages);
+// mesmos codigos do MeasureType em results/measure.py
+enum MeasureKind {
+    MEASURE_IDLE = 0,
+    MEASURE_MAP = 1,
+    MEASURE_REDUCTION = 2,
+    MEASURE_STENCIL = 3
+};
+
+// variantes dos kernels (mesma ordem de KERNEL_VARIANTS em results/measure.py)
+enum KernelVariant {
+    VARIANT_BASELINE = 0,   // double** com uma alocacao por linha
+    VARIANT_CONTIGUOUS = 1, // bloco unico com first-touch, mesmos kernels
+    VARIANT_SIMD = 2,       // bloco unico, lacos vetorizados (reduction soma em double)
+    VARIANT_TILED = 3       // bloco unico, bloqueio temporal no Map e no Stencil
+};
+
+const char* getVariantName(KernelVariant variant);
+bool parseVariant(const std::string& name, KernelVariant* variant);
+void initializePackages(std::vector<EnergyPackage*> *packages, const std::string& backend);
+void resetPackages(std::vector<EnergyPackage*> packages);
+void samplePackages(std::vector<EnergyPackage*> packages);
+std::vector<EnergyPackage*> clonePackages(std::vector<EnergyPackage*> packages);
+void printPackages(std::vector<EnergyPackage*> packages, const char* prefix = "");
 void printExecutionTime(double clock_start, double clock_end);
+// pico de memoria residente (MB) desde o ultimo resetPeakMemory, -1 se indisponivel
+void resetPeakMemory();
+double getPeakMemory();
+void printExecutionMemory(double peakMemory);
+void printPhase(const char* phase, double seconds, int threads, double peakMemory, std::vector<EnergyPackage*> packages);
+std::string getHostTag();
+bool openRecordFile(const char* path);
+void writeRecord(MeasureKind kind, KernelVariant variant, int threads, int arrSize, int iterations, double executionTime, std::vector<EnergyPackage*> packages);
+// stage: TraceStage do sampler.h (preparo, execucao ou limpeza)
+void writePhaseRecord(int stage, double peakMemory, MeasureKind kind, KernelVariant variant, int threads, int arrSize, int iterations, double seconds, std::vector<EnergyPackage*> packages);
 
 #endif